@@ -0,0 +1,322 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+import houseModel
+import lazy_grid
+import numba_kernels
+import parallel_sweep
+import vector_engine
+from houseModel import ModelParams
+
+MODES = ('cash', 'full', 'hybrid')
+VALUE_COLUMNS = ('Net Worth', 'Out-of-Pocket Cost')
+SCENARIO_INPUTS = ('price', 'mortgage_rate', 'term', 'investment_return', 'housing_return', 'duration')
+
+# Inputs forced on a share of the random cases, because the model branches on them
+EDGE_CASES = ('zero_mortgage_rate', 'zero_investment_return', 'zero_housing_return', 'past_term',
+              'bear_in_horizon', 'bear_beyond_horizon', 'insufficient_portfolio')
+
+# Largest relative difference allowed, taken against max(|reference|, $1); grid values are
+# rounded to cents, so there one cent of absolute difference is allowed for rounding ties
+TOLERANCE = 1e-9
+GRID_TOLERANCE = 0.01
+
+
+def random_cases(count, seed=0, edge_share=0.5):
+    """
+    A table of random scenarios: mode, the simulate_scenario inputs and a
+    full set of ModelParams fields per row. About edge_share of the rows
+    force one of EDGE_CASES (named in the 'edge' column): zero rates, a
+    horizon at or past the mortgage term, a bear market inside or beyond
+    the horizon, or a portfolio too small for the purchase.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(count):
+        price = float(rng.integers(40, 400)) * 5_000
+        row = {
+            'mode': str(rng.choice(MODES)),
+            'price': price,
+            'mortgage_rate': round(float(rng.uniform(0.02, 0.09)), 4),
+            'term': int(rng.choice([10, 15, 20, 30])),
+            'investment_return': round(float(rng.uniform(-0.05, 0.12)), 4),
+            'housing_return': round(float(rng.uniform(-0.03, 0.08)), 4),
+            'duration': int(rng.integers(1, 41)),
+            'down_payment': round(price * float(rng.uniform(0.05, 0.4)), -3),
+            'initial_portfolio': round(price * float(rng.uniform(1.1, 3.0)), -3),
+            'capital_gains_tax': round(float(rng.uniform(0.0, 0.3)), 3),
+            'income_tax_rate': round(float(rng.uniform(0.0, 0.45)), 3),
+            'investment_cost_basis_ratio': round(float(rng.uniform(0.0, 1.0)), 3),
+            'loan_to_value_hybrid': round(float(rng.uniform(0.5, 0.9)), 3),
+            'monthly_cash_flow': round(float(rng.uniform(0, 15_000)), -1),
+            'property_tax_rate': round(float(rng.uniform(0.0, 0.025)), 4),
+            'home_insurance_rate': round(float(rng.uniform(0.0, 0.006)), 4),
+            'closing_cost_rate': round(float(rng.uniform(0.0, 0.05)), 4),
+            'bear_market_enabled': bool(rng.random() < 0.5),
+            'bear_market_year': int(rng.integers(1, 16)),
+            'bear_market_drop': round(float(rng.uniform(0.1, 0.5)), 3),
+            'bear_market_recovery_years': int(rng.integers(1, 9)),
+            'edge': '',
+        }
+        if rng.random() < edge_share:
+            edge = str(rng.choice(EDGE_CASES))
+            row['edge'] = edge
+            if edge == 'zero_mortgage_rate':
+                row['mortgage_rate'] = 0.0
+            elif edge == 'zero_investment_return':
+                row['investment_return'] = 0.0
+            elif edge == 'zero_housing_return':
+                row['housing_return'] = 0.0
+            elif edge == 'past_term':
+                row['term'] = int(rng.choice([5, 10, 15]))
+                row['duration'] = row['term'] + int(rng.integers(0, 11))
+            elif edge == 'bear_in_horizon':
+                row['bear_market_enabled'] = True
+                row['bear_market_year'] = int(rng.integers(1, row['duration'] + 1))
+            elif edge == 'bear_beyond_horizon':
+                row['bear_market_enabled'] = True
+                row['bear_market_year'] = row['duration'] + int(rng.integers(1, 10))
+            else:
+                # Less than the price, and often less than the down payment
+                row['initial_portfolio'] = round(price * float(rng.uniform(0.0, 0.8)), -3)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _params(row):
+    return ModelParams(**{name: row[name] for name in ModelParams.__slots__})
+
+
+def reference_values(cases):
+    """houseModel.simulate_scenario cell by cell: (2, n) values and a mask of the cases it rejects."""
+    values = np.full((2, len(cases)), np.nan)
+    failed = np.zeros(len(cases), dtype=bool)
+    for i, row in enumerate(cases.to_dict('records')):
+        try:
+            values[:, i] = houseModel.simulate_scenario(*(row[name] for name in SCENARIO_INPUTS), row['mode'],
+                                                        _params(row))
+        except ValueError:
+            failed[i] = True
+    return values, failed
+
+
+def gui_values(cases):
+    """The GUI's own copy of the model (HouseCalculatorGUI.simulate_scenario), cell by cell."""
+    from house_calculator_gui import HouseCalculatorGUI
+
+    # The model methods only call each other, so no window is needed
+    gui = object.__new__(HouseCalculatorGUI)
+    values = np.full((2, len(cases)), np.nan)
+    failed = np.zeros(len(cases), dtype=bool)
+    for i, row in enumerate(cases.to_dict('records')):
+        try:
+            values[:, i] = gui.simulate_scenario(
+                row['price'], row['down_payment'], row['mortgage_rate'], row['term'], row['investment_return'],
+                row['housing_return'], row['duration'], row['mode'], row['loan_to_value_hybrid'],
+                row['capital_gains_tax'], row['income_tax_rate'], row['initial_portfolio'],
+                row['monthly_cash_flow'], row['investment_cost_basis_ratio'], row['property_tax_rate'],
+                row['home_insurance_rate'], row['closing_cost_rate'], row['bear_market_enabled'],
+                row['bear_market_year'], row['bear_market_drop'], row['bear_market_recovery_years'])
+        except ValueError:
+            failed[i] = True
+    return values, failed
+
+
+def batch_values(cases, simulate):
+    """
+    A vectorized simulate_scenario over all cases, one call per mode with
+    every input and parameter passed as an array; cells the portfolio
+    can't fund come back as NaN (insufficient='nan').
+    """
+    values = np.full((2, len(cases)), np.nan)
+    for mode in MODES:
+        rows = np.flatnonzero(cases['mode'].to_numpy() == mode)
+        if not len(rows):
+            continue
+        subset = cases.iloc[rows]
+        params = {name: subset[name].to_numpy(dtype=float) for name in ModelParams.__slots__}
+        inputs = [subset[name].to_numpy(dtype=float) for name in SCENARIO_INPUTS]
+        values[:, rows] = simulate(*inputs, mode, params, insufficient='nan')
+    return values, np.isnan(values[0])
+
+
+def scenario_engines():
+    """{name: function(cases) -> (values, failed)} for every implementation compared with the reference."""
+    engines = {}
+    try:
+        import house_calculator_gui  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        engines['gui'] = gui_values
+    engines['numpy'] = lambda cases: batch_values(cases, vector_engine.simulate_scenario)
+    # Without numba the kernels run as plain Python, which still checks their arithmetic
+    numba_name = 'numba' if numba_kernels.AVAILABLE else 'numba (not compiled)'
+    engines[numba_name] = lambda cases: batch_values(cases, numba_kernels.simulate_scenario)
+    return engines
+
+
+def differences(engine, reference, reference_failed, values, failed, cases=None):
+    """Max absolute and relative differences per value column, plus disagreement on rejected cases."""
+    report = []
+    both = ~reference_failed & ~failed
+    for k, column in enumerate(VALUE_COLUMNS):
+        diff = np.abs(values[k, both] - reference[k, both])
+        diff[np.isnan(diff)] = np.inf
+        relative = diff / np.maximum(np.abs(reference[k, both]), 1.0)
+        worst = int(np.flatnonzero(both)[np.argmax(diff)]) if diff.size and diff.max() > 0 else None
+        report.append({
+            'Engine': engine,
+            'Column': column,
+            'Cells': int(both.sum()),
+            'Max Abs Diff': float(diff.max(initial=0.0)),
+            'Max Rel Diff': float(relative.max(initial=0.0)),
+            'Rejected': int(failed.sum()),
+            'Rejection Mismatches': int((failed != reference_failed).sum()),
+            'Worst Case': worst if cases is None or worst is None else cases.index[worst],
+        })
+    return report
+
+
+def check_scenarios(cases):
+    """Compare every scenario engine with houseModel.simulate_scenario on the given cases."""
+    reference, reference_failed = reference_values(cases)
+    report = []
+    for name, engine in scenario_engines().items():
+        values, failed = engine(cases)
+        report += differences(name, reference, reference_failed, values, failed, cases)
+    return pd.DataFrame(report)
+
+
+def random_grids(count, seed=0):
+    """Small random run_grid argument sets; portfolios always cover the purchase, which run_grid requires."""
+    rng = np.random.default_rng(seed)
+    cases = random_cases(count, seed, edge_share=0.0)
+    grids = []
+    for row in cases.to_dict('records'):
+        prices = sorted(float(p) * 5_000 for p in rng.choice(np.arange(40, 400), size=int(rng.integers(1, 4)),
+                                                               replace=False))
+        years = sorted(int(y) for y in rng.choice(np.arange(1, 41), size=int(rng.integers(1, 4)), replace=False))
+        rates = [0.0] if rng.random() < 0.2 else []
+        rates += [round(float(r), 4) for r in rng.uniform(0.02, 0.09, size=int(rng.integers(1, 3)))]
+        params = _params(row).replace(initial_portfolio=round(max(prices) * float(rng.uniform(1.6, 3.0)), -3),
+                                      bear_market_year=int(rng.integers(1, max(years) + 10)))
+        grids.append({
+            'purchase_prices': prices,
+            'years': years,
+            'investment_returns': {'low': round(float(rng.uniform(-0.05, 0.04)), 4), 'zero': 0.0,
+                                   'high': round(float(rng.uniform(0.04, 0.12)), 4)},
+            'housing_returns': {'flat': 0.0, 'rising': round(float(rng.uniform(0.0, 0.08)), 4)},
+            'mortgage_rates': rates,
+            'terms': sorted(int(t) for t in rng.choice([5, 10, 15, 20, 30], size=2, replace=False)),
+            'params': params,
+        })
+    return grids
+
+
+def reference_grid(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, params):
+    """The grid's (2, rows) values in run_grid row order from houseModel.simulate_scenario, rounded to cents."""
+    values = []
+    for price in purchase_prices:
+        for duration in years:
+            for investment_return in investment_returns.values():
+                for housing_return in housing_returns.values():
+                    values.append(houseModel.simulate_scenario(price, 0, 0, investment_return, housing_return,
+                                                               duration, 'cash', params))
+                    for rate in mortgage_rates:
+                        for mode in ('full', 'hybrid'):
+                            for term in terms:
+                                values.append(houseModel.simulate_scenario(price, rate, term, investment_return,
+                                                                           housing_return, duration, mode, params))
+    return np.round(np.array(values, dtype=float).T, 2)
+
+
+def grid_engines():
+    """{name: function(**grid) -> (2, rows) values} for the whole-grid paths."""
+    def run_grid(backend):
+        def evaluate(**grid):
+            previous = vector_engine.get_backend()
+            try:
+                vector_engine.set_backend(backend)
+                return vector_engine.grid_values(**grid)
+            finally:
+                vector_engine.set_backend(previous)
+        return evaluate
+
+    def parallel(**grid):
+        # One price per task so even these small grids go through the worker pool
+        df = parallel_sweep.run_grid_parallel(**grid, workers=2, block_rows=1)
+        return df[list(VALUE_COLUMNS)].to_numpy().T
+
+    def lazy(**grid):
+        # Small blocks, read back in a shuffled order, exercise the block plan and cache
+        view = lazy_grid.LazyGrid(**grid, block_rows=7, cache_blocks=2)
+        order = np.random.default_rng(0).permutation(len(view))
+        values = np.empty((2, len(view)))
+        values[:, order] = view[order][list(VALUE_COLUMNS)].to_numpy().T
+        return values
+
+    engines = {'run_grid numpy': run_grid('numpy')}
+    if numba_kernels.AVAILABLE:
+        engines['run_grid numba'] = run_grid('numba')
+    engines['run_grid_parallel'] = parallel
+    engines['lazy_grid'] = lazy
+    return engines
+
+
+def check_grids(grids):
+    """Compare the grid engines with a cell-by-cell reference over each grid in turn."""
+    engines = grid_engines()
+    results = {name: [] for name in engines}
+    references = []
+    for grid in grids:
+        references.append(reference_grid(**grid))
+        for name, engine in engines.items():
+            results[name].append(engine(**grid))
+    reference = np.concatenate(references, axis=1)
+    ok = np.zeros(reference.shape[1], dtype=bool)
+    report = []
+    for name, values in results.items():
+        report += differences(name, reference, ok, np.concatenate(values, axis=1), ok)
+    return pd.DataFrame(report)
+
+
+def failures(report, tolerance=TOLERANCE, measure='Max Rel Diff'):
+    """Rows of a report whose differences exceed tolerance or whose engine disagrees on rejected cases."""
+    return report[(report[measure] > tolerance) | (report['Rejection Mismatches'] > 0)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Differential check of the fast engines against houseModel")
+    parser.add_argument('--cases', type=int, default=2000, help="Random scenarios to compare")
+    parser.add_argument('--grids', type=int, default=10, help="Random run_grid argument sets to compare")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="Largest relative difference allowed")
+    args = parser.parse_args()
+
+    cases = random_cases(args.cases, args.seed)
+    scenarios = check_scenarios(cases)
+    grids = check_grids(random_grids(args.grids, args.seed))
+    counts = cases['edge'].replace('', 'none').value_counts()
+    print(f"{len(cases):,} scenarios ({', '.join(f'{n} {edge}' for edge, n in counts.items())})")
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(scenarios.to_string(index=False))
+        print(f"\n{args.grids} grids, reference rounded to cents as run_grid is")
+        print(grids.drop(columns=['Rejected', 'Rejection Mismatches', 'Worst Case']).to_string(index=False))
+
+    scenario_failures = failures(scenarios, args.tolerance)
+    failed = pd.concat([scenario_failures, failures(grids, GRID_TOLERANCE, 'Max Abs Diff')])
+    if len(failed):
+        print(f"\nFAILED: {', '.join(sorted(set(failed['Engine'])))}")
+        worst = scenario_failures['Worst Case'].dropna().unique()
+        if len(worst):
+            print(cases.loc[worst].T.to_string())
+        sys.exit(1)
+    print("\nAll engines agree with houseModel.simulate_scenario")
+
+
+if __name__ == '__main__':
+    main()
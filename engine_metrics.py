@@ -0,0 +1,248 @@
+import atexit
+import bisect
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# The active registry; None while metrics are disabled, so every hook is a single None check
+registry = None
+
+_NULL = contextlib.nullcontext()
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(upper bound, observations at or below it) pairs, ending with +Inf."""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class MetricsRegistry:
+    """
+    Counters, gauges and latency histograms of the engine, keyed by name and labels.
+
+    Counters only go up (cells evaluated, cache hits); gauges hold the
+    largest value seen (peak memory); histograms bucket durations in
+    seconds. run(name) times a whole run and, with track_memory, records
+    its tracemalloc peak. Updates are thread-safe; metrics are process-local,
+    so work done in parallel_sweep's worker processes shows up only as the
+    parent's totals.
+    """
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.started = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._runs = 0
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_max(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.gauges[key] = max(self.gauges.get(key, value), value)
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @contextlib.contextmanager
+    def run(self, name):
+        """
+        Time a run (engine_run_seconds) and count it. With track_memory the
+        outermost active run also records its tracemalloc peak above the
+        memory in use when it started (engine_run_peak_memory_bytes); runs
+        nested in it, or overlapping it on other threads, are only timed.
+        """
+        with self._lock:
+            measure = self.track_memory and self._runs == 0
+            self._runs += 1
+        if measure:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('engine_run_seconds', time.perf_counter() - start, run=name)
+            self.inc('engine_runs_total', run=name)
+            if measure:
+                self.set_max('engine_run_peak_memory_bytes', tracemalloc.get_traced_memory()[1] - baseline, run=name)
+                if started_tracing:
+                    tracemalloc.stop()
+            with self._lock:
+                self._runs -= 1
+
+    def snapshot(self):
+        """Every metric as plain JSON-ready data."""
+        with self._lock:
+            return {
+                'started': self.started,
+                'taken': time.time(),
+                'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                             for (name, labels), value in sorted(self.counters.items())],
+                'gauges': [{'name': name, 'labels': dict(labels), 'value': value}
+                           for (name, labels), value in sorted(self.gauges.items())],
+                'histograms': [{'name': name, 'labels': dict(labels), 'count': h.count, 'sum': h.sum,
+                                'buckets': [[bound if bound != float('inf') else '+Inf', count]
+                                            for bound, count in h.cumulative()]}
+                               for (name, labels), h in sorted(self.histograms.items())],
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """The metrics in the Prometheus text exposition format."""
+        def series(name, labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return name
+            return name + '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+        lines = []
+        with self._lock:
+            for kind, metrics in (('counter', self.counters), ('gauge', self.gauges)):
+                typed = set()
+                for (name, labels), value in sorted(metrics.items()):
+                    if name not in typed:
+                        lines.append(f'# TYPE {name} {kind}')
+                        typed.add(name)
+                    lines.append(f'{series(name, labels)} {value}')
+            typed = set()
+            for (name, labels), h in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f'# TYPE {name} histogram')
+                    typed.add(name)
+                for bound, count in h.cumulative():
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{series(name + "_bucket", labels, [("le", le)])} {count}')
+                lines.append(f'{series(name + "_sum", labels)} {h.sum}')
+                lines.append(f'{series(name + "_count", labels)} {h.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """
+        Write a snapshot to path: Prometheus text for .prom or .txt files
+        (e.g. for node_exporter's textfile collector), JSON otherwise. The
+        file is renamed into place, so a scraper never reads half of it.
+        """
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        partial = path + '.partial'
+        with open(partial, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(partial, path)
+        return path
+
+
+def enable(track_memory=False):
+    """Start collecting metrics (keeping any already collected); returns the active registry."""
+    global registry
+    if registry is None:
+        registry = MetricsRegistry(track_memory)
+    else:
+        registry.track_memory = track_memory
+    return registry
+
+
+def disable():
+    """Stop collecting; returns the registry that was active, if any, for a final export."""
+    global registry
+    previous, registry = registry, None
+    return previous
+
+
+# --- Hooks for the engine; each costs one None check while disabled ---
+
+def inc(name, amount=1, **labels):
+    if registry is not None:
+        registry.inc(name, amount, **labels)
+
+
+def timer(name, **labels):
+    return _NULL if registry is None else registry.timer(name, **labels)
+
+
+def run(name):
+    return _NULL if registry is None else registry.run(name)
+
+
+def instrumented(backend):
+    """
+    Decorator for the simulate_scenario implementations: counts the cells
+    each call evaluates (engine_scenarios_total) and times the call
+    (engine_scenario_seconds), by mode and backend.
+    """
+    def decorate(simulate):
+        @functools.wraps(simulate)
+        def wrapper(*args, **kwargs):
+            metrics = registry
+            if metrics is None:
+                return simulate(*args, **kwargs)
+            mode = args[6] if len(args) > 6 else kwargs.get('mode')
+            start = time.perf_counter()
+            result = simulate(*args, **kwargs)
+            metrics.observe('engine_scenario_seconds', time.perf_counter() - start, mode=mode, backend=backend)
+            net_worth = result['Net Worth'] if isinstance(result, dict) else result[0]
+            metrics.inc('engine_scenarios_total', getattr(net_worth, 'size', 1), mode=mode, backend=backend)
+            return result
+        return wrapper
+    return decorate
+
+
+# Metrics can be switched on per process, e.g. HOUSE_MODEL_METRICS=1 (or =memory to also track peak memory),
+# and written out at exit with HOUSE_MODEL_METRICS_FILE=metrics.prom
+if os.environ.get('HOUSE_MODEL_METRICS', '0') not in ('', '0'):
+    enable(track_memory=os.environ['HOUSE_MODEL_METRICS'] == 'memory')
+    if os.environ.get('HOUSE_MODEL_METRICS_FILE'):
+        atexit.register(lambda: registry is not None and registry.write(os.environ['HOUSE_MODEL_METRICS_FILE']))
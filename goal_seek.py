@@ -0,0 +1,123 @@
+import numpy as np
+
+import vector_engine
+
+GOALS = ('min_cash_flow', 'max_price')
+# Default search ranges and the precision answers are found to, in dollars
+CASH_FLOW_RANGE = (0.0, 50_000.0)
+PRICE_RANGE = (0.0, 10_000_000.0)
+TOLERANCE = 1.0
+
+
+def bisect(passes, lo, hi, shape, tol=TOLERANCE, find='max'):
+    """
+    Array-wise bisection for the boundary of a monotone condition.
+
+    passes(x) maps an array of the given shape to a boolean array of that
+    shape. With find='max' the condition holds below each cell's boundary
+    and fails above it, and the largest passing x in [lo, hi] is returned;
+    with find='min' it's the reverse. All cells are narrowed in the same
+    vectorized step, so passes is called about log2((hi - lo) / tol) times
+    whatever the grid size. Cells with no passing x in [lo, hi] are NaN.
+    """
+    if not tol > 0:
+        raise ValueError("tolerance must be positive")
+    lo = np.broadcast_to(np.asarray(lo, dtype=float), shape).copy()
+    hi = np.broadcast_to(np.asarray(hi, dtype=float), shape).copy()
+    lo_passes, hi_passes = passes(lo), passes(hi)
+    # Where the end of the range already passes, that end is the answer
+    end = hi.copy() if find == 'max' else lo.copy()
+    steps = int(np.ceil(np.log2(max(float(np.max(hi - lo, initial=0.0)), tol) / tol)))
+    for _ in range(steps):
+        mid = (lo + hi) / 2
+        ok = passes(mid)
+        if find == 'max':
+            lo, hi = np.where(ok, mid, lo), np.where(ok, hi, mid)
+        else:
+            lo, hi = np.where(ok, lo, mid), np.where(ok, mid, hi)
+    if find == 'max':
+        return np.where(hi_passes, end, np.where(lo_passes, lo, np.nan))
+    return np.where(lo_passes, end, np.where(hi_passes, hi, np.nan))
+
+
+def _evaluate(price, mortgage_rate, term, grid, mode, params, target_net_worth):
+    """(affordable, net worth): the portfolio funds the purchase, cash flow covers the monthly costs, target met."""
+    with np.errstate(invalid='ignore'):
+        net_worth, _cost = vector_engine.simulate_scenario(
+            price, mortgage_rate, term, grid['investment_return'], grid['housing_return'], grid['duration'],
+            mode, params, insufficient='nan')
+        housing_cost = vector_engine.monthly_housing_cost(price, mortgage_rate, term, mode, params)
+        ok = ~np.isnan(net_worth) & (params['monthly_cash_flow'] >= housing_cost - 1e-9)
+        if target_net_worth is not None:
+            ok &= net_worth >= target_net_worth
+    return ok, net_worth
+
+
+def _seek(axes, params, sweeps, unknown, bounds, target_net_worth, tol):
+    """Solve for the unknown ('monthly_cash_flow' or 'price') in every cell; returns (solution, net worth) rows."""
+    grid = vector_engine.open_grid(**axes, params=params, sweeps=sweeps)
+    n_rates, n_terms = len(axes['mortgage_rates']), len(axes['terms'])
+    solutions, net_worths = [], []
+    for mode in ('cash', 'full', 'hybrid'):
+        rate, term = (0.0, 0) if mode == 'cash' else (grid['mortgage_rate'], grid['term'])
+        shape = grid['shape'] + ((1,) if mode == 'cash' else (n_rates * n_terms,))
+
+        def evaluate(x):
+            if unknown == 'price':
+                return _evaluate(x, rate, term, grid, mode, grid['params'], target_net_worth)
+            return _evaluate(grid['price'], rate, term, grid, mode, dict(grid['params'], monthly_cash_flow=x),
+                             target_net_worth)
+
+        lo, hi = bounds
+        if unknown == 'price' and mode == 'full':
+            # A full mortgage needs a price of at least the down payment
+            lo = np.maximum(lo, grid['params']['down_payment'])
+        solution = bisect(lambda x: evaluate(x)[0], lo, hi, shape, tol,
+                          find='max' if unknown == 'price' else 'min')
+        solutions.append(solution)
+        net_worths.append(np.where(np.isnan(solution), np.nan, evaluate(np.nan_to_num(solution))[1]))
+
+    return [np.round(vector_engine.scenario_rows(*results, grid['shape'], n_rates, n_terms), 2).ravel()
+            for results in (solutions, net_worths)]
+
+
+def min_cash_flow(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, params,
+                  sweeps=None, target_net_worth=None, bounds=CASH_FLOW_RANGE, tol=TOLERANCE, label_rates=False):
+    """
+    Smallest monthly cash flow that makes each scenario of the grid affordable.
+
+    Affordable means the portfolio covers the upfront stock sale, the monthly
+    cash flow covers the mortgage payment, property tax and insurance, and,
+    if target_net_worth is given, net worth at the horizon reaches it.
+    Arguments are as for vector_engine.run_grid; monthly_cash_flow can't be
+    swept. Returns the run_grid label columns plus 'Min Monthly Cash Flow'
+    and the 'Net Worth' it yields; NaN where nothing within bounds works.
+    """
+    if 'monthly_cash_flow' in (sweeps or {}):
+        raise ValueError("monthly_cash_flow is the value being solved for and can't be swept")
+    axes = {'purchase_prices': purchase_prices, 'years': years, 'investment_returns': investment_returns,
+            'housing_returns': housing_returns, 'mortgage_rates': mortgage_rates, 'terms': terms}
+    values = _seek(axes, params, sweeps, 'monthly_cash_flow', bounds, target_net_worth, tol)
+    return vector_engine.grid_frame(**axes, values=values, sweeps=sweeps, label_rates=label_rates,
+                                    value_columns=('Min Monthly Cash Flow', 'Net Worth'))
+
+
+def max_price(years, investment_returns, housing_returns, mortgage_rates, terms, params, sweeps=None,
+              target_net_worth=None, bounds=PRICE_RANGE, tol=TOLERANCE, label_rates=False):
+    """
+    Most expensive house each scenario of the grid can afford.
+
+    Affordable is as for min_cash_flow, at the given monthly_cash_flow. The
+    search assumes a cheaper house is affordable whenever a dearer one is;
+    where strong housing returns make net worth rise with price, the
+    boundary found may not be the only one. Results at bounds[1] mean the
+    limit lies beyond the search range. Returns the run_grid label columns
+    (without Price) plus 'Max Price' and the 'Net Worth' at that price.
+    """
+    axes = {'purchase_prices': [0.0], 'years': years, 'investment_returns': investment_returns,
+            'housing_returns': housing_returns, 'mortgage_rates': mortgage_rates, 'terms': terms}
+    values = _seek(axes, params, sweeps, 'price', bounds, target_net_worth, tol)
+    df = vector_engine.grid_frame(**axes, values=values, sweeps=sweeps, label_rates=label_rates,
+                                  value_columns=('Max Price', 'Net Worth'))
+    # Price was only a placeholder axis of length one
+    return df.drop(columns='Price')
@@ -1,5 +1,8 @@
+import numbers
+
 import numpy as np
-import pandas as pd
+
+import engine_metrics
 
 # --- Input parameters ---
 purchase_prices = [550_000, 600_000]
@@ -26,6 +29,101 @@ bear_market_recovery_years = 2  # Years to recover to normal trajectory
 years = [3, 5, 7, 10]
 initial_portfolio = 4_000_000
 
+
+class ModelParams:
+    """
+    Immutable, hashable set of scalar model inputs.
+
+    simulate_scenario reads its configuration from one of these instead of the
+    module globals above, so different configurations can be evaluated
+    concurrently (e.g. in a thread pool) and used directly as cache keys.
+    Defaults are the module-level inputs.
+    """
+    __slots__ = (
+        'down_payment',
+        'initial_portfolio',
+        'capital_gains_tax',
+        'income_tax_rate',
+        'investment_cost_basis_ratio',
+        'loan_to_value_hybrid',
+        'monthly_cash_flow',
+        'property_tax_rate',
+        'home_insurance_rate',
+        'closing_cost_rate',
+        'bear_market_enabled',
+        'bear_market_year',
+        'bear_market_drop',
+        'bear_market_recovery_years',
+    )
+
+    def __init__(self, down_payment=down_payment, initial_portfolio=initial_portfolio,
+                 capital_gains_tax=capital_gains_tax, income_tax_rate=income_tax_rate,
+                 investment_cost_basis_ratio=investment_cost_basis_ratio,
+                 loan_to_value_hybrid=loan_to_value_hybrid, monthly_cash_flow=monthly_cash_flow,
+                 property_tax_rate=property_tax_rate, home_insurance_rate=home_insurance_rate,
+                 closing_cost_rate=closing_cost_rate, bear_market_enabled=bear_market_enabled,
+                 bear_market_year=bear_market_year, bear_market_drop=bear_market_drop,
+                 bear_market_recovery_years=bear_market_recovery_years):
+        values = locals()
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    @classmethod
+    def from_globals(cls):
+        """Snapshot the current module-level inputs (they may have been changed by a script)."""
+        module = globals()
+        return cls(**{name: module[name] for name in cls.__slots__})
+
+    def replace(self, **changes):
+        """Return a copy with some fields changed; every new value must be a real number."""
+        unknown = set(changes) - set(self.__slots__)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+        for name, value in changes.items():
+            # bool is a Real too, but only the on/off switch may be given as one
+            if isinstance(value, (bool, np.bool_)):
+                valid = name == 'bear_market_enabled'
+            else:
+                valid = isinstance(value, numbers.Real)
+            if not valid:
+                raise ValueError(f"{name} must be a number, not {value!r}")
+        values = self.as_dict()
+        values.update(changes)
+        return type(self)(**values)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def _key(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable; use replace()")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, ModelParams):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def __reduce__(self):
+        # Slots plus a blocking __setattr__ defeat default pickling (used by multiprocessing)
+        return (_rebuild_params, (self.as_dict(),))
+
+
+def _rebuild_params(values):
+    return ModelParams(**values)
+
+
 # --- Helper functions ---
 def mortgage_payment(principal, rate, years):
     """Return monthly payment; handle zero-rate loans explicitly."""
@@ -203,8 +301,30 @@ def gross_sale_needed(net_cash_needed, tax_rate, cost_basis_ratio):
     
     return gross_sale, tax_paid, net_cash
 
-def simulate_scenario(price, mortgage_rate, term, investment_return, housing_return, duration, mode):
-    """mode = 'cash', 'full', 'hybrid'"""
+@engine_metrics.instrumented('scalar')
+def simulate_scenario(price, mortgage_rate, term, investment_return, housing_return, duration, mode, params=None):
+    """
+    mode = 'cash', 'full', 'hybrid'
+
+    params is a ModelParams; when omitted the current module globals are used.
+    """
+    if params is None:
+        params = ModelParams.from_globals()
+    down_payment = params.down_payment
+    initial_portfolio = params.initial_portfolio
+    capital_gains_tax = params.capital_gains_tax
+    income_tax_rate = params.income_tax_rate
+    investment_cost_basis_ratio = params.investment_cost_basis_ratio
+    loan_to_value_hybrid = params.loan_to_value_hybrid
+    monthly_cash_flow = params.monthly_cash_flow
+    property_tax_rate = params.property_tax_rate
+    home_insurance_rate = params.home_insurance_rate
+    closing_cost_rate = params.closing_cost_rate
+    bear_market_enabled = params.bear_market_enabled
+    bear_market_year = params.bear_market_year
+    bear_market_drop = params.bear_market_drop
+    bear_market_recovery_years = params.bear_market_recovery_years
+
     # Calculate one-time closing costs
     closing_costs = price * closing_cost_rate
     
@@ -342,32 +462,28 @@ def simulate_scenario(price, mortgage_rate, term, investment_return, housing_ret
         
         return net_worth, out_of_pocket_cost
 
-def run_simulation():
-    records = []
-
-    for price in purchase_prices:
-        for duration in years:
-            for ret_case, inv_return in investment_returns.items():
-                for house_case, house_return in housing_returns.items():
-                    # Cash scenario calculation
-                    nw, cost = simulate_scenario(price, 0, 0, inv_return, house_return, duration, 'cash')
-                    records.append([price, duration, ret_case, house_case, 'Cash', np.round(nw, 2), np.round(cost, 2)])
-
-                    for mort_rate in mortgage_rates:
-                        # Full mortgage scenarios
-                        for term in terms:
-                            nw, cost = simulate_scenario(price, mort_rate, term, inv_return, house_return, duration, 'full')
-                            scenario_label = f'Full {term}y' if len(mortgage_rates) == 1 else f'Full {term}y @{mort_rate:.3f}'
-                            records.append([price, duration, ret_case, house_case, scenario_label, np.round(nw, 2), np.round(cost, 2)])
-
-                        # Hybrid scenarios
-                        for term in terms:
-                            nw, cost = simulate_scenario(price, mort_rate, term, inv_return, house_return, duration, 'hybrid')
-                            scenario_label = f'Hybrid {term}y' if len(mortgage_rates) == 1 else f'Hybrid {term}y @{mort_rate:.3f}'
-                            records.append([price, duration, ret_case, house_case, scenario_label, np.round(nw, 2), np.round(cost, 2)])
-
-    df = pd.DataFrame(records, columns=['Price', 'Years', 'Return Case', 'Housing Case', 'Scenario', 'Net Worth', 'Out-of-Pocket Cost'])
-    return df
+def run_simulation(params=None):
+    if params is None:
+        params = ModelParams.from_globals()
+    # The grid evaluator computes each intermediate once at its minimal dependency
+    # level; simulate_scenario above stays as the scalar reference implementation.
+    import vector_engine
+
+    with engine_metrics.run('run_simulation'):
+        df = vector_engine.run_grid(purchase_prices, years, investment_returns, housing_returns,
+                                    mortgage_rates, terms, params.as_dict(), label_rates=True)
+        # Same dtypes as the original records-based table: plain string labels rather than categoricals
+        df = df.astype({'Price': np.asarray(purchase_prices).dtype, 'Return Case': str, 'Housing Case': str,
+                        'Scenario': str})
+        return df[vector_engine.RESULT_COLUMNS]
+
+
+def run_simulations(param_sets, max_workers=None):
+    """Run run_simulation for several ModelParams concurrently in a thread pool; returns DataFrames in order."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(run_simulation, param_sets))
 
 
 def plot_expected_case(df):
@@ -1,10 +1,60 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.colors import ListedColormap
 from matplotlib.figure import Figure
+from matplotlib.patches import Patch
+
+import engine_metrics
+import goal_seek
+import lazy_grid
+import pareto
+import result_export
+import session_state
+import stress_grid
+import table_index
+import vector_engine
+from houseModel import ModelParams
+
+# Largest grid the GUI will evaluate, and the most rows shown in the Goal Seek table
+MAX_GRID_ROWS = 2_000_000
+TABLE_ROW_LIMIT = 5_000
+# Data Table rows formatted at a time; scrolling, sorting and filtering refill just this window
+TABLE_WINDOW_ROWS = 40
+# Rows evaluated per idle callback when the full grid is refilled after a slider drag
+FILL_BLOCK_ROWS = 100_000
+
+# Goal Seek tab choices -> goal_seek solver
+GOAL_SEEK_GOALS = {
+    "Min Monthly Cash Flow": 'min_cash_flow',
+    "Max Affordable Price": 'max_price',
+}
+
+# GUI input name -> houseModel parameter name for inputs passed to the grid evaluator
+GRID_PARAMETERS = {
+    'down_payment': 'down_payment',
+    'initial_investment': 'initial_portfolio',
+    'capital_gains_tax': 'capital_gains_tax',
+    'income_tax': 'income_tax_rate',
+    'cost_basis_ratio': 'investment_cost_basis_ratio',
+    'ltv_ratio': 'loan_to_value_hybrid',
+    'monthly_cash_flow': 'monthly_cash_flow',
+    'property_tax_rate': 'property_tax_rate',
+    'home_insurance_rate': 'home_insurance_rate',
+    'closing_cost_rate': 'closing_cost_rate',
+    'bear_year': 'bear_market_year',
+    'bear_drop': 'bear_market_drop',
+    'bear_recovery': 'bear_market_recovery_years',
+}
+
+CURRENCY_COLUMNS = {'Price', 'Net Worth', 'Out-of-Pocket Cost', 'Down Payment', 'Initial Investment', 'Monthly Cash Flow',
+                    'Min Monthly Cash Flow', 'Max Price'}
+PERCENT_COLUMNS = {'Mortgage Rate', 'Investment Return', 'Housing Return', 'Capital Gains Tax', 'Income Tax Rate',
+                   'Cost Basis Ratio', 'Hybrid LTV', 'Property Tax Rate', 'Home Insurance Rate',
+                   'Closing Cost Rate', 'Bear Market Drop'}
 
 class HouseCalculatorGUI:
     def __init__(self, root):
@@ -15,6 +65,17 @@ class HouseCalculatorGUI:
         self._updating_control = False
         self._pending_calc = None
         self._pending_chart = None
+        self._pending_preview = None
+        self._pending_fill = None
+        self._fill = None
+        # Lazy view of a grid above MAX_GRID_ROWS; only its chart slice is evaluated
+        self.lazy_grid = None
+        # Results restored from the last session, until the background recompute confirms or replaces them
+        self.snapshot_df = None
+        self.grid_size_var = None
+        self.result_params = None
+        self.result_axes = None
+        self.create_menu()
         
         # Create main container
         main_container = ttk.Frame(root, padding="10")
@@ -32,9 +93,23 @@ class HouseCalculatorGUI:
         # Create results panel (right side)
         self.create_results_panel(main_container)
         
-        # Initialize with default calculation
-        self.calculate(silent=True)
+        # Show the last session's results straight away; with no snapshot, run the default calculation
+        self.warm_start()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
     
+    def create_menu(self):
+        menubar = tk.Menu(self.root)
+        file_menu = tk.Menu(menubar, tearoff=0)
+        file_menu.add_command(label="Export Results...", command=self.export_results)
+        file_menu.add_command(label="Open Results...", command=self.open_results)
+        file_menu.add_separator()
+        self.metrics_var = tk.BooleanVar(value=engine_metrics.registry is not None)
+        file_menu.add_checkbutton(label="Collect Engine Metrics", variable=self.metrics_var,
+                                  command=self.toggle_metrics)
+        file_menu.add_command(label="Export Metrics...", command=self.export_metrics)
+        menubar.add_cascade(label="File", menu=file_menu)
+        self.root.config(menu=menubar)
+
     def create_input_panel(self, parent):
         # Create outer frame for the input panel
         input_outer = ttk.LabelFrame(parent, text="Input Parameters", padding="10")
@@ -121,8 +196,15 @@ class HouseCalculatorGUI:
         row += 1
 
         calc_button = ttk.Button(input_frame, text="Calculate", command=lambda: self.calculate(silent=False))
-        calc_button.grid(row=row, column=0, columnspan=2, pady=20)
+        calc_button.grid(row=row, column=0, columnspan=2, pady=(20, 5))
+        row += 1
+
+        # Live estimate of the grid size; numeric inputs accept start:stop:step ranges or a;b;c lists
+        self.grid_size_var = tk.StringVar()
+        self.grid_size_label = ttk.Label(input_frame, textvariable=self.grid_size_var)
+        self.grid_size_label.grid(row=row, column=0, columnspan=2, pady=(0, 15))
         row += 1
+        self.update_grid_estimate()
 
         ttk.Label(input_frame, text="Chart Settings:", font=('TkDefaultFont', 10, 'bold')).grid(row=row, column=0, columnspan=2, sticky=tk.W, pady=(10, 5))
         row += 1
@@ -201,6 +283,25 @@ class HouseCalculatorGUI:
         except ValueError:
             return None
 
+    def parse_numeric_values(self, kind, text):
+        """Parse a single value, an a;b;c list or an inclusive start:stop:step range."""
+        cleaned = text.strip()
+        if ':' in cleaned:
+            parts = [self.parse_numeric(kind, part) for part in cleaned.split(':')]
+            if len(parts) != 3 or None in parts:
+                return None
+            start, stop, step = parts
+            if step <= 0 or stop < start:
+                return None
+            count = int(np.floor((stop - start) / step + 1e-9)) + 1
+            if count > MAX_GRID_ROWS:
+                return None
+            return [round(float(v), 10) for v in start + step * np.arange(count)]
+        values = [self.parse_numeric(kind, part) for part in cleaned.split(';') if part.strip()]
+        if not values or None in values:
+            return None
+        return values
+
     def round_to_resolution(self, value, resolution):
         if not resolution:
             return value
@@ -222,6 +323,8 @@ class HouseCalculatorGUI:
         config['scale_var'].set(value)
         config['entry_var'].set(self.format_numeric(config['kind'], value))
         self._updating_control = False
+        # Redraw the chart's slice right away; the rest of the grid follows once the slider settles
+        self.schedule_preview()
         self.schedule_recalculate()
 
     def on_entry_change(self, name):
@@ -230,10 +333,11 @@ class HouseCalculatorGUI:
         config = self.numeric_inputs.get(name)
         if not config:
             return
-        value = self.parse_numeric(config['kind'], config['entry_var'].get())
-        if value is None:
+        values = self.parse_numeric_values(config['kind'], config['entry_var'].get())
+        if values is None:
             return
-        value = self.clamp(value, config['min'], config['max'])
+        # The slider follows the first value of a range or list
+        value = self.clamp(values[0], config['min'], config['max'])
         if config['resolution']:
             value = self.round_to_resolution(value, config['resolution'])
         self._updating_control = True
@@ -245,7 +349,12 @@ class HouseCalculatorGUI:
         config = self.numeric_inputs.get(name)
         if not config:
             return
-        value = self.parse_numeric(config['kind'], config['entry_var'].get())
+        values = self.parse_numeric_values(config['kind'], config['entry_var'].get())
+        if values is not None and len(values) > 1:
+            # Keep the range text as typed
+            self.schedule_recalculate()
+            return
+        value = values[0] if values else None
         if value is None:
             value = config['scale_var'].get()
         value = self.clamp(value, config['min'], config['max'])
@@ -258,10 +367,17 @@ class HouseCalculatorGUI:
         self.schedule_recalculate()
 
     def schedule_recalculate(self, delay=250):
+        self.update_grid_estimate()
+        self.cancel_background_fill()
         if self._pending_calc is not None:
             self.root.after_cancel(self._pending_calc)
         self._pending_calc = self.root.after(delay, self._run_scheduled_calculate)
 
+    def schedule_preview(self):
+        # after_idle coalesces a burst of slider events into one preview per event-loop pass
+        if self._pending_preview is None:
+            self._pending_preview = self.root.after_idle(self._run_preview)
+
     def schedule_chart_update(self, delay=250):
         if self._pending_chart is not None:
             self.root.after_cancel(self._pending_chart)
@@ -269,11 +385,121 @@ class HouseCalculatorGUI:
 
     def _run_scheduled_calculate(self):
         self._pending_calc = None
-        self.calculate(silent=True)
+        self.start_background_fill()
+
+    def _run_preview(self):
+        self._pending_preview = None
+        try:
+            axes, params = self.chart_slice_axes()
+        except (ValueError, KeyError):
+            return
+        preview = self.chart_trajectories(axes, params)
+        if preview is not None:
+            self.update_chart(preview, axes['years'])
+
+    def chart_slice_axes(self, axes=None, params=None):
+        """
+        Grid axes narrowed to what the chart shows: the chart price and the
+        selected return/housing cases. Defaults to the current inputs.
+        """
+        if axes is None:
+            axes, params = self.collect_grid_axes()
+        axes = dict(axes)
+        chart_price = float(self.chart_price_var.get().replace(',', '').strip())
+        return_case = self.return_scenario_var.get()
+        housing_case = self.housing_scenario_var.get()
+        prices = np.asarray(axes['purchase_prices'], dtype=float)
+        axes['purchase_prices'] = prices[np.isclose(prices, chart_price)].tolist()
+        axes['investment_returns'] = {return_case: axes['investment_returns'][return_case]}
+        axes['housing_returns'] = {housing_case: axes['housing_returns'][housing_case]}
+        return axes, params
+
+    def chart_trajectories(self, axes, params):
+        """Year-by-year rows of a chart slice for smooth curves, or None if they can't be computed."""
+        try:
+            rows = vector_engine.grid_size(**axes) * max(axes['years']) // len(axes['years'])
+            if rows > MAX_GRID_ROWS:
+                return None
+            return vector_engine.run_trajectories(params=params, **axes)
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def start_background_fill(self):
+        """Recompute the full grid a block of prices per idle callback, then refresh every view."""
+        self.cancel_background_fill()
+        try:
+            axes, params = self.collect_grid_axes()
+            rows = vector_engine.grid_size(**axes)
+        except ValueError:
+            return
+        prices = axes['purchase_prices']
+        if rows > MAX_GRID_ROWS:
+            # Too large to fill in full; calculate() evaluates just the chart slice lazily
+            self.calculate(silent=True)
+            return
+        if not prices:
+            return
+        per_block = max(1, FILL_BLOCK_ROWS * len(prices) // rows)
+        blocks = [prices[i:i + per_block] for i in range(0, len(prices), per_block)]
+        self._fill = {'axes': axes, 'params': params, 'blocks': blocks, 'parts': []}
+        self._pending_fill = self.root.after_idle(self._run_fill_step)
+
+    def cancel_background_fill(self):
+        if self._pending_fill is not None:
+            self.root.after_cancel(self._pending_fill)
+            self._pending_fill = None
+        self._fill = None
+
+    def _run_fill_step(self):
+        self._pending_fill = None
+        fill = self._fill
+        axes = dict(fill['axes'], purchase_prices=fill['blocks'][len(fill['parts'])])
+        try:
+            with engine_metrics.run('gui_fill_block'):
+                fill['parts'].append(vector_engine.run_grid(params=fill['params'], **axes))
+        except Exception as exc:
+            # Nothing waits on this callback, so say that the views still show the last results
+            self._fill = None
+            if self.grid_size_var is not None:
+                self.grid_size_var.set(f"Calculation stopped: {exc}; showing the previous results")
+                self.grid_size_label.configure(foreground="red")
+            return
+        if len(fill['parts']) < len(fill['blocks']):
+            # Yield to pending events between blocks so the sliders stay responsive
+            self._pending_fill = self.root.after_idle(self._run_fill_step)
+            return
+
+        # Prices are the outermost grid axis, so the blocks concatenate in run_grid row order
+        self._fill = None
+        self.lazy_grid = None
+        parts = fill['parts']
+        df = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+        self.result_params = fill['params']
+        self.result_axes = fill['axes']
+        snapshot, self.snapshot_df = self.snapshot_df, None
+        if snapshot is not None and df.equals(snapshot):
+            # The restored results are still current; keep the views as they are
+            return
+        self.df = df
+        self.update_table()
+        self.update_chart()
+        self.update_heatmap()
+        self.update_best_options()
+        self.update_frontier()
 
     def _run_scheduled_chart_update(self):
         self._pending_chart = None
+        if self.lazy_grid is not None:
+            # A new chart price or case is a different slice; blocks already seen come from the cache
+            try:
+                self.df = self.lazy_chart_slice()
+            except ValueError:
+                return
+            self.update_table()
+            self.update_best_options()
         self.update_chart()
+        self.update_heatmap()
+        self.update_frontier()
 
     def get_numeric_value(self, name):
         config = self.numeric_inputs.get(name)
@@ -284,15 +510,83 @@ class HouseCalculatorGUI:
     def get_percent_value(self, name):
         return self.get_numeric_value(name) / 100.0
 
+    def get_numeric_values(self, name):
+        """Return every value of an input: the slider value, or each value of a typed range/list."""
+        config = self.numeric_inputs.get(name)
+        if not config:
+            raise ValueError(f"Unknown input: {name}")
+        values = self.parse_numeric_values(config['kind'], config['entry_var'].get())
+        if values is None or len(values) == 1:
+            values = [float(config['scale_var'].get())]
+        else:
+            values = [self.clamp(v, config['min'], config['max']) for v in values]
+        if config['kind'] == "percent":
+            values = [v / 100.0 for v in values]
+        elif config['kind'] == "number" and float(config['resolution']).is_integer():
+            values = [int(round(v)) for v in values]
+        # Drop duplicates created by clamping while keeping order
+        return list(dict.fromkeys(values))
+
     def parse_int_list(self, text):
-        parts = [part.strip() for part in text.split(',') if part.strip()]
-        if not parts:
+        return self.parse_value_list(text, int)
+
+    def parse_value_list(self, text, convert=float):
+        """Parse an a,b,c list or an inclusive start:stop:step range; raises ValueError if it is empty."""
+        text = text.strip()
+        if ':' in text:
+            parts = [convert(part) for part in text.split(':')]
+            if len(parts) != 3 or parts[2] <= 0:
+                raise ValueError("Ranges must be written as start:stop:step")
+            start, stop, step = parts
+            count = max(0, int(np.floor((stop - start) / step + 1e-9)) + 1)
+            values = [convert(round(float(v), 10)) for v in start + step * np.arange(count)]
+        else:
+            values = [convert(part.strip()) for part in text.split(',') if part.strip()]
+        if not values:
             raise ValueError("List of values cannot be empty")
-        values = []
-        for part in parts:
-            values.append(int(part))
         return values
 
+    def collect_grid_axes(self):
+        """Gather the grid axes from the inputs; swept parameters go to 'sweeps'."""
+        prices = self.get_numeric_values('price1') + self.get_numeric_values('price2')
+        params = {'bear_market_enabled': self.bear_enabled_var.get()}
+        sweeps = {}
+        for input_name, param in GRID_PARAMETERS.items():
+            values = self.get_numeric_values(input_name)
+            if len(values) == 1:
+                params[param] = values[0]
+            else:
+                sweeps[param] = values
+        params = ModelParams(**params)
+        axes = {
+            'purchase_prices': list(dict.fromkeys(prices)),
+            'years': self.parse_int_list(self.years_var.get()),
+            'investment_returns': {"expected": self.get_numeric_values('inv_return_expected'),
+                                   "downside": self.get_numeric_values('inv_return_downside')},
+            'housing_returns': {"expected": self.get_numeric_values('house_return_expected'),
+                                "downside": self.get_numeric_values('house_return_downside')},
+            'mortgage_rates': self.get_numeric_values('mortgage_rate'),
+            'terms': self.parse_int_list(self.terms_var.get()),
+            'sweeps': sweeps,
+        }
+        return axes, params
+
+    def update_grid_estimate(self):
+        if self.grid_size_var is None:
+            return
+        try:
+            axes, _params = self.collect_grid_axes()
+        except ValueError:
+            self.grid_size_var.set("Grid rows: invalid input")
+            return
+        rows = vector_engine.grid_size(**axes)
+        if rows > MAX_GRID_ROWS:
+            self.grid_size_var.set(f"Grid rows: {rows:,} (above {MAX_GRID_ROWS:,}: chart slice only)")
+            self.grid_size_label.configure(foreground="red")
+        else:
+            self.grid_size_var.set(f"Grid rows: {rows:,}")
+            self.grid_size_label.configure(foreground="")
+
     def create_results_panel(self, parent):
         # Create notebook for tabs
         self.notebook = ttk.Notebook(parent)
@@ -306,22 +600,82 @@ class HouseCalculatorGUI:
         self.ax = self.figure.add_subplot(111)
         self.canvas = FigureCanvasTkAgg(self.figure, chart_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        # Heatmap tab: one result column over two grid dimensions
+        heatmap_frame = ttk.Frame(self.notebook, padding="10")
+        self.notebook.add(heatmap_frame, text="Heatmap")
+
+        controls = ttk.Frame(heatmap_frame)
+        controls.pack(fill=tk.X, pady=(0, 5))
+        self.heatmap_x_var = tk.StringVar(value="Price")
+        self.heatmap_y_var = tk.StringVar(value="Years")
+        self.heatmap_scenario_var = tk.StringVar(value="Full 30y")
+        self.heatmap_baseline_var = tk.StringVar(value="Cash")
+        self.heatmap_value_var = tk.StringVar(value="Net Worth")
+        self.heatmap_combos = {}
+        for label, name, var in (("X:", "x", self.heatmap_x_var), ("Y:", "y", self.heatmap_y_var),
+                                 ("Scenario:", "scenario", self.heatmap_scenario_var),
+                                 ("minus:", "baseline", self.heatmap_baseline_var),
+                                 ("Value:", "value", self.heatmap_value_var)):
+            ttk.Label(controls, text=label).pack(side=tk.LEFT, padx=(10, 2))
+            combo = ttk.Combobox(controls, textvariable=var, state="readonly", width=16)
+            combo.pack(side=tk.LEFT)
+            combo.bind('<<ComboboxSelected>>', lambda _event: self.update_heatmap())
+            self.heatmap_combos[name] = combo
+        self.heatmap_combos['value']['values'] = ["Net Worth", "Out-of-Pocket Cost"]
+
+        self.heatmap_figure = Figure(figsize=(10, 6), dpi=100)
+        self.heatmap_ax = self.heatmap_figure.add_subplot(111)
+        self.heatmap_canvas = FigureCanvasTkAgg(self.heatmap_figure, heatmap_frame)
+        self.heatmap_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.heatmap_image = None
+        self.heatmap_colorbar = None
         
         # Table tab
         table_frame = ttk.Frame(self.notebook, padding="10")
         self.notebook.add(table_frame, text="Data Table")
-        
-        # Create treeview for data
-        tree_scroll_y = ttk.Scrollbar(table_frame, orient=tk.VERTICAL)
+
+        # Filters; click a column heading to sort
+        table_filters = ttk.Frame(table_frame)
+        table_filters.pack(fill=tk.X, pady=(0, 5))
+        self.table_filter_vars = {}
+        self.table_filter_combos = {}
+        for label, column in (("Scenario:", 'Scenario'), ("Return case:", 'Return Case'),
+                              ("Housing case:", 'Housing Case')):
+            ttk.Label(table_filters, text=label).pack(side=tk.LEFT, padx=(10, 2))
+            var = tk.StringVar(value="All")
+            combo = ttk.Combobox(table_filters, textvariable=var, values=["All"], state="readonly", width=14)
+            combo.pack(side=tk.LEFT)
+            combo.bind('<<ComboboxSelected>>', lambda _event: self.refresh_table_view())
+            self.table_filter_vars[column] = var
+            self.table_filter_combos[column] = combo
+        self.table_price_min_var = tk.StringVar(value="")
+        self.table_price_max_var = tk.StringVar(value="")
+        for label, var in (("Price from ($):", self.table_price_min_var), ("to:", self.table_price_max_var)):
+            ttk.Label(table_filters, text=label).pack(side=tk.LEFT, padx=(10, 2))
+            entry = ttk.Entry(table_filters, textvariable=var, width=12)
+            entry.pack(side=tk.LEFT)
+            entry.bind('<Return>', lambda _event: self.refresh_table_view())
+            entry.bind('<FocusOut>', lambda _event: self.refresh_table_view())
+        self.table_status_var = tk.StringVar(value="")
+        ttk.Label(table_filters, textvariable=self.table_status_var).pack(side=tk.RIGHT)
+
+        # Create treeview for data; it holds only the visible window of rows
+        self.tree_scroll_y = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.scroll_table)
         tree_scroll_x = ttk.Scrollbar(table_frame, orient=tk.HORIZONTAL)
         
-        self.tree = ttk.Treeview(table_frame, 
-                                  yscrollcommand=tree_scroll_y.set,
+        self.tree = ttk.Treeview(table_frame, height=TABLE_WINDOW_ROWS,
                                   xscrollcommand=tree_scroll_x.set)
-        tree_scroll_y.config(command=self.tree.yview)
         tree_scroll_x.config(command=self.tree.xview)
+        self.tree.bind('<MouseWheel>', self.on_table_mousewheel)
+        self.tree.bind('<Configure>', self.on_table_resize)
+        self.table_index = None
+        self.table_rows = np.zeros(0, dtype=np.intp)
+        self.table_offset = 0
+        self.table_window = TABLE_WINDOW_ROWS
+        self.table_sort = None
         
-        tree_scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree_scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
         tree_scroll_x.pack(side=tk.BOTTOM, fill=tk.X)
         self.tree.pack(fill=tk.BOTH, expand=True)
         
@@ -335,6 +689,77 @@ class HouseCalculatorGUI:
         
         self.best_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         best_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # Frontier tab: Net Worth vs. Out-of-Pocket Cost, non-dominated scenarios highlighted
+        frontier_frame = ttk.Frame(self.notebook, padding="10")
+        self.notebook.add(frontier_frame, text="Frontier")
+
+        frontier_controls = ttk.Frame(frontier_frame)
+        frontier_controls.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(frontier_controls, text="Years:").pack(side=tk.LEFT, padx=(0, 2))
+        self.frontier_years_var = tk.StringVar(value="")
+        self.frontier_years_combo = ttk.Combobox(frontier_controls, textvariable=self.frontier_years_var,
+                                                 state="readonly", width=8)
+        self.frontier_years_combo.pack(side=tk.LEFT)
+        self.frontier_years_combo.bind('<<ComboboxSelected>>', lambda _event: self.update_frontier())
+        ttk.Label(frontier_controls, text="Uses the chart price and return/housing cases.").pack(side=tk.LEFT, padx=10)
+
+        self.frontier_figure = Figure(figsize=(10, 6), dpi=100)
+        self.frontier_ax = self.frontier_figure.add_subplot(111)
+        self.frontier_canvas = FigureCanvasTkAgg(self.frontier_figure, frontier_frame)
+        self.frontier_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.frontier_mask = None
+        self.frontier_source = None
+
+        # Goal Seek tab: inverse problems solved for every cell of the current grid
+        goal_frame = ttk.Frame(self.notebook, padding="10")
+        self.notebook.add(goal_frame, text="Goal Seek")
+
+        goal_controls = ttk.Frame(goal_frame)
+        goal_controls.pack(fill=tk.X, pady=(0, 5))
+        self.goal_var = tk.StringVar(value="Min Monthly Cash Flow")
+        self.goal_target_var = tk.StringVar(value="")
+        ttk.Label(goal_controls, text="Solve for:").pack(side=tk.LEFT, padx=(0, 2))
+        ttk.Combobox(goal_controls, textvariable=self.goal_var, values=list(GOAL_SEEK_GOALS),
+                     state="readonly", width=22).pack(side=tk.LEFT)
+        ttk.Label(goal_controls, text="Target net worth ($, optional):").pack(side=tk.LEFT, padx=(10, 2))
+        ttk.Entry(goal_controls, textvariable=self.goal_target_var, width=14).pack(side=tk.LEFT)
+        ttk.Button(goal_controls, text="Solve", command=self.run_goal_seek).pack(side=tk.LEFT, padx=10)
+        self.goal_status_var = tk.StringVar(value="Uses the grid defined by the inputs on the left.")
+        ttk.Label(goal_frame, textvariable=self.goal_status_var).pack(fill=tk.X, pady=(0, 5))
+
+        goal_scroll = ttk.Scrollbar(goal_frame, orient=tk.VERTICAL)
+        self.goal_tree = ttk.Treeview(goal_frame, yscrollcommand=goal_scroll.set)
+        goal_scroll.config(command=self.goal_tree.yview)
+        goal_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.goal_tree.pack(fill=tk.BOTH, expand=True)
+
+        # Stress Test tab: winning strategy for every crash year, drop and recovery length
+        stress_frame = ttk.Frame(self.notebook, padding="10")
+        self.notebook.add(stress_frame, text="Stress Test")
+
+        stress_controls = ttk.Frame(stress_frame)
+        stress_controls.pack(fill=tk.X, pady=(0, 5))
+        self.stress_years_var = tk.StringVar(value="0:9:1")
+        self.stress_drops_var = tk.StringVar(value="10:60:5")
+        self.stress_recovery_var = tk.StringVar(value="0:5:1")
+        for label, var in (("Crash years:", self.stress_years_var), ("Drops (%):", self.stress_drops_var),
+                           ("Recovery years:", self.stress_recovery_var)):
+            ttk.Label(stress_controls, text=label).pack(side=tk.LEFT, padx=(10, 2))
+            ttk.Entry(stress_controls, textvariable=var, width=10).pack(side=tk.LEFT)
+        ttk.Button(stress_controls, text="Run", command=self.run_stress_test).pack(side=tk.LEFT, padx=10)
+        ttk.Label(stress_controls, text="Show recovery:").pack(side=tk.LEFT, padx=(10, 2))
+        self.stress_recovery_shown_var = tk.StringVar(value="")
+        self.stress_recovery_combo = ttk.Combobox(stress_controls, textvariable=self.stress_recovery_shown_var,
+                                                  state="readonly", width=6)
+        self.stress_recovery_combo.pack(side=tk.LEFT)
+        self.stress_recovery_combo.bind('<<ComboboxSelected>>', lambda _event: self.update_stress_heatmap())
+
+        self.stress_figure = Figure(figsize=(10, 6), dpi=100)
+        self.stress_canvas = FigureCanvasTkAgg(self.stress_figure, stress_frame)
+        self.stress_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.stress_cells = None
+        self.stress_title = ""
     
     def mortgage_payment(self, principal, rate, years):
         """Return monthly payment; handle zero-rate loans explicitly."""
@@ -616,95 +1041,259 @@ class HouseCalculatorGUI:
         if self._pending_calc is not None:
             self.root.after_cancel(self._pending_calc)
             self._pending_calc = None
+        self.cancel_background_fill()
+        self.snapshot_df = None
         try:
-            price1 = self.get_numeric_value('price1')
-            price2 = self.get_numeric_value('price2')
-            down_payment = self.get_numeric_value('down_payment')
-            initial_investment = self.get_numeric_value('initial_investment')
-            mortgage_rate = self.get_percent_value('mortgage_rate')
-
-            inv_return_exp = self.get_percent_value('inv_return_expected')
-            inv_return_down = self.get_percent_value('inv_return_downside')
-            house_return_exp = self.get_percent_value('house_return_expected')
-            house_return_down = self.get_percent_value('house_return_downside')
-
-            cap_gains_tax = self.get_percent_value('capital_gains_tax')
-            income_tax = self.get_percent_value('income_tax')
-            cost_basis_ratio = self.get_percent_value('cost_basis_ratio')
-            ltv = self.get_percent_value('ltv_ratio')
-            monthly_cash_flow = self.get_numeric_value('monthly_cash_flow')
-            property_tax_rate = self.get_percent_value('property_tax_rate')
-            home_insurance_rate = self.get_percent_value('home_insurance_rate')
-            closing_cost_rate = self.get_percent_value('closing_cost_rate')
-            
-            # Bear market parameters
-            bear_enabled = self.bear_enabled_var.get()
-            bear_year = int(self.get_numeric_value('bear_year'))
-            bear_drop = self.get_percent_value('bear_drop')
-            bear_recovery = int(self.get_numeric_value('bear_recovery'))
-
-            years = self.parse_int_list(self.years_var.get())
-            terms = self.parse_int_list(self.terms_var.get())
-
-            purchase_prices = [price1, price2]
-            investment_returns = {"expected": inv_return_exp, "downside": inv_return_down}
-            housing_returns = {"expected": house_return_exp, "downside": house_return_down}
-
-            records = []
-
-            for price in purchase_prices:
-                for duration in years:
-                    for ret_case, inv_return in investment_returns.items():
-                        for house_case, house_return in housing_returns.items():
-                            nw, cost = self.simulate_scenario(price, down_payment, 0, 0, inv_return,
-                                                              house_return, duration, 'cash', ltv,
-                                                              cap_gains_tax, income_tax, initial_investment, 
-                                                              monthly_cash_flow, cost_basis_ratio,
-                                                              property_tax_rate, home_insurance_rate, closing_cost_rate,
-                                                              bear_enabled, bear_year, bear_drop, bear_recovery)
-                            records.append([price, duration, ret_case, house_case, 'Cash',
-                                            np.round(nw, 2), np.round(cost, 2)])
-
-                            for term in terms:
-                                nw_full, cost_full = self.simulate_scenario(price, down_payment, mortgage_rate, term,
-                                                                            inv_return, house_return, duration, 'full',
-                                                                            ltv, cap_gains_tax, income_tax, initial_investment,
-                                                                            monthly_cash_flow, cost_basis_ratio,
-                                                                            property_tax_rate, home_insurance_rate, closing_cost_rate,
-                                                                            bear_enabled, bear_year, bear_drop, bear_recovery)
-                                records.append([price, duration, ret_case, house_case, f'Full {term}y',
-                                                np.round(nw_full, 2), np.round(cost_full, 2)])
-
-                            for term in terms:
-                                nw_hybrid, cost_hybrid = self.simulate_scenario(price, down_payment, mortgage_rate, term,
-                                                                                inv_return, house_return, duration, 'hybrid',
-                                                                                ltv, cap_gains_tax, income_tax, initial_investment,
-                                                                                monthly_cash_flow, cost_basis_ratio,
-                                                                                property_tax_rate, home_insurance_rate, closing_cost_rate,
-                                                                                bear_enabled, bear_year, bear_drop, bear_recovery)
-                                records.append([price, duration, ret_case, house_case, f'Hybrid {term}y',
-                                                np.round(nw_hybrid, 2), np.round(cost_hybrid, 2)])
-
-            self.df = pd.DataFrame(records, columns=['Price', 'Years', 'Return Case', 'Housing Case',
-                                                     'Scenario', 'Net Worth', 'Out-of-Pocket Cost'])
-
-            self.update_table()
-            self.update_chart()
-            self.update_best_options()
+            axes, params = self.collect_grid_axes()
+            rows = vector_engine.grid_size(**axes)
+            with engine_metrics.run('gui_calculate'):
+                if rows > MAX_GRID_ROWS:
+                    self.lazy_grid = lazy_grid.LazyGrid(params=params, **axes)
+                    self.df = self.lazy_chart_slice()
+                else:
+                    self.lazy_grid = None
+                    self.df = vector_engine.run_grid(params=params, **axes)
+            self.result_params = params
+            self.result_axes = axes
+
+            with engine_metrics.timer('gui_views_seconds'):
+                self.update_table()
+                self.update_chart()
+                self.update_heatmap()
+                self.update_best_options()
+                self.update_frontier()
 
         except Exception as exc:
             if silent:
                 return
             messagebox.showerror("Error", f"Calculation error: {str(exc)}")
     
+    def session_inputs(self):
+        """Text of every input, as typed, for the session snapshot."""
+        inputs = {name: config['entry_var'].get() for name, config in self.numeric_inputs.items()}
+        inputs.update(years=self.years_var.get(), terms=self.terms_var.get(), chart_price=self.chart_price_var.get(),
+                      return_scenario=self.return_scenario_var.get(),
+                      housing_scenario=self.housing_scenario_var.get(), bear_enabled=self.bear_enabled_var.get())
+        return inputs
+
+    def restore_inputs(self, inputs):
+        # Entry traces move the sliders and schedule the background recompute, as if the values were typed
+        for name, text in inputs.items():
+            if name in self.numeric_inputs:
+                self.numeric_inputs[name]['entry_var'].set(text)
+        for name, var in (('years', self.years_var), ('terms', self.terms_var), ('chart_price', self.chart_price_var),
+                          ('return_scenario', self.return_scenario_var),
+                          ('housing_scenario', self.housing_scenario_var), ('bear_enabled', self.bear_enabled_var)):
+            if name in inputs:
+                var.set(inputs[name])
+
+    def warm_start(self):
+        """Restore the last session's inputs and results, then recompute them in the background."""
+        try:
+            inputs, df, metadata = session_state.load_snapshot(session_state.SNAPSHOT_PATH)
+            params = ModelParams(**metadata['params']) if metadata.get('params') else None
+        except (OSError, ValueError, TypeError):
+            self.calculate(silent=True)
+            return
+        self.restore_inputs(inputs)
+        self.df = df
+        self.snapshot_df = df
+        self.result_params = params
+        self.result_axes = metadata.get('axes')
+        self.update_table()
+        self.update_chart()
+        self.update_heatmap()
+        self.update_best_options()
+        self.update_frontier()
+        # restore_inputs has scheduled a recalculation; make sure one runs even if nothing changed
+        if self._pending_calc is None:
+            self.schedule_recalculate()
+
+    def on_close(self):
+        if hasattr(self, 'df') and not self.df.empty:
+            try:
+                session_state.save_snapshot(session_state.SNAPSHOT_PATH, self.session_inputs(), self.df,
+                                            self.result_params, self.result_axes)
+            except (OSError, ValueError, TypeError):
+                # A failed save only costs the next launch its warm start
+                pass
+        self.root.destroy()
+
+    def lazy_chart_slice(self):
+        """Evaluate only the chart price and return/housing cases of self.lazy_grid."""
+        grid = self.lazy_grid
+        prices = grid.axis_values('Price')
+        try:
+            chart_price = float(self.chart_price_var.get().replace(',', '').strip())
+            price = prices[np.argmin(np.abs(prices - chart_price))]
+        except ValueError:
+            price = prices[0]
+        view = grid.where({'Price': price, 'Return Case': self.return_scenario_var.get(),
+                           'Housing Case': self.housing_scenario_var.get()})
+        if len(view) > MAX_GRID_ROWS:
+            raise ValueError(f"The grid has {len(grid):,} rows and its chart slice {len(view):,}, above the limit of "
+                             f"{MAX_GRID_ROWS:,}. Narrow the ranges.")
+        return view.frame()
+
+    def export_results(self):
+        if not hasattr(self, 'df') or self.df.empty:
+            messagebox.showinfo("Export", "There are no results to export yet.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export Results", defaultextension=".parquet",
+            filetypes=[("Parquet", "*.parquet"), ("Arrow IPC", "*.arrow"), ("CSV", "*.csv")])
+        if not path:
+            return
+        try:
+            result_export.export_results(self.df, path, self.result_params, self.result_axes)
+        except (ImportError, ValueError, OSError) as exc:
+            messagebox.showerror("Export", f"Export failed: {exc}")
+
+    def toggle_metrics(self):
+        if self.metrics_var.get():
+            # Peak memory comes from tracemalloc, which slows allocation-heavy calculations somewhat
+            engine_metrics.enable(track_memory=True)
+        else:
+            engine_metrics.disable()
+
+    def export_metrics(self):
+        if engine_metrics.registry is None:
+            messagebox.showinfo("Metrics", "Turn on File > Collect Engine Metrics first.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export Metrics", defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("Prometheus text", "*.prom")])
+        if not path:
+            return
+        try:
+            engine_metrics.registry.write(path)
+        except OSError as exc:
+            messagebox.showerror("Metrics", f"Export failed: {exc}")
+
+    def open_results(self):
+        path = filedialog.askopenfilename(
+            title="Open Results",
+            filetypes=[("Result files", "*.parquet *.arrow *.feather *.csv"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            # Arrow files are memory-mapped, so large sweeps open without a full parse
+            df, metadata = result_export.load_results(path)
+        except (ImportError, ValueError, OSError) as exc:
+            messagebox.showerror("Open", f"Could not open results: {exc}")
+            return
+        # Loaded results replace the current set until the next recalculation
+        if self._pending_calc is not None:
+            self.root.after_cancel(self._pending_calc)
+            self._pending_calc = None
+        self.cancel_background_fill()
+        self.snapshot_df = None
+        self.df = df
+        self.result_params = (metadata or {}).get('params')
+        self.result_axes = (metadata or {}).get('axes')
+        self.update_table()
+        self.update_chart()
+        self.update_heatmap()
+        self.update_best_options()
+        self.update_frontier()
+
+    def run_goal_seek(self):
+        goal = GOAL_SEEK_GOALS[self.goal_var.get()]
+        try:
+            target_text = self.goal_target_var.get().replace('$', '').replace(',', '').strip()
+            target = float(target_text) if target_text else None
+            axes, params = self.collect_grid_axes()
+            if goal == 'min_cash_flow':
+                axes['sweeps'].pop('monthly_cash_flow', None)
+                result = goal_seek.min_cash_flow(params=params, target_net_worth=target, **axes)
+            else:
+                del axes['purchase_prices']
+                result = goal_seek.max_price(params=params, target_net_worth=target, **axes)
+        except ValueError as exc:
+            messagebox.showerror("Goal Seek", f"Could not solve: {exc}")
+            return
+
+        solved = result.columns[-2]
+        unsolved = int(result[solved].isna().sum())
+        self.goal_status_var.set(f"{len(result):,} cells solved" +
+                                 (f"; {unsolved:,} not affordable within the search range" if unsolved else ""))
+        self.goal_tree.delete(*self.goal_tree.get_children())
+        columns = list(result.columns)
+        self.goal_tree['columns'] = columns
+        self.goal_tree['show'] = 'headings'
+        for col in columns:
+            self.goal_tree.heading(col, text=col)
+            self.goal_tree.column(col, width=120 if col in CURRENCY_COLUMNS else 100,
+                                  anchor=tk.E if col in CURRENCY_COLUMNS else tk.CENTER)
+        for row in result.head(TABLE_ROW_LIMIT).itertuples(index=False):
+            self.goal_tree.insert('', tk.END, values=[self.format_cell(col, val) for col, val in zip(columns, row)])
+
+    def run_stress_test(self):
+        """Evaluate the chart price and cases under every crash combination and show the winners."""
+        try:
+            # All three take an a,b,c list or a start:stop:step range, and reject empty ones
+            crash_years = self.parse_int_list(self.stress_years_var.get())
+            drops = self.parse_value_list(self.stress_drops_var.get())
+            recovery_years = self.parse_int_list(self.stress_recovery_var.get())
+            axes, params = self.chart_slice_axes()
+            if not axes['purchase_prices']:
+                raise ValueError("Set the chart price to one of the purchase prices")
+            if axes.pop('sweeps'):
+                raise ValueError("The stress test needs single values for every other input")
+            axes['years'] = [max(axes['years'])]
+            rows = vector_engine.grid_size(**axes) * len(crash_years) * len(drops) * len(recovery_years)
+            if rows > MAX_GRID_ROWS:
+                raise ValueError(f"The stress grid has {rows:,} rows, above the limit of {MAX_GRID_ROWS:,}.")
+            df = stress_grid.run_bear_stress(params=params, crash_years=crash_years,
+                                             drops=[d / 100 for d in drops], recovery_years=recovery_years, **axes)
+            cells = stress_grid.winners(df)
+        except (ValueError, KeyError) as exc:
+            messagebox.showerror("Stress Test", f"Could not run the stress test: {exc}")
+            return
+
+        self.stress_cells = cells
+        self.stress_title = (f"Best Strategy by Net Worth After {axes['years'][0]} Years - "
+                             f"${axes['purchase_prices'][0]:,.0f} Home")
+        self.stress_recovery_combo['values'] = [f"{r:g}" for r in recovery_years]
+        if self.stress_recovery_shown_var.get() not in self.stress_recovery_combo['values']:
+            self.stress_recovery_shown_var.set(f"{recovery_years[0]:g}")
+        self.update_stress_heatmap()
+
+    def update_stress_heatmap(self):
+        cells = self.stress_cells
+        if cells is None or cells.empty:
+            return
+        recovery = float(self.stress_recovery_shown_var.get())
+        view = cells[np.isclose(cells['Recovery Years'], recovery)]
+        x_values, y_values, grid, labels = stress_grid.winner_grid(view, 'Bear Market Year', 'Bear Market Drop')
+
+        self.stress_figure.clear()
+        ax = self.stress_figure.add_subplot(111)
+        palette = plt.get_cmap('tab10' if len(labels) <= 10 else 'tab20')
+        cmap = ListedColormap([palette(i) for i in range(len(labels))])
+        ax.imshow(grid, origin='lower', aspect='auto', cmap=cmap, vmin=-0.5, vmax=len(labels) - 0.5,
+                  interpolation='nearest')
+        ax.set_xticks(range(len(x_values)))
+        ax.set_xticklabels([f"{v:g}" for v in x_values])
+        ax.set_yticks(range(len(y_values)))
+        ax.set_yticklabels([f"{v * 100:g}%" for v in y_values])
+        ax.set_xlabel("Crash Year")
+        ax.set_ylabel("Market Drop")
+        ax.set_title(f"{self.stress_title}\n(recovery over {recovery:g} years)")
+        present = np.unique(grid[~np.isnan(grid)]).astype(int)
+        ax.legend(handles=[Patch(color=cmap(i), label=labels[i]) for i in present],
+                  loc='upper left', bbox_to_anchor=(1.01, 1))
+        self.stress_figure.tight_layout()
+        self.stress_canvas.draw()
+
     def update_table(self):
-        # Clear existing data
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
         if not hasattr(self, 'df') or self.df.empty:
+            self.tree.delete(*self.tree.get_children())
             self.tree['columns'] = []
             self.tree['show'] = ''
+            self.table_index = None
+            self.table_rows = np.zeros(0, dtype=np.intp)
+            self.table_status_var.set("")
             return
 
         # Set columns
@@ -714,29 +1303,142 @@ class HouseCalculatorGUI:
         
         # Format columns
         for col in columns:
-            self.tree.heading(col, text=col)
-            if col in ['Net Worth', 'Out-of-Pocket Cost', 'Price']:
+            self.tree.heading(col, text=col, command=lambda col=col: self.sort_table(col))
+            if col in CURRENCY_COLUMNS:
                 self.tree.column(col, width=120, anchor=tk.E)
             else:
                 self.tree.column(col, width=100, anchor=tk.CENTER)
-        
-        # Add data
-        for _, row in self.df.iterrows():
-            values = []
-            for col in columns:
-                val = row[col]
-                if col in ['Net Worth', 'Out-of-Pocket Cost', 'Price']:
-                    values.append(f"${val:,.0f}")
-                else:
-                    values.append(val)
-            self.tree.insert('', tk.END, values=values)
+
+        # Sort permutations and filter bitmaps are built lazily, once per result set
+        self.table_index = table_index.TableIndex(self.df)
+        if self.table_sort is not None and self.table_sort[0] not in columns:
+            self.table_sort = None
+        for column, combo in self.table_filter_combos.items():
+            combo['values'] = ["All"] + list(self.table_index.labels(column).cat.categories)
+            if self.table_filter_vars[column].get() not in combo['values']:
+                self.table_filter_vars[column].set("All")
+        self.refresh_table_view()
+
+    def refresh_table_view(self):
+        """Apply the table filters and sort order, and show the first window of matching rows."""
+        if self.table_index is None:
+            return
+        categories = {column: [var.get()] for column, var in self.table_filter_vars.items() if var.get() != "All"}
+        low = self.parse_numeric("currency", self.table_price_min_var.get())
+        high = self.parse_numeric("currency", self.table_price_max_var.get())
+        ranges = {'Price': (low, high)} if low is not None or high is not None else None
+        sort, descending = self.table_sort or (None, False)
+        self.table_rows = self.table_index.view(sort, descending, categories, ranges)
+        self.table_offset = 0
+
+        for col in self.tree['columns']:
+            arrow = (" \u25bc" if descending else " \u25b2") if col == sort else ""
+            self.tree.heading(col, text=f"{col}{arrow}")
+        self.table_status_var.set(f"{len(self.table_rows):,} of {len(self.df):,} rows")
+        self.fill_table_window()
+
+    def sort_table(self, column):
+        """Heading click: ascending, then descending, then back to grid order."""
+        if self.table_sort is None or self.table_sort[0] != column:
+            self.table_sort = (column, False)
+        elif not self.table_sort[1]:
+            self.table_sort = (column, True)
+        else:
+            self.table_sort = None
+        self.refresh_table_view()
+
+    def fill_table_window(self):
+        """Format and show the rows at the current scroll offset, reusing the Treeview items."""
+        rows = self.table_rows[self.table_offset:self.table_offset + self.table_window]
+        items = self.tree.get_children()
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+        for _ in range(len(items), len(rows)):
+            self.tree.insert('', tk.END)
+
+        columns = list(self.df.columns)
+        window = self.df.take(rows)
+        for item, row in zip(self.tree.get_children(), window.itertuples(index=False)):
+            self.tree.item(item, values=[self.format_cell(col, val) for col, val in zip(columns, row)])
+
+        total = len(self.table_rows)
+        if total:
+            self.tree_scroll_y.set(self.table_offset / total, (self.table_offset + len(rows)) / total)
+        else:
+            self.tree_scroll_y.set(0, 1)
+
+    def scroll_table(self, *args):
+        """Scrollbar command ('moveto', fraction) or ('scroll', n, 'units'/'pages') over the whole view."""
+        total = len(self.table_rows)
+        if args[0] == 'moveto':
+            offset = int(round(float(args[1]) * total))
+        else:
+            step = self.table_window if args[2] == 'pages' else 1
+            offset = self.table_offset + int(args[1]) * step
+        offset = min(max(offset, 0), max(total - self.table_window, 0))
+        if offset != self.table_offset:
+            self.table_offset = offset
+            self.fill_table_window()
+
+    def on_table_mousewheel(self, event):
+        self.scroll_table('scroll', int(-1*(event.delta/120)) * 3, 'units')
+        # Keep the input panel's global wheel binding from scrolling too
+        return "break"
+
+    def on_table_resize(self, event):
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        window = max(1, event.height // row_height - 1)
+        if window != self.table_window:
+            self.table_window = window
+            if self.table_index is not None:
+                self.fill_table_window()
+
+    def format_cell(self, column, value):
+        if column in CURRENCY_COLUMNS:
+            return "" if pd.isna(value) else f"${value:,.0f}"
+        if column in PERCENT_COLUMNS:
+            return "" if pd.isna(value) else f"{value * 100:.2f}%"
+        return value
+
+    def format_axis_value(self, column, value):
+        if column in CURRENCY_COLUMNS or column in PERCENT_COLUMNS:
+            return self.format_cell(column, value)
+        return f"{value:g}"
+
+    def grid_columns(self):
+        """Columns added to the result set by swept parameters or multi-rate grids."""
+        return [col for col in self.df.columns if col not in vector_engine.RESULT_COLUMNS]
+
+    def describe_row(self, row, columns=None):
+        """Scenario label plus the values of any swept parameters, e.g. 'Full 30y (Mortgage Rate 5.70%)'."""
+        if columns is None:
+            columns = self.grid_columns()
+        extras = [f"{col} {self.format_cell(col, row[col])}" for col in columns if not pd.isna(row[col])]
+        if not extras:
+            return row['Scenario']
+        return f"{row['Scenario']} ({', '.join(extras)})"
     
-    def update_chart(self):
+    def update_chart(self, df=None, horizons=None):
+        """
+        Draw the chart from the result set, or from df (e.g. a preview slice
+        while a slider is dragged). Lines follow the year-by-year trajectory
+        when it can be computed, with markers at the horizons.
+        """
         if self._pending_chart is not None:
             self.root.after_cancel(self._pending_chart)
             self._pending_chart = None
 
-        if not hasattr(self, 'df') or self.df.empty:
+        if df is None and self.result_axes is not None:
+            try:
+                axes, params = self.chart_slice_axes(self.result_axes, self.result_params)
+            except (ValueError, KeyError, TypeError):
+                axes = None
+            if axes is not None:
+                df = self.chart_trajectories(axes, params)
+                horizons = axes['years']
+        if df is None:
+            df = getattr(self, 'df', None)
+        if df is None:
             self.ax.clear()
             self.canvas.draw()
             return
@@ -750,29 +1452,44 @@ class HouseCalculatorGUI:
         return_case = self.return_scenario_var.get()
         housing_case = self.housing_scenario_var.get()
 
-        self.ax.clear()
-
-        scenarios = self.df['Scenario'].unique()
-        plotted = False
-
-        for scenario in scenarios:
-            subset = self.df[(np.isclose(self.df['Price'], chart_price)) &
-                             (self.df['Scenario'] == scenario) &
-                             (self.df['Return Case'] == return_case) &
-                             (self.df['Housing Case'] == housing_case)]
+        view = df[(np.isclose(df['Price'], chart_price)) &
+                  (df['Return Case'] == return_case) &
+                  (df['Housing Case'] == housing_case)]
+
+        # One line per scenario and combination of swept parameter values
+        columns = [col for col in df.columns
+                   if col not in vector_engine.RESULT_COLUMNS and col not in vector_engine.TRAJECTORY_COLUMNS]
+        series = []
+        for _key, subset in view.groupby(['Scenario'] + columns, sort=False, dropna=False, observed=True):
+            subset = subset.sort_values('Years')
+            series.append((self.describe_row(subset.iloc[0], columns),
+                           subset['Years'].to_numpy(), subset['Net Worth'].to_numpy()))
+        title = (f"Net Worth Over Time - ${chart_price:,.0f} Home\n"
+                 f"({return_case.title()} Investment, {housing_case.title()} Housing)")
+
+        # Slider drags redraw the same lines with new values; move them in place instead of rebuilding the axes
+        lines = self.ax.get_lines()
+        if series and self.ax.get_title() == title and \
+                [line.get_label() for line in lines] == [label for label, _x, _y in series]:
+            for line, (_label, x, y) in zip(lines, series):
+                line.set_data(x, y)
+                line.set_markevery(self.chart_markers(x, horizons))
+            self.ax.relim()
+            self.ax.autoscale_view()
+            self.canvas.draw_idle()
+            return
 
-            if not subset.empty:
-                subset = subset.sort_values('Years')
-                self.ax.plot(subset['Years'], subset['Net Worth'], marker='o', label=scenario)
-                plotted = True
+        self.ax.clear()
+        for label, x, y in series:
+            self.ax.plot(x, y, marker='o', markevery=self.chart_markers(x, horizons), label=label)
 
-        title_price = chart_price
-        self.ax.set_title(f"Net Worth Over Time - ${title_price:,.0f} Home\n({return_case.title()} Investment, {housing_case.title()} Housing)")
+        self.ax.set_title(title)
         self.ax.set_xlabel("Years")
         self.ax.set_ylabel("Net Worth ($)")
 
-        if plotted:
-            self.ax.legend()
+        if series:
+            if len(series) <= 20:
+                self.ax.legend()
         else:
             self.ax.text(0.5, 0.5, "No data for selected inputs", transform=self.ax.transAxes,
                          ha='center', va='center')
@@ -782,7 +1499,156 @@ class HouseCalculatorGUI:
 
         self.figure.tight_layout()
         self.canvas.draw()
-    
+
+    def chart_markers(self, years, horizons):
+        # Mark the requested horizons on a dense trajectory; every point when the rows are horizons already
+        if horizons is None:
+            return None
+        return np.isin(years, horizons).tolist()
+
+    def heatmap_slice(self, x, y):
+        """Restrict self.df to one value of every grid dimension other than x and y."""
+        df = self.df
+        view = df[(df['Return Case'] == self.return_scenario_var.get()) &
+                  (df['Housing Case'] == self.housing_scenario_var.get())]
+        fixed = []
+        for col in ['Price', 'Years'] + self.grid_columns():
+            if col in (x, y):
+                continue
+            values = view[col].dropna().unique()
+            if len(values) == 0:
+                continue
+            value = values[0]
+            if col == 'Price':
+                try:
+                    chart_price = float(self.chart_price_var.get().replace(',', '').strip())
+                    value = values[np.argmin(np.abs(values - chart_price))]
+                except ValueError:
+                    pass
+            # Rows that do not depend on this dimension (NaN) apply to every value of it
+            view = view[(view[col] == value) | view[col].isna()]
+            if len(values) > 1 or col in ('Price', 'Years'):
+                fixed.append(f"{col} {self.format_cell(col, value)}")
+        return view, fixed
+
+    def update_heatmap(self):
+        if not hasattr(self, 'df') or self.df.empty:
+            return
+
+        dimensions = ['Price', 'Years'] + self.grid_columns()
+        scenarios = list(self.df['Scenario'].unique())
+        self.heatmap_combos['x']['values'] = dimensions
+        self.heatmap_combos['y']['values'] = dimensions
+        self.heatmap_combos['scenario']['values'] = scenarios
+        self.heatmap_combos['baseline']['values'] = ["None"] + scenarios
+        if self.heatmap_x_var.get() not in dimensions:
+            self.heatmap_x_var.set('Price')
+        if self.heatmap_y_var.get() not in dimensions:
+            self.heatmap_y_var.set('Years')
+        if self.heatmap_scenario_var.get() not in scenarios:
+            self.heatmap_scenario_var.set(scenarios[-1])
+        if self.heatmap_baseline_var.get() not in ["None"] + scenarios:
+            self.heatmap_baseline_var.set("None")
+
+        x, y = self.heatmap_x_var.get(), self.heatmap_y_var.get()
+        if x == y:
+            return
+        scenario = self.heatmap_scenario_var.get()
+        baseline = self.heatmap_baseline_var.get()
+        baseline = None if baseline == "None" else baseline
+        value = self.heatmap_value_var.get()
+
+        view, fixed = self.heatmap_slice(x, y)
+        x_values, y_values, grid = vector_engine.advantage_grid(view, x, y, scenario, baseline, value)
+        grid = np.broadcast_to(grid, (len(y_values), len(x_values)))
+        extent = (-0.5, len(x_values) - 0.5, -0.5, len(y_values) - 0.5)
+
+        finite = grid[np.isfinite(grid)]
+        if baseline is not None:
+            limit = np.abs(finite).max() if finite.size else 1.0
+            cmap, vmin, vmax = 'RdYlGn', -limit, limit
+        else:
+            cmap = 'viridis'
+            vmin, vmax = (finite.min(), finite.max()) if finite.size else (0.0, 1.0)
+
+        # Reuse the image so redraws only swap pixel data
+        if self.heatmap_image is None:
+            self.heatmap_image = self.heatmap_ax.imshow(grid, origin='lower', aspect='auto', interpolation='nearest',
+                                                        extent=extent, cmap=cmap, vmin=vmin, vmax=vmax)
+            self.heatmap_colorbar = self.heatmap_figure.colorbar(self.heatmap_image, ax=self.heatmap_ax)
+            self.heatmap_colorbar.formatter = plt.FuncFormatter(lambda v, _pos: f'${v/1e3:,.0f}K')
+        else:
+            self.heatmap_image.set_data(grid)
+            self.heatmap_image.set_extent(extent)
+            self.heatmap_image.set_cmap(cmap)
+            self.heatmap_image.set_clim(vmin, vmax)
+        self.heatmap_colorbar.update_normal(self.heatmap_image)
+
+        for axis, col, values in ((self.heatmap_ax.xaxis, x, x_values), (self.heatmap_ax.yaxis, y, y_values)):
+            axis.set_major_formatter(plt.FuncFormatter(
+                lambda pos, _p, col=col, values=values:
+                    self.format_axis_value(col, values[int(round(pos))]) if 0 <= round(pos) < len(values) else ''))
+            axis.set_major_locator(plt.MaxNLocator(nbins=8, integer=True))
+
+        what = scenario if baseline is None else f"{scenario} minus {baseline}"
+        self.heatmap_ax.set_title(f"{value}: {what}\n({', '.join(fixed)})" if fixed else f"{value}: {what}")
+        self.heatmap_ax.set_xlabel(x)
+        self.heatmap_ax.set_ylabel(y)
+        self.heatmap_canvas.draw_idle()
+
+    def update_frontier(self):
+        """Scatter the chart price's scenarios at one horizon, highlighting the Pareto frontier."""
+        if not hasattr(self, 'df') or self.df.empty:
+            return
+        # One sort-and-sweep marks the frontier of every group; redo it only when the grid changes
+        if self.frontier_source is not self.df:
+            self.frontier_mask = pareto.pareto_mask(self.df)
+            self.frontier_source = self.df
+
+        horizons = [f"{y:g}" for y in sorted(self.df['Years'].unique())]
+        self.frontier_years_combo['values'] = horizons
+        if self.frontier_years_var.get() not in horizons:
+            self.frontier_years_var.set(horizons[-1])
+        years = float(self.frontier_years_var.get())
+
+        df = self.df
+        prices = df['Price'].unique()
+        try:
+            chart_price = float(self.chart_price_var.get().replace(',', '').strip())
+            price = prices[np.argmin(np.abs(prices - chart_price))]
+        except ValueError:
+            price = prices[0]
+        selected = ((df['Price'] == price) & (df['Years'] == years) &
+                    (df['Return Case'] == self.return_scenario_var.get()) &
+                    (df['Housing Case'] == self.housing_scenario_var.get())).to_numpy()
+        view = df[selected]
+        on_frontier = self.frontier_mask[selected]
+        frontier = view[on_frontier].sort_values('Out-of-Pocket Cost')
+        dominated = view[~on_frontier]
+
+        ax = self.frontier_ax
+        ax.clear()
+        ax.scatter(dominated['Out-of-Pocket Cost'], dominated['Net Worth'], s=12, color='lightgray',
+                   label='Dominated')
+        ax.plot(frontier['Out-of-Pocket Cost'], frontier['Net Worth'], color='tab:red', marker='o',
+                drawstyle='steps-post', label='Pareto frontier')
+        extra_columns = self.grid_columns()
+        # Label the frontier while it stays readable
+        if len(frontier) <= 12:
+            for row in frontier.to_dict('records'):
+                ax.annotate(self.describe_row(row, extra_columns), (row['Out-of-Pocket Cost'], row['Net Worth']),
+                            textcoords='offset points', xytext=(5, -10), fontsize=8)
+        ax.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, _pos: f'${x/1e3:,.0f}K'))
+        ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda y, _pos: f'${y/1e6:.2f}M'))
+        ax.set_xlabel('Out-of-Pocket Cost')
+        ax.set_ylabel('Net Worth')
+        ax.set_title(f'Net Worth vs. Out-of-Pocket Cost - ${price:,.0f} House, {years:g} Years\n'
+                     f'({len(frontier)} of {len(view)} scenarios on the frontier)')
+        ax.grid(True, alpha=0.3)
+        ax.legend(loc='lower right')
+        self.frontier_figure.tight_layout()
+        self.frontier_canvas.draw_idle()
+
     def update_best_options(self):
         self.best_text.delete(1.0, tk.END)
 
@@ -797,38 +1663,56 @@ class HouseCalculatorGUI:
         output.append("=" * 80)
         output.append("")
 
+        # Swept assumptions (returns, model parameters) get groups of their own, so only
+        # the decision axes (scenario, term, mortgage rate) compete for best
+        extra_columns = self.grid_columns()
+        assumptions = [col for col in extra_columns if col != 'Mortgage Rate']
+        extra_columns = [col for col in extra_columns if col not in assumptions]
+        keys = ['Price', 'Years', 'Return Case', 'Housing Case'] + assumptions
+        groups = self.df.groupby(keys, sort=False, observed=True)
+        best_nw_index = groups['Net Worth'].idxmax()
+        best_cost_index = groups['Out-of-Pocket Cost'].idxmin()
+        # Fetch all winning rows at once; per-group .loc lookups dominate on large grids
+        best_nw_rows = dict(zip(best_nw_index.index, self.df.loc[best_nw_index.to_numpy()].to_dict('records')))
+        best_cost_rows = dict(zip(best_cost_index.index, self.df.loc[best_cost_index.to_numpy()].to_dict('records')))
+        groups_by_case = {}
+        for key in best_nw_rows:
+            groups_by_case.setdefault(key[:4], []).append(key)
+
+        horizons = sorted(self.df['Years'].unique())
+
         for price in self.df['Price'].unique():
             output.append(f"\n{'='*80}")
             output.append(f"HOUSE PRICE: ${price:,.0f}")
             output.append(f"{'='*80}\n")
             
-            for years in sorted(self.df['Years'].unique()):
+            for years in horizons:
                 output.append(f"\n{'-'*80}")
                 output.append(f"TIME HORIZON: {years} YEARS")
                 output.append(f"{'-'*80}\n")
                 
                 for ret_case in ['expected', 'downside']:
                     for house_case in ['expected', 'downside']:
-                        subset = self.df[(self.df['Price'] == price) & 
-                                        (self.df['Years'] == years) & 
-                                        (self.df['Return Case'] == ret_case) & 
-                                        (self.df['Housing Case'] == house_case)]
-                        
-                        if not subset.empty:
-                            output.append(f"\nScenario: {ret_case.title()} Investment Return, {house_case.title()} Housing Return")
-                            
+                        for key in groups_by_case.get((price, years, ret_case, house_case), []):
+                            scenario = f"{ret_case.title()} Investment Return, {house_case.title()} Housing Return"
+                            if assumptions:
+                                values = [f"{col} {self.format_axis_value(col, value)}"
+                                          for col, value in zip(assumptions, key[4:])]
+                                scenario += f" ({', '.join(values)})"
+                            output.append(f"\nScenario: {scenario}")
+
                             # Best by net worth
-                            best_nw = subset.loc[subset['Net Worth'].idxmax()]
-                            output.append(f"  Best Net Worth: {best_nw['Scenario']}")
+                            best_nw = best_nw_rows[key]
+                            output.append(f"  Best Net Worth: {self.describe_row(best_nw, extra_columns)}")
                             output.append(f"    Net Worth: ${best_nw['Net Worth']:,.0f}")
                             output.append(f"    Out-of-Pocket Cost: ${best_nw['Out-of-Pocket Cost']:,.0f}")
-                            
+
                             # Best by out-of-pocket cost (lowest)
-                            best_cost = subset.loc[subset['Out-of-Pocket Cost'].idxmin()]
-                            output.append(f"  Lowest Out-of-Pocket Cost: {best_cost['Scenario']}")
+                            best_cost = best_cost_rows[key]
+                            output.append(f"  Lowest Out-of-Pocket Cost: {self.describe_row(best_cost, extra_columns)}")
                             output.append(f"    Net Worth: ${best_cost['Net Worth']:,.0f}")
                             output.append(f"    Out-of-Pocket Cost: ${best_cost['Out-of-Pocket Cost']:,.0f}")
-                            
+
                             output.append("")
         
         self.best_text.insert(1.0, "\n".join(output))
@@ -0,0 +1,380 @@
+import argparse
+import asyncio
+import json
+from collections import OrderedDict
+
+import numpy as np
+
+import engine_metrics
+import goal_seek
+import houseModel
+import pareto
+import vector_engine
+
+# Fields of a single-scenario request, in vector_engine.simulate_scenario order
+SCENARIO_FIELDS = ('price', 'mortgage_rate', 'term', 'investment_return', 'housing_return', 'duration')
+MODES = ('cash', 'full', 'hybrid')
+# Largest grid a /grid or /goal-seek request may ask for, as in the GUI
+MAX_GRID_ROWS = 2_000_000
+
+
+def request_params(overrides):
+    """houseModel's module-level inputs as a ModelParams, with a request's overrides applied."""
+    if not isinstance(overrides, dict):
+        raise TypeError("params must be a JSON object")
+    return houseModel.ModelParams.from_globals().replace(**overrides)
+
+
+class LRUCache:
+    def __init__(self, maxsize=4096, name='scenario'):
+        self.maxsize = maxsize
+        self.name = name
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            engine_metrics.inc('service_cache_total', cache=self.name, result='hit')
+            return self.entries[key]
+        self.misses += 1
+        engine_metrics.inc('service_cache_total', cache=self.name, result='miss')
+        return None
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+
+def _scenario_inputs(request):
+    """Validate a single-scenario request; returns (mode, field values, params)."""
+    if not isinstance(request, dict):
+        raise TypeError("A scenario request must be a JSON object")
+    mode = request.get('mode')
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+    values = []
+    for field in SCENARIO_FIELDS:
+        if field in request:
+            values.append(float(request[field]))
+        elif mode == 'cash' and field in ('mortgage_rate', 'term'):
+            values.append(0.0)
+        else:
+            raise ValueError(f"Missing field: {field}")
+    return mode, tuple(values), request_params(request.get('params', {}))
+
+
+def evaluate_scenarios(requests):
+    """
+    Evaluate many single-scenario requests with one vectorized call per mode.
+
+    Returns a list with, per request, either a result dict or the exception
+    raised for it.
+    """
+    parsed = []
+    for request in requests:
+        try:
+            parsed.append(_scenario_inputs(request))
+        except (ValueError, TypeError) as exc:
+            parsed.append(exc)
+    return evaluate_parsed(parsed)
+
+
+def evaluate_parsed(items):
+    """
+    Evaluate validated (mode, values, params) tuples, batched per mode.
+
+    Parameters may differ between items; they are stacked into arrays
+    alongside the scenario fields. Exceptions in `items` pass through.
+    """
+    results = list(items)
+    by_mode = {}
+    for i, item in enumerate(items):
+        if not isinstance(item, Exception):
+            by_mode.setdefault(item[0], []).append(i)
+
+    for mode, indices in by_mode.items():
+        columns = np.array([items[i][1] for i in indices]).T
+        params = {name: np.array([getattr(items[i][2], name) for i in indices])
+                  for name in vector_engine.PARAMETER_NAMES}
+        try:
+            net_worth, cost = vector_engine.simulate_scenario(*columns, mode, params)
+        except Exception as exc:
+            if len(indices) == 1:
+                results[indices[0]] = exc
+            else:
+                # A cell failed the portfolio check or has inputs the engine can't use;
+                # evaluate one by one so only that request gets the error
+                for i in indices:
+                    results[i] = evaluate_parsed([items[i]])[0]
+            continue
+        for k, i in enumerate(indices):
+            results[i] = {'net_worth': round(float(net_worth[k]), 2),
+                          'out_of_pocket_cost': round(float(cost[k]), 2)}
+    return results
+
+
+def _check_grid_size(request, purchase_prices):
+    rows = vector_engine.grid_size(
+        purchase_prices,
+        request.get('years', houseModel.years),
+        request.get('investment_returns', houseModel.investment_returns),
+        request.get('housing_returns', houseModel.housing_returns),
+        request.get('mortgage_rates', houseModel.mortgage_rates),
+        request.get('terms', houseModel.terms),
+        request.get('sweeps'),
+    )
+    if rows > MAX_GRID_ROWS:
+        raise ValueError(f"The grid has {rows:,} rows, above the limit of {MAX_GRID_ROWS:,}")
+
+
+def evaluate_grid(request):
+    """
+    Run vector_engine.run_grid for a grid request and return a JSON-ready dict.
+    With "pareto": true only each group's Net Worth / Out-of-Pocket Cost frontier is returned.
+    """
+    params = request_params(request.get('params', {}))
+    _check_grid_size(request, request.get('purchase_prices', houseModel.purchase_prices))
+    df = vector_engine.run_grid(
+        request.get('purchase_prices', houseModel.purchase_prices),
+        request.get('years', houseModel.years),
+        request.get('investment_returns', houseModel.investment_returns),
+        request.get('housing_returns', houseModel.housing_returns),
+        request.get('mortgage_rates', houseModel.mortgage_rates),
+        request.get('terms', houseModel.terms),
+        params,
+        request.get('sweeps'),
+    )
+    if request.get('pareto'):
+        df = pareto.pareto_frontier(df)
+    return json.loads(df.to_json(orient='split', index=False))
+
+
+def evaluate_goal_seek(request):
+    """
+    Run a goal_seek solver for a grid request with a 'goal' of min_cash_flow
+    or max_price, and optional 'target_net_worth', 'bounds' and 'tolerance'.
+    """
+    goal = request.get('goal')
+    if goal not in goal_seek.GOALS:
+        raise ValueError(f"goal must be one of {', '.join(goal_seek.GOALS)}")
+    tolerance = float(request.get('tolerance', goal_seek.TOLERANCE))
+    if not tolerance > 0:
+        raise ValueError("tolerance must be positive")
+    # max_price solves for the price, so its grid has one cell per other axis value
+    _check_grid_size(request, request.get('purchase_prices', houseModel.purchase_prices)
+                     if goal == 'min_cash_flow' else [None])
+    kwargs = {
+        'years': request.get('years', houseModel.years),
+        'investment_returns': request.get('investment_returns', houseModel.investment_returns),
+        'housing_returns': request.get('housing_returns', houseModel.housing_returns),
+        'mortgage_rates': request.get('mortgage_rates', houseModel.mortgage_rates),
+        'terms': request.get('terms', houseModel.terms),
+        'params': request_params(request.get('params', {})),
+        'sweeps': request.get('sweeps'),
+        'target_net_worth': request.get('target_net_worth'),
+        'tol': tolerance,
+    }
+    if goal == 'min_cash_flow':
+        kwargs['purchase_prices'] = request.get('purchase_prices', houseModel.purchase_prices)
+        df = goal_seek.min_cash_flow(**kwargs, bounds=request.get('bounds', goal_seek.CASH_FLOW_RANGE))
+    else:
+        df = goal_seek.max_price(**kwargs, bounds=request.get('bounds', goal_seek.PRICE_RANGE))
+    return json.loads(df.to_json(orient='split', index=False))
+
+
+class HouseModelService:
+    """
+    Batch-evaluation service around the vectorized engine.
+
+    Single-scenario requests arriving within `window` seconds of each other
+    are coalesced into one vectorized batch. Identical requests are answered
+    from an LRU cache, or share the in-flight evaluation if one is running.
+    Grid and goal-seek answers can be large, so they get a small cache of
+    their own rather than pushing thousands of scenarios out of the main one.
+    """
+
+    def __init__(self, window=0.002, max_batch=4096, cache_size=4096, grid_cache_size=16):
+        self.window = window
+        self.max_batch = max_batch
+        self.cache = LRUCache(cache_size)
+        self.grid_cache = LRUCache(grid_cache_size, name='grid')
+        self.inflight = {}
+        self.pending = []
+        self.flush_handle = None
+        self.batches = 0
+        self.batched_requests = 0
+
+    async def scenario(self, request):
+        item = _scenario_inputs(request)
+        # ModelParams is hashable, so the parsed request itself is the cache key
+        return await self._cached(self.cache, ('scenario',) + item, lambda: self._submit(item))
+
+    async def grid(self, request):
+        key = ('grid', json.dumps(request, sort_keys=True))
+        loop = asyncio.get_running_loop()
+        return await self._cached(self.grid_cache, key, lambda: loop.run_in_executor(None, evaluate_grid, request))
+
+    async def goal(self, request):
+        key = ('goal', json.dumps(request, sort_keys=True))
+        loop = asyncio.get_running_loop()
+        return await self._cached(self.grid_cache, key,
+                                  lambda: loop.run_in_executor(None, evaluate_goal_seek, request))
+
+    async def _cached(self, cache, key, compute):
+        result = cache.get(key)
+        if result is not None:
+            return result
+        if key in self.inflight:
+            return await asyncio.shield(self.inflight[key])
+        future = asyncio.ensure_future(compute())
+        self.inflight[key] = future
+        try:
+            result = await future
+        finally:
+            del self.inflight[key]
+        cache.put(key, result)
+        return result
+
+    def _submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((item, future))
+        if len(self.pending) >= self.max_batch:
+            self._flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.window, self._flush)
+        return future
+
+    def _flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        try:
+            self.batches += 1
+            self.batched_requests += len(batch)
+            results = evaluate_parsed([item for item, _future in batch])
+            for (_item, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except Exception as exc:
+            # This runs from call_later, where an escaping error would leave every client waiting
+            for _item, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+
+    def stats(self):
+        return {
+            'cache_entries': len(self.cache.entries),
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+            'grid_cache_entries': len(self.grid_cache.entries),
+            'grid_cache_hits': self.grid_cache.hits,
+            'grid_cache_misses': self.grid_cache.misses,
+            'batches': self.batches,
+            'batched_requests': self.batched_requests,
+            'backend': vector_engine.get_backend(),
+        }
+
+    # --- HTTP/1.1 handling (keep-alive, JSON bodies only) ---
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _version = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                status, payload = await self.dispatch(method, path, body)
+                data = json.dumps(payload).encode()
+                writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, path, body):
+        if method == 'GET' and path == '/health':
+            return '200 OK', {'status': 'ok'}
+        if method == 'GET' and path == '/stats':
+            return '200 OK', self.stats()
+        if method == 'GET' and path == '/metrics':
+            if engine_metrics.registry is None:
+                return '404 Not Found', {'error': "Metrics are disabled; start the service with --metrics"}
+            return '200 OK', engine_metrics.registry.snapshot()
+        if method != 'POST' or path not in ('/scenario', '/scenarios', '/grid', '/goal-seek'):
+            return '404 Not Found', {'error': f"No route for {method} {path}"}
+        try:
+            request = json.loads(body or b'{}')
+            if not isinstance(request, list if path == '/scenarios' else dict):
+                raise TypeError(f"Unexpected JSON body for {path}")
+            if path == '/scenario':
+                return '200 OK', await self.scenario(request)
+            if path == '/scenarios':
+                results = await asyncio.gather(*(self.scenario(r) for r in request), return_exceptions=True)
+                return '200 OK', [{'error': str(r)} if isinstance(r, Exception) else r for r in results]
+            if path == '/goal-seek':
+                return '200 OK', await self.goal(request)
+            return '200 OK', await self.grid(request)
+        except (ValueError, TypeError, KeyError) as exc:
+            return '400 Bad Request', {'error': str(exc)}
+        except Exception as exc:
+            # Anything else is the engine's fault, e.g. MemoryError; answer rather than drop the connection
+            return '500 Internal Server Error', {'error': f"{type(exc).__name__}: {exc}"}
+
+
+async def serve(host='127.0.0.1', port=8765, **options):
+    service = HouseModelService(**options)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"House model service listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local batch-evaluation HTTP service for the house model")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--window', type=float, default=0.002, help="Coalescing window in seconds")
+    parser.add_argument('--cache-size', type=int, default=4096)
+    parser.add_argument('--grid-cache-size', type=int, default=16, help="Cached /grid and /goal-seek answers")
+    parser.add_argument('--backend', choices=vector_engine.BACKENDS, default=None)
+    parser.add_argument('--metrics', action='store_true', help="Collect engine metrics, served at GET /metrics")
+    args = parser.parse_args()
+    if args.backend:
+        vector_engine.set_backend(args.backend)
+    if args.metrics:
+        engine_metrics.enable()
+    try:
+        asyncio.run(serve(args.host, args.port, window=args.window, cache_size=args.cache_size,
+                          grid_cache_size=args.grid_cache_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import engine_metrics
+import vector_engine
+
+# Rows evaluated per block, and how many evaluated blocks are kept (about 0.8 MB each)
+BLOCK_ROWS = 50_000
+CACHE_BLOCKS = 64
+
+
+class _Blocks:
+    """
+    Evaluated Net Worth / Out-of-Pocket Cost of a grid, block by block.
+
+    Blocks are contiguous runs of run_grid rows: one value of each leading
+    outer axis and a chunk of the next, with every later axis in full, so a
+    block is itself a small run_grid call. The most recently used blocks are
+    kept in an LRU cache shared by every view of the grid.
+    """
+
+    def __init__(self, axes, params, sweeps, lots, lot_method, tax, shape, block_rows, cache_blocks):
+        self.axes = axes
+        self.options = {'params': params, 'lots': lots, 'lot_method': lot_method, 'tax': tax}
+        self.sweeps = sweeps
+        self.cases = [vector_engine._case_values(axes['investment_returns']),
+                      vector_engine._case_values(axes['housing_returns'])]
+        self.cache_blocks = cache_blocks
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        # Split at the first outer axis whose later axes fit in a block, and chunk that axis
+        n_outer = len(shape) - 1
+        inner = [int(np.prod(shape[k + 1:])) for k in range(n_outer)]
+        self.split = next((k for k in range(n_outer) if inner[k] <= block_rows), n_outer - 1)
+        self.inner = max(inner[self.split], 1)
+        self.chunk = int(np.clip(block_rows // self.inner, 1, max(shape[self.split], 1)))
+        self.n_chunks = -(-shape[self.split] // self.chunk)
+        self.prefix_shape = shape[:self.split]
+        self.prefix_rows = shape[self.split] * self.inner
+
+    def block_of(self, rows):
+        within = rows % self.prefix_rows
+        return rows // self.prefix_rows * self.n_chunks + within // (self.chunk * self.inner)
+
+    def block_start(self, block):
+        prefix, chunk = divmod(block, self.n_chunks)
+        return prefix * self.prefix_rows + chunk * self.chunk * self.inner
+
+    def get(self, block):
+        if block in self.cache:
+            self.cache.move_to_end(block)
+            self.hits += 1
+            engine_metrics.inc('lazy_grid_block_cache_total', result='hit')
+            return self.cache[block]
+        self.misses += 1
+        engine_metrics.inc('lazy_grid_block_cache_total', result='miss')
+        values = self._evaluate(block)
+        self.cache[block] = values
+        if len(self.cache) > self.cache_blocks:
+            self.cache.popitem(last=False)
+        return values
+
+    def _evaluate(self, block):
+        prefix, chunk = divmod(block, self.n_chunks)
+        index = list(np.unravel_index(prefix, self.prefix_shape)) if self.split else []
+        index.append(slice(chunk * self.chunk, (chunk + 1) * self.chunk))
+
+        def pick(values, k):
+            if k >= len(index):
+                return list(values)
+            picked = values[index[k]]
+            return list(picked) if isinstance(index[k], slice) else [picked]
+
+        axes = dict(self.axes, purchase_prices=pick(self.axes['purchase_prices'], 0),
+                    years=pick(self.axes['years'], 1))
+        for k, name in ((2, 'investment_returns'), (3, 'housing_returns')):
+            returns = {}
+            for case, value in zip(*(pick(values, k) for values in self.cases[k - 2])):
+                returns.setdefault(case, []).append(value)
+            axes[name] = returns
+        sweeps = {name: pick(values, k) for k, (name, values) in enumerate(self.sweeps.items(), start=4)}
+        return vector_engine.grid_values(**axes, **self.options, sweeps=sweeps)
+
+    def values(self, rows):
+        """(2, len(rows)) values of the given run_grid rows, evaluating only the blocks they fall in."""
+        out = np.empty((2, len(rows)))
+        if not len(rows):
+            return out
+        blocks = self.block_of(rows)
+        order = np.argsort(blocks, kind='stable')
+        starts = np.flatnonzero(np.r_[True, np.diff(blocks[order]) != 0])
+        for start, end in zip(starts, np.r_[starts[1:], len(rows)]):
+            positions = order[start:end]
+            block = int(blocks[positions[0]])
+            out[:, positions] = self.get(block)[:, rows[positions] - self.block_start(block)]
+        return out
+
+
+class LazyGrid:
+    """
+    A run_grid result that is evaluated only where it is looked at.
+
+    Describes the same rows and columns as vector_engine.run_grid with the
+    same arguments, but nothing is computed up front: indexing (grid[i],
+    grid[a:b], grid[positions] or a boolean mask) returns those rows as a
+    DataFrame, evaluating only the blocks of about block_rows rows they fall
+    in, and the last cache_blocks blocks are kept for later reads.
+    where({column: values}) narrows any label column to some of its values
+    and returns another lazy view sharing the same cache, so a nominal grid
+    of 10^8 rows can be sliced to a chart or a page of the table for the
+    cost of the rows shown.
+    """
+
+    def __init__(self, purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, params,
+                 sweeps=None, label_rates=False, lots=None, lot_method='fifo', tax=None, block_rows=BLOCK_ROWS,
+                 cache_blocks=CACHE_BLOCKS):
+        axes = {'purchase_prices': list(purchase_prices), 'years': list(years),
+                'investment_returns': investment_returns, 'housing_returns': housing_returns,
+                'mortgage_rates': list(mortgage_rates), 'terms': list(terms)}
+        sweeps = {name: list(values) for name, values in (sweeps or {}).items()}
+        self.base_shape, self.columns = vector_engine.grid_columns(**axes, sweeps=sweeps, label_rates=label_rates)
+        self.selection = tuple(np.arange(n) for n in self.base_shape)
+        self.shape = self.base_shape
+        self._labels = {}
+        self._blocks = _Blocks(axes, params, sweeps, lots, lot_method, tax, self.base_shape, block_rows,
+                               cache_blocks)
+
+    def __len__(self):
+        return int(np.prod(self.shape))
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            position = key + len(self) if key < 0 else key
+            if not 0 <= position < len(self):
+                raise IndexError(f"Row {key} is outside a grid of {len(self):,} rows")
+            return self.frame([position]).iloc[0]
+        if isinstance(key, slice):
+            return self.frame(np.arange(*key.indices(len(self))))
+        key = np.asarray(key)
+        if key.dtype == bool:
+            if key.shape != (len(self),):
+                raise IndexError("A boolean mask must have one entry per row")
+            key = np.flatnonzero(key)
+        return self.frame(np.where(key < 0, key + len(self), key))
+
+    def _column(self, name):
+        for column_name, k, values, categorical in self.columns:
+            if column_name == name:
+                return k, values, categorical
+        raise ValueError(f"Unknown grid column: {name}")
+
+    def axis_values(self, column):
+        """Distinct values of a label column within this view, in grid order."""
+        k, values, categorical = self._column(column)
+        return pd.unique(np.asarray(values, dtype=object if categorical else None)[self.selection[k]])
+
+    def where(self, filters):
+        """
+        View restricted to rows whose label columns take the given values:
+        {column: value or list of values}, e.g. {'Price': 600000,
+        'Return Case': 'expected', 'Years': [5, 10]}. Columns are combined
+        with 'and'; the view shares this grid's block cache.
+        """
+        selection = list(self.selection)
+        for name, wanted in filters.items():
+            k, values, categorical = self._column(name)
+            values = np.asarray(values, dtype=object if categorical else None)
+            wanted = np.asarray(wanted if isinstance(wanted, (list, tuple, np.ndarray)) else [wanted],
+                                dtype=values.dtype)
+            selection[k] = selection[k][np.isin(values[selection[k]], wanted)]
+        view = object.__new__(LazyGrid)
+        view.__dict__.update(self.__dict__)
+        view.selection = tuple(selection)
+        view.shape = tuple(len(index) for index in selection)
+        return view
+
+    def frame(self, rows=None):
+        """
+        DataFrame of the given row positions of this view (default: all of
+        them, i.e. run_grid's result for the view), indexed by position.
+        """
+        positions = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.int64)
+        if positions.size and (positions.min() < 0 or positions.max() >= len(self)):
+            raise IndexError(f"Rows must be within a grid of {len(self):,} rows")
+        index = [selected[i] for selected, i in zip(self.selection, np.unravel_index(positions, self.shape))]
+        base_rows = np.ravel_multi_index(index, self.base_shape) if positions.size else positions
+
+        data = {}
+        for name, k, values, categorical in self.columns:
+            if categorical:
+                if name not in self._labels:
+                    codes, categories = pd.factorize(np.asarray(values, dtype=object))
+                    self._labels[name] = (codes.astype(np.int32), categories)
+                codes, categories = self._labels[name]
+                data[name] = pd.Categorical.from_codes(codes[index[k]], categories=categories)
+            else:
+                data[name] = np.asarray(values)[index[k]]
+        data['Net Worth'], data['Out-of-Pocket Cost'] = self._blocks.values(base_rows)
+        return pd.DataFrame(data, index=None if rows is None else positions, copy=False)
+
+    def cache_info(self):
+        """Block cache counters: blocks held, hits, misses and rows per block."""
+        blocks = self._blocks
+        return {'blocks': len(blocks.cache), 'hits': blocks.hits, 'misses': blocks.misses,
+                'block_rows': blocks.chunk * blocks.inner}
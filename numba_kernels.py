@@ -0,0 +1,223 @@
+import numpy as np
+
+import engine_metrics
+from houseModel import ModelParams
+
+# Numba is optional. Without it the kernels below stay plain Python functions
+# (still correct, just slow) and vector_engine keeps using its NumPy backend.
+try:
+    import numba
+except ImportError:
+    numba = None
+
+AVAILABLE = numba is not None
+
+MODE_CODES = {'cash': 0, 'full': 1, 'hybrid': 2}
+
+
+def _jit(func):
+    if numba is None:
+        return func
+    # cache=True stores compiled machine code under __pycache__ (or NUMBA_CACHE_DIR),
+    # so the compile cost is paid once per machine rather than once per process.
+    return numba.njit(cache=True)(func)
+
+
+# --- Scalar kernels: line-for-line ports of the houseModel helpers ---
+
+@_jit
+def mortgage_payment(principal, rate, years):
+    if rate == 0:
+        return principal / (years * 12)
+    monthly_rate = rate / 12
+    n_payments = years * 12
+    return principal * (monthly_rate * (1 + monthly_rate)**n_payments) / ((1 + monthly_rate)**n_payments - 1)
+
+
+@_jit
+def _recover_after_crash(pre_crash_value, rate, years_after_crash, bear_drop, bear_recovery_years):
+    if pre_crash_value <= 0:
+        return 0.0
+    post_crash_value = pre_crash_value * (1 - bear_drop)
+    if years_after_crash <= 0:
+        return post_crash_value
+    if bear_drop <= 0:
+        return pre_crash_value * ((1 + rate) ** years_after_crash)
+    if bear_recovery_years <= 0:
+        return post_crash_value * ((1 + rate) ** years_after_crash)
+
+    crashed_final = post_crash_value * ((1 + rate) ** years_after_crash)
+    normal_final = pre_crash_value * ((1 + rate) ** years_after_crash)
+    recovery_factor = 0.70
+    if years_after_crash <= bear_recovery_years:
+        recovery_fraction = years_after_crash / bear_recovery_years
+        return crashed_final + (normal_final - crashed_final) * recovery_fraction * recovery_factor
+    return crashed_final + (normal_final - crashed_final) * recovery_factor
+
+
+@_jit
+def future_value_with_bear_market(principal, rate, years, bear_enabled, bear_year, bear_drop, bear_recovery_years):
+    if principal <= 0:
+        return 0.0
+    if not bear_enabled or bear_year < 0 or bear_year >= years or bear_drop <= 0:
+        return principal * ((1 + rate) ** years)
+    value_before_crash = principal * ((1 + rate) ** bear_year)
+    return _recover_after_crash(value_before_crash, rate, years - bear_year, bear_drop, bear_recovery_years)
+
+
+@_jit
+def future_value_annuity(monthly_payment, annual_rate, years):
+    if monthly_payment == 0 or annual_rate == 0:
+        return monthly_payment * years * 12
+    monthly_rate = (1 + annual_rate) ** (1/12) - 1
+    n_months = years * 12
+    return monthly_payment * (((1 + monthly_rate)**n_months - 1) / monthly_rate)
+
+
+@_jit
+def future_value_annuity_with_bear_market(monthly_payment, annual_rate, years, bear_enabled, bear_year, bear_drop, bear_recovery_years):
+    if not bear_enabled or bear_year >= years:
+        return future_value_annuity(monthly_payment, annual_rate, years)
+    pre_bear_contributions = future_value_annuity(monthly_payment, annual_rate, bear_year)
+    remaining_years = years - bear_year
+    pre_bear_final = _recover_after_crash(pre_bear_contributions, annual_rate, remaining_years, bear_drop, bear_recovery_years)
+    return pre_bear_final + future_value_annuity(monthly_payment, annual_rate, remaining_years)
+
+
+@_jit
+def calculate_remaining_balance(principal, rate, term_years, years_passed):
+    if years_passed >= term_years:
+        return 0.0
+    if rate == 0:
+        paid_fraction = min(1.0, years_passed / term_years)
+        return principal * (1 - paid_fraction)
+    monthly_rate = rate / 12
+    n_total = term_years * 12
+    n_passed = years_passed * 12
+    return principal * ((1 + monthly_rate)**n_total - (1 + monthly_rate)**n_passed) / ((1 + monthly_rate)**n_total - 1)
+
+
+@_jit
+def calculate_interest_paid(principal, rate, term_years, years_passed):
+    if rate == 0:
+        return 0.0
+    monthly_payment = mortgage_payment(principal, rate, term_years)
+    n_payments = min(years_passed * 12, term_years * 12)
+    total_paid = monthly_payment * n_payments
+    principal_paid = principal - calculate_remaining_balance(principal, rate, term_years, years_passed)
+    return total_paid - principal_paid
+
+
+@_jit
+def gross_sale_needed(net_cash_needed, tax_rate, cost_basis_ratio):
+    if net_cash_needed <= 0:
+        return 0.0, 0.0
+    taxable_portion = 1 - cost_basis_ratio
+    gross_sale = net_cash_needed / (1 - (taxable_portion * tax_rate))
+    gains = gross_sale * taxable_portion
+    return gross_sale, gains * tax_rate
+
+
+@_jit
+def simulate_cell(mode, price, mortgage_rate, term, investment_return, housing_return, duration,
+                  down_payment, initial_portfolio, capital_gains_tax, income_tax_rate, cost_basis_ratio,
+                  loan_to_value_hybrid, monthly_cash_flow, property_tax_rate, home_insurance_rate,
+                  closing_cost_rate, bear_enabled, bear_year, bear_drop, bear_recovery):
+    """
+    One scenario evaluation; mode is a MODE_CODES value.
+
+    Returns (net_worth, out_of_pocket_cost, remaining_portfolio). The caller
+    raises for a negative remaining portfolio, since exceptions with messages
+    do not cross the compiled boundary cleanly.
+    """
+    closing_costs = price * closing_cost_rate
+    monthly_ownership_costs = (price * property_tax_rate + price * home_insurance_rate) / 12
+    home_value = price * ((1 + housing_return) ** duration)
+
+    if mode == 0:
+        gross_sale, tax_cost = gross_sale_needed(price + closing_costs, capital_gains_tax, cost_basis_ratio)
+        remaining = initial_portfolio - gross_sale
+        invested_balance = future_value_with_bear_market(max(0.0, remaining), investment_return, duration,
+                                                         bear_enabled, bear_year, bear_drop, bear_recovery)
+        cash_flow_to_invest = max(0.0, monthly_cash_flow - monthly_ownership_costs)
+        invested_cash_flow = future_value_annuity_with_bear_market(cash_flow_to_invest, investment_return, duration,
+                                                                   bear_enabled, bear_year, bear_drop, bear_recovery)
+        net_worth = invested_balance + invested_cash_flow + home_value
+        return net_worth, tax_cost + closing_costs, remaining
+
+    if mode == 1:
+        principal = price - down_payment
+        stock_sale, tax_cost = gross_sale_needed(down_payment + closing_costs, capital_gains_tax, cost_basis_ratio)
+    else:
+        principal = price * loan_to_value_hybrid
+        stock_sale, tax_cost = gross_sale_needed(price - principal + closing_costs, capital_gains_tax, cost_basis_ratio)
+
+    monthly_pmt = mortgage_payment(principal, mortgage_rate, term)
+    interest_paid = calculate_interest_paid(principal, mortgage_rate, term, duration)
+    remaining_balance = calculate_remaining_balance(principal, mortgage_rate, term, duration)
+    net_interest = interest_paid - interest_paid * income_tax_rate
+
+    remaining = initial_portfolio - stock_sale
+    invested_balance = future_value_with_bear_market(max(0.0, remaining), investment_return, duration,
+                                                     bear_enabled, bear_year, bear_drop, bear_recovery)
+    excess_cash_flow = max(0.0, monthly_cash_flow - (monthly_pmt + monthly_ownership_costs))
+    invested_excess = future_value_annuity_with_bear_market(excess_cash_flow, investment_return, duration,
+                                                            bear_enabled, bear_year, bear_drop, bear_recovery)
+    net_worth = invested_balance + invested_excess + (home_value - remaining_balance)
+    return net_worth, net_interest + tax_cost + closing_costs, remaining
+
+
+@_jit
+def _simulate_batch(mode, columns, net_worth, cost, remaining):
+    for i in range(net_worth.shape[0]):
+        c = columns[i]
+        net_worth[i], cost[i], remaining[i] = simulate_cell(
+            mode, c[0], c[1], c[2], c[3], c[4], c[5], c[6], c[7], c[8], c[9], c[10],
+            c[11], c[12], c[13], c[14], c[15], c[16] != 0, c[17], c[18], c[19])
+
+
+# Order of the parameter rows in the column block passed to _simulate_batch
+_PARAMETER_ORDER = (
+    'down_payment', 'initial_portfolio', 'capital_gains_tax', 'income_tax_rate',
+    'investment_cost_basis_ratio', 'loan_to_value_hybrid', 'monthly_cash_flow',
+    'property_tax_rate', 'home_insurance_rate', 'closing_cost_rate',
+    'bear_market_enabled', 'bear_market_year', 'bear_market_drop', 'bear_market_recovery_years',
+)
+
+_INSUFFICIENT_MESSAGES = {
+    'cash': "Initial portfolio is insufficient for a cash purchase at this price",
+    'full': "Initial portfolio is insufficient to cover down payment and closing costs",
+    'hybrid': "Initial portfolio is insufficient for the hybrid scenario cash requirement",
+}
+
+
+@engine_metrics.instrumented('numba')
+def simulate_scenario(price, mortgage_rate, term, investment_return, housing_return, duration, mode, params,
+                      insufficient='raise'):
+    """
+    Drop-in replacement for vector_engine.simulate_scenario running the compiled per-cell kernel.
+
+    As there, insufficient='nan' returns NaN for cells the portfolio can't fund instead of raising.
+    """
+    if mode not in MODE_CODES:
+        raise ValueError(f"Unknown mode: {mode}")
+    if isinstance(params, ModelParams):
+        params = params.as_dict()
+    inputs = [price, mortgage_rate, term, investment_return, housing_return, duration]
+    inputs += [params[name] for name in _PARAMETER_ORDER]
+    shape = np.broadcast_shapes(*(np.shape(v) for v in inputs))
+    columns = np.stack([np.broadcast_to(np.asarray(v, dtype=np.float64), shape).ravel() for v in inputs], axis=1)
+
+    n_cells = columns.shape[0]
+    net_worth = np.empty(n_cells)
+    cost = np.empty(n_cells)
+    remaining = np.empty(n_cells)
+    _simulate_batch(MODE_CODES[mode], columns, net_worth, cost, remaining)
+
+    short = remaining < -1e-9
+    if insufficient == 'nan':
+        net_worth[short] = np.nan
+        cost[short] = np.nan
+    elif np.any(short):
+        raise ValueError(_INSUFFICIENT_MESSAGES[mode])
+    return net_worth.reshape(shape), cost.reshape(shape)
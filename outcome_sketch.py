@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+# Quantiles are reported to within this relative error of the true value
+RELATIVE_ACCURACY = 0.01
+# Magnitudes up to MIN_VALUE share one zero bucket; above MAX_VALUE they are clamped
+MIN_VALUE = 1.0
+MAX_VALUE = 1e12
+SUMMARY_QUANTILES = (0.05, 0.50, 0.95)
+SHORTFALL_LEVEL = 0.05
+
+
+class OutcomeSketch:
+    """
+    Streaming, mergeable distribution summary of many paths per scenario.
+
+    Outcomes (e.g. Net Worth per sampled return path) are fed in chunks of
+    shape (paths, scenarios) and counted into a fixed set of log-spaced
+    buckets per scenario, as in DDSketch: bucket k holds magnitudes in
+    (gamma**(k-1), gamma**k], so any quantile read back is within
+    relative_accuracy of the exact one. Memory is scenarios x buckets
+    (about 2,800 buckets at 1%) however many paths are added, and two
+    sketches with the same settings merge by adding their counts, so each
+    worker can sketch its own paths and the parent combines them.
+
+    Alongside the buckets, exact counts, sums, minima and maxima are kept,
+    and with a baseline (e.g. the Cash scenario on the same path) the number
+    of paths on which each scenario beat it.
+    """
+
+    def __init__(self, n_scenarios, relative_accuracy=RELATIVE_ACCURACY, min_value=MIN_VALUE, max_value=MAX_VALUE,
+                 labels=None):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.n_scenarios = int(n_scenarios)
+        self.relative_accuracy = relative_accuracy
+        self.min_value = float(min_value)
+        self.max_value = float(max_value)
+        # Optional DataFrame (one row per scenario) labelling the summary
+        self.labels = labels
+
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self._max_key = int(np.ceil(np.log(self.max_value / self.min_value) / self._log_gamma))
+        # Bucket layout in increasing value: negative keys (largest magnitude first), zero, positive keys
+        keys = np.arange(1, self._max_key + 1)
+        magnitude = self.min_value * 2 * self.gamma ** keys / (self.gamma + 1)
+        self.bucket_values = np.concatenate([-magnitude[::-1], [0.0], magnitude])
+
+        self.counts = np.zeros((self.n_scenarios, len(self.bucket_values)), dtype=np.int64)
+        self.total = np.zeros(self.n_scenarios, dtype=np.int64)
+        self.sum = np.zeros(self.n_scenarios)
+        self.min = np.full(self.n_scenarios, np.inf)
+        self.max = np.full(self.n_scenarios, -np.inf)
+        self.beats = np.zeros(self.n_scenarios, dtype=np.int64)
+        self.compared = np.zeros(self.n_scenarios, dtype=np.int64)
+
+    def _bucket_index(self, values):
+        # Key 0 holds magnitudes up to min_value; fmax sends NaN there too (update skips them anyway)
+        key = np.log(np.fmax(np.abs(values), self.min_value) / self.min_value)
+        key *= 1 / self._log_gamma
+        np.ceil(key, out=key)
+        np.minimum(key, self._max_key, out=key)
+        return (np.copysign(key, values) + self._max_key).astype(np.intp)
+
+    def update(self, values, baseline=None):
+        """
+        Add a chunk of outcomes, shape (paths, scenarios); NaN (e.g. an
+        unaffordable path) is skipped. baseline, broadcastable to values,
+        holds the value each scenario is compared against on the same path,
+        e.g. the Cash column as shape (paths, 1).
+        """
+        values = np.asarray(values, dtype=float).reshape(-1, self.n_scenarios)
+        valid = ~np.isnan(values)
+        n_buckets = self.counts.shape[1]
+        flat = self._bucket_index(values) + np.arange(self.n_scenarios) * n_buckets
+        flat = flat.ravel() if valid.all() else flat[valid]
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+        self.total += valid.sum(axis=0)
+        self.sum += np.where(valid, values, 0.0).sum(axis=0)
+        self.min = np.fmin(self.min, np.nanmin(values, axis=0, initial=np.inf))
+        self.max = np.fmax(self.max, np.nanmax(values, axis=0, initial=-np.inf))
+        if baseline is not None:
+            baseline = np.broadcast_to(np.asarray(baseline, dtype=float), values.shape)
+            paired = valid & ~np.isnan(baseline)
+            self.beats += (paired & (values > baseline)).sum(axis=0)
+            self.compared += paired.sum(axis=0)
+        return self
+
+    def merge(self, other):
+        """Add another sketch's counts into this one (e.g. from a parallel worker)."""
+        if (other.n_scenarios, other.relative_accuracy, other.min_value, other.max_value) != \
+                (self.n_scenarios, self.relative_accuracy, self.min_value, self.max_value):
+            raise ValueError("Only sketches with the same scenarios and settings can be merged")
+        self.counts += other.counts
+        self.total += other.total
+        self.sum += other.sum
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        self.beats += other.beats
+        self.compared += other.compared
+        return self
+
+    def quantile(self, q):
+        """Approximate q-quantile of every scenario; NaN for scenarios with no outcomes."""
+        cumulative = np.cumsum(self.counts, axis=1)
+        rank = np.floor(q * (self.total - 1))
+        index = np.minimum(np.sum(cumulative <= rank[:, None], axis=1), self.counts.shape[1] - 1)
+        # The exact extremes are known, so estimates never fall outside them
+        result = np.clip(self.bucket_values[index], self.min, self.max)
+        return np.where(self.total > 0, result, np.nan)
+
+    def expected_shortfall(self, level=SHORTFALL_LEVEL):
+        """Mean outcome over the worst `level` fraction of paths (CVaR), per scenario."""
+        tail = np.maximum(level * self.total, 1)
+        cumulative = np.cumsum(self.counts, axis=1)
+        # Paths each bucket contributes to the tail; the last bucket reached contributes partially
+        taken = np.clip(np.minimum(self.counts, tail[:, None] - (cumulative - self.counts)), 0, None)
+        values = np.clip(self.bucket_values, self.min[:, None], self.max[:, None])
+        result = (taken * values).sum(axis=1) / tail
+        return np.where(self.total > 0, result, np.nan)
+
+    def probability_beating(self):
+        """Share of paths on which each scenario beat the baseline given to update."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.compared > 0, self.beats / self.compared, np.nan)
+
+    def summary(self, quantiles=SUMMARY_QUANTILES, level=SHORTFALL_LEVEL, baseline_name='Cash'):
+        """DataFrame with one row per scenario: paths, mean, quantiles, P(beat baseline) and expected shortfall."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            data = {'Paths': self.total, 'Mean': np.where(self.total > 0, self.sum / self.total, np.nan)}
+        for q in quantiles:
+            data[f'p{q * 100:g}'] = self.quantile(q)
+        data[f'P(beat {baseline_name})'] = self.probability_beating()
+        data[f'Expected Shortfall {level * 100:g}%'] = self.expected_shortfall(level)
+        stats = pd.DataFrame(data)
+        if self.labels is None:
+            return stats
+        return pd.concat([self.labels.reset_index(drop=True), stats], axis=1)
+
+
+def merge_sketches(sketches):
+    """Combine sketches of the same scenarios, e.g. one per worker process."""
+    sketches = list(sketches)
+    if not sketches:
+        raise ValueError("No sketches to merge")
+    merged = OutcomeSketch(sketches[0].n_scenarios, sketches[0].relative_accuracy, sketches[0].min_value,
+                           sketches[0].max_value, sketches[0].labels)
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
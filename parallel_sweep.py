@@ -0,0 +1,95 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import engine_metrics
+import vector_engine
+
+# Rows each worker task evaluates; blocks are whole prices, so a block may run larger
+BLOCK_ROWS = 250_000
+
+
+class _SharedBlock:
+    """
+    A (2, rows) float64 array interface over a SharedMemory block.
+
+    SharedMemory.close() unmaps the buffer immediately, which would pull it
+    out from under the result DataFrame. Arrays made from this object with
+    np.asarray hold it as their base, without exporting the buffer, so the
+    block stays open while any of them (or a view of them) is alive and is
+    closed when the last one is freed.
+    """
+
+    def __init__(self, shm, n_rows):
+        self.shm = shm
+        address = np.frombuffer(shm.buf, dtype=np.float64, count=2 * n_rows).ctypes.data
+        self.__array_interface__ = {'version': 3, 'shape': (2, n_rows), 'typestr': '<f8',
+                                    'data': (address, False)}
+
+    def __del__(self):
+        self.shm.close()
+
+
+def _fill_block(name, n_rows, start, axes, params, sweeps, lots, lot_method, tax, backend):
+    """Worker: evaluate one block of prices straight into the shared result buffer."""
+    vector_engine.set_backend(backend)
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        values = np.ndarray((2, n_rows), buffer=shm.buf)
+        block_rows = vector_engine.grid_size(**axes, sweeps=sweeps)
+        out = (values[0, start:start + block_rows], values[1, start:start + block_rows])
+        vector_engine.grid_values(**axes, params=params, sweeps=sweeps, lots=lots, lot_method=lot_method, tax=tax,
+                                  out=out)
+        del values, out
+    finally:
+        shm.close()
+    return block_rows
+
+
+def run_grid_parallel(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, params,
+                      sweeps=None, label_rates=False, lots=None, lot_method='fifo', tax=None, workers=None,
+                      block_rows=BLOCK_ROWS):
+    """
+    vector_engine.run_grid evaluated by a pool of worker processes.
+
+    Prices are the outermost grid axis, so each block of prices fills one
+    contiguous slice of the result rows. The parent allocates Net Worth and
+    Out-of-Pocket Cost in shared memory; workers write their slice in place
+    and return only a row count, and the parent wraps the buffer as the
+    DataFrame's value columns without copying. Nothing is pickled back, and
+    no per-worker frames are concatenated.
+
+    Arguments are as for run_grid, plus the number of worker processes
+    (default os.cpu_count()) and the target rows per task. Grids that fit in
+    one block are evaluated in-process.
+    """
+    axes = {'purchase_prices': list(purchase_prices), 'years': years, 'investment_returns': investment_returns,
+            'housing_returns': housing_returns, 'mortgage_rates': mortgage_rates, 'terms': terms}
+    n_rows = vector_engine.grid_size(**axes, sweeps=sweeps)
+    prices = axes['purchase_prices']
+    rows_per_price = n_rows // len(prices) if prices else 0
+    per_block = max(1, block_rows // rows_per_price) if rows_per_price else len(prices) or 1
+    if workers == 1 or len(prices) <= per_block:
+        return vector_engine.run_grid(params=params, sweeps=sweeps, label_rates=label_rates, lots=lots,
+                                      lot_method=lot_method, tax=tax, **axes)
+
+    shm = shared_memory.SharedMemory(create=True, size=2 * n_rows * np.dtype(np.float64).itemsize)
+    try:
+        # Workers keep their own (disabled) metrics; the parent records the sweep as a whole
+        with engine_metrics.timer('engine_parallel_seconds'), ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_fill_block, shm.name, n_rows, start * rows_per_price,
+                                   dict(axes, purchase_prices=prices[start:start + per_block]),
+                                   params, sweeps, lots, lot_method, tax, vector_engine.get_backend())
+                       for start in range(0, len(prices), per_block)]
+            for future in futures:
+                future.result()
+        engine_metrics.inc('engine_parallel_rows_total', n_rows)
+        values = np.asarray(_SharedBlock(shm, n_rows))
+    except BaseException:
+        shm.close()
+        raise
+    finally:
+        # The name is no longer needed once the workers are done; the mapping lives on in values
+        shm.unlink()
+    return vector_engine.grid_frame(**axes, values=values, sweeps=sweeps, label_rates=label_rates)
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+# Columns that define a comparison group; scenarios (and swept inputs) within a group compete
+GROUP_COLUMNS = ('Price', 'Years', 'Return Case', 'Housing Case')
+
+
+def pareto_mask(df, groups=GROUP_COLUMNS, maximize='Net Worth', minimize='Out-of-Pocket Cost'):
+    """
+    Boolean array marking the rows of df on their group's Pareto frontier.
+
+    A row is on the frontier when no other row of its group has at least
+    its `maximize` value at no more than its `minimize` cost, one of them
+    strictly better. One lexsort orders all groups at once by cost (then
+    value, highest first); sweeping that order, a row is non-dominated
+    exactly when its value beats every earlier row of its group, which is a
+    segmented running maximum. O(n log n) overall; exact duplicates keep
+    their first row.
+    """
+    n = len(df)
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    group_ids = df.groupby(list(groups), sort=False, observed=True, dropna=False).ngroup().to_numpy() \
+        if groups else np.zeros(n, dtype=np.intp)
+    value = df[maximize].to_numpy(dtype=float)
+    cost = df[minimize].to_numpy(dtype=float)
+    # Unaffordable (NaN) rows never make the frontier and never dominate
+    value = np.where(np.isnan(value) | np.isnan(cost), -np.inf, value)
+
+    # run_grid puts price, horizon and cases outermost, so its groups are equal consecutive blocks:
+    # sort each block as a row of a (groups, size) matrix, much faster than one global sort
+    n_groups = group_ids.max() + 1
+    size = n // n_groups
+    if size * n_groups == n and np.array_equal(group_ids, np.arange(n) // size):
+        value, cost = value.reshape(n_groups, size), cost.reshape(n_groups, size)
+        order = np.lexsort((-value, cost), axis=1)
+        sorted_value = np.take_along_axis(value, order, axis=1)
+        previous_best = np.full_like(sorted_value, -np.inf)
+        np.maximum.accumulate(sorted_value[:, :-1], axis=1, out=previous_best[:, 1:])
+        mask = np.zeros(value.shape, dtype=bool)
+        np.put_along_axis(mask, order, sorted_value > previous_best, axis=1)
+        return mask.ravel()
+
+    order = np.lexsort((-value, cost, group_ids))
+    sorted_groups = group_ids[order]
+    sorted_value = value[order]
+    best_so_far = pd.Series(sorted_value).groupby(sorted_groups).cummax().to_numpy()
+    previous_best = np.empty(n)
+    previous_best[0] = -np.inf
+    previous_best[1:] = best_so_far[:-1]
+    previous_best[np.flatnonzero(np.diff(sorted_groups)) + 1] = -np.inf
+
+    mask = np.zeros(n, dtype=bool)
+    mask[order] = sorted_value > previous_best
+    return mask
+
+
+def pareto_frontier(df, groups=GROUP_COLUMNS, maximize='Net Worth', minimize='Out-of-Pocket Cost'):
+    """The frontier rows of df, in their original order; see pareto_mask."""
+    return df[pareto_mask(df, groups, maximize, minimize)]
@@ -0,0 +1,158 @@
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# pyarrow is optional; CSV export works without it
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+FORMATS = {'.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow', '.csv': 'csv'}
+METADATA_KEY = b'house_model'
+FORMAT_VERSION = 1
+
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Unsupported export format '{ext}' (use .parquet, .arrow, .feather or .csv)")
+    return FORMATS[ext]
+
+
+def _require_pyarrow(fmt):
+    if pa is None:
+        raise ImportError(f"{fmt.title()} files need the optional pyarrow package (pip install pyarrow)")
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, 'as_dict'):
+        return value.as_dict()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def build_metadata(params=None, axes=None, **extra):
+    """Describe the inputs that produced a result set; stored alongside the data."""
+    metadata = {
+        'format_version': FORMAT_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'params': params.as_dict() if hasattr(params, 'as_dict') else params,
+        'axes': axes,
+    }
+    metadata.update(extra)
+    return metadata
+
+
+def metadata_path(path):
+    """Sidecar file holding the metadata for formats without a schema (CSV)."""
+    return path + '.meta.json'
+
+
+class ResultWriter:
+    """
+    Append result chunks to a Parquet, Arrow IPC or CSV file.
+
+    Chunks must share columns and dtypes. Only one chunk is held in memory at
+    a time, so sweeps larger than RAM can be streamed out as they are produced.
+    Use as a context manager, or call close() when done.
+    """
+
+    def __init__(self, path, metadata=None, fmt=None):
+        self.path = path
+        self.fmt = fmt or detect_format(path)
+        self.metadata = metadata or build_metadata()
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+        if self.fmt != 'csv':
+            _require_pyarrow(self.fmt)
+
+    def write(self, df):
+        if self.fmt == 'csv':
+            df.to_csv(self.path, mode='w' if self.rows == 0 else 'a', header=self.rows == 0, index=False)
+        else:
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            if self._writer is None:
+                self._schema = table.schema.with_metadata(
+                    {METADATA_KEY: json.dumps(self.metadata, default=_json_default).encode()})
+                table = table.replace_schema_metadata(self._schema.metadata)
+                if self.fmt == 'parquet':
+                    self._writer = pq.ParquetWriter(self.path, self._schema)
+                else:
+                    self._writer = pa.ipc.new_file(self.path, self._schema)
+            if self.fmt == 'parquet':
+                self._writer.write_table(table)
+            else:
+                self._writer.write_table(table.cast(self._schema))
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.fmt == 'csv':
+            if self.rows == 0:
+                open(self.path, 'w').close()
+            with open(metadata_path(self.path), 'w') as f:
+                json.dump(self.metadata, f, indent=2, default=_json_default)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_results(df, path, params=None, axes=None, chunk_rows=250_000, fmt=None):
+    """Write a result DataFrame in chunks together with the parameters that produced it."""
+    with ResultWriter(path, build_metadata(params, axes), fmt) as writer:
+        for start in range(0, len(df), chunk_rows):
+            writer.write(df.iloc[start:start + chunk_rows])
+    return path
+
+
+def export_chunks(chunks, path, params=None, axes=None, fmt=None):
+    """Stream an iterable of result DataFrames to one file; returns the row count."""
+    with ResultWriter(path, build_metadata(params, axes), fmt) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    return writer.rows
+
+
+def load_results(path, memory_map=True):
+    """
+    Load an exported result set; returns (df, metadata).
+
+    Arrow IPC files are memory-mapped and wrapped without copying: columns
+    stay backed by the mapped file (pandas ArrowDtype), so the OS pages data
+    in as it is touched instead of parsing the whole sweep into RAM. Parquet
+    has to be decoded, and CSV is parsed in full.
+    """
+    fmt = detect_format(path)
+    if fmt == 'csv':
+        df = pd.read_csv(path)
+        meta_file = metadata_path(path)
+        metadata = None
+        if os.path.exists(meta_file):
+            with open(meta_file) as f:
+                metadata = json.load(f)
+        return df, metadata
+
+    _require_pyarrow(fmt)
+    if fmt == 'arrow':
+        source = pa.memory_map(path, 'r') if memory_map else pa.OSFile(path, 'rb')
+        table = pa.ipc.open_file(source).read_all()
+        df = table.to_pandas(types_mapper=pd.ArrowDtype) if memory_map else table.to_pandas()
+    else:
+        table = pq.read_table(path, memory_map=memory_map)
+        df = table.to_pandas()
+
+    raw = (table.schema.metadata or {}).get(METADATA_KEY)
+    return df, json.loads(raw) if raw else None
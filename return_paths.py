@@ -0,0 +1,114 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Annual log-return distributions; housing tracks stocks loosely in normal years and more closely in crashes
+NORMAL_REGIME = {'stock_mean': 0.07, 'stock_vol': 0.15, 'housing_mean': 0.03, 'housing_vol': 0.05, 'correlation': 0.2}
+BEAR_REGIME = {'stock_mean': -0.20, 'stock_vol': 0.25, 'housing_mean': -0.05, 'housing_vol': 0.08, 'correlation': 0.6}
+# Paths per random stream; path i always comes from the same stream, whatever the chunking or worker count
+BLOCK_PATHS = 10_000
+
+
+class ReturnModel:
+    """
+    Correlated annual stock and housing returns, optionally regime-switching.
+
+    Within a regime, the two annual log returns are jointly normal with the
+    given means, volatilities and correlation (drawn through the Cholesky
+    factor of their covariance). With a bear regime, each year is normal or
+    bear following a two-state Markov chain: a normal year turns bear with
+    probability p_enter_bear and a bear year recovers with p_exit_bear, so
+    crashes cluster. Paths start in the chain's long-run mix of regimes.
+    """
+
+    def __init__(self, normal=NORMAL_REGIME, bear=None, p_enter_bear=0.1, p_exit_bear=0.5):
+        self.regimes = [normal] if bear is None else [normal, bear]
+        if bear is not None and not (0 <= p_enter_bear <= 1 and 0 < p_exit_bear <= 1):
+            raise ValueError("Regime switching probabilities must be within [0, 1], and p_exit_bear above 0")
+        self.p_enter_bear = p_enter_bear
+        self.p_exit_bear = p_exit_bear
+        self.means = np.array([[r['stock_mean'], r['housing_mean']] for r in self.regimes])
+        self.cholesky = np.array([np.linalg.cholesky(_covariance(r)) for r in self.regimes])
+
+    @property
+    def bear_share(self):
+        """Long-run fraction of bear years."""
+        if len(self.regimes) == 1:
+            return 0.0
+        return self.p_enter_bear / (self.p_enter_bear + self.p_exit_bear)
+
+    def sample_block(self, seed, block, n_paths, n_years):
+        """
+        Draw paths [block * BLOCK_PATHS, block * BLOCK_PATHS + n_paths) of the
+        sequence for seed. Returns (stock, housing, bear) arrays of shape
+        (n_paths, n_years): annual returns and a bear-regime flag.
+        """
+        if not 0 <= n_paths <= BLOCK_PATHS:
+            raise ValueError(f"A block holds at most {BLOCK_PATHS:,} paths")
+        # Separate child streams for regimes and shocks, so path i doesn't depend on n_paths
+        regime_rng, shock_rng = (np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block, k)))
+                                 for k in (0, 1))
+        bear = np.zeros((n_paths, n_years), dtype=bool)
+        if len(self.regimes) > 1:
+            u = regime_rng.random((n_paths, n_years))
+            state = u[:, 0] < self.bear_share
+            bear[:, 0] = state
+            for year in range(1, n_years):
+                state = np.where(state, u[:, year] >= self.p_exit_bear, u[:, year] < self.p_enter_bear)
+                bear[:, year] = state
+
+        shocks = shock_rng.standard_normal((n_paths, n_years, 2))
+        regime = bear.astype(np.intp)
+        log_returns = self.means[regime] + np.einsum('...ij,...j->...i', self.cholesky[regime], shocks)
+        returns = np.expm1(log_returns)
+        return returns[..., 0], returns[..., 1], bear
+
+
+def _covariance(regime):
+    s, h, rho = regime['stock_vol'], regime['housing_vol'], regime['correlation']
+    return np.array([[s * s, rho * s * h], [rho * s * h, h * h]])
+
+
+def _block_sizes(n_paths):
+    return [(block, min(BLOCK_PATHS, n_paths - block * BLOCK_PATHS))
+            for block in range(-(-n_paths // BLOCK_PATHS))]
+
+
+def iter_return_blocks(model, n_paths, n_years, seed):
+    """Yield (first path, stock, housing, bear) for successive blocks of up to BLOCK_PATHS paths."""
+    for block, size in _block_sizes(n_paths):
+        yield (block * BLOCK_PATHS,) + model.sample_block(seed, block, size, n_years)
+
+
+def sample_returns(model, n_paths, n_years, seed, workers=1):
+    """
+    Sample n_paths correlated (stock, housing) annual return paths.
+
+    Returns (stock, housing, bear), each (n_paths, n_years). Every block of
+    BLOCK_PATHS paths has its own SeedSequence-spawned stream, so the result
+    is bit-identical whether blocks are drawn in one process or spread over
+    `workers` processes, and the first n paths don't depend on n_paths.
+    """
+    blocks = _block_sizes(n_paths)
+    if workers <= 1 or len(blocks) <= 1:
+        parts = [model.sample_block(seed, block, size, n_years) for block, size in blocks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(model.sample_block, seed, block, size, n_years) for block, size in blocks]
+            parts = [future.result() for future in futures]
+    if not parts:
+        return tuple(np.empty((0, n_years), dtype=dtype) for dtype in (float, float, bool))
+    return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+
+def annualized(returns, years):
+    """
+    Constant annual return equivalent to each path's compounded growth over
+    each horizon: shape (paths, len(years)), ready to use as
+    investment_return / housing_return in vector_engine.simulate_scenario.
+    Exact for lump sums; monthly contributions are assumed to grow at the
+    same constant rate rather than following the path year by year.
+    """
+    growth = np.cumprod(1 + np.asarray(returns, dtype=float), axis=-1)
+    years = np.asarray(years)
+    return growth[:, years - 1] ** (1 / years) - 1
@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+
+def make_scenarios(count, seed=0):
+    """A pool of distinct single-scenario requests; repeats across the run exercise the cache."""
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(count):
+        mode = rng.choice(['cash', 'full', 'hybrid'])
+        request = {
+            'mode': mode,
+            'price': rng.randrange(400_000, 1_200_000, 5_000),
+            'investment_return': rng.choice([0.04, 0.05, 0.06, 0.07, 0.08]),
+            'housing_return': rng.choice([-0.02, 0.0, 0.02, 0.03]),
+            'duration': rng.choice([3, 5, 7, 10, 15]),
+        }
+        if mode != 'cash':
+            request['mortgage_rate'] = rng.choice([0.05, 0.055, 0.06, 0.065, 0.07])
+            request['term'] = rng.choice([15, 30])
+        pool.append(request)
+    return pool
+
+
+async def _post(reader, writer, path, payload):
+    body = json.dumps(payload).encode()
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = (await reader.readline()).decode().split(' ', 2)[1]
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode().partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def _worker(host, port, pool, n_requests, rng, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(n_requests):
+            payload = rng.choice(pool)
+            start = time.perf_counter()
+            status = await _post(reader, writer, '/scenario', payload)
+            latencies.append(time.perf_counter() - start)
+            if status != '200':
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, requests, concurrency, unique, seed=0):
+    pool = make_scenarios(unique, seed)
+    latencies, errors = [], []
+    per_worker = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(_worker(host, port, pool, n, random.Random(seed + i), latencies, errors)
+                           for i, n in enumerate(per_worker)))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'seconds': elapsed,
+        'throughput_rps': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'max_ms': float(latencies_ms.max()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for house_service.py")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--unique', type=int, default=1000, help="Distinct scenarios in the request pool")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load(args.host, args.port, args.requests, args.concurrency, args.unique, args.seed))
+    print(f"Requests:   {report['requests']:,} ({report['errors']} errors) in {report['seconds']:.2f}s")
+    print(f"Throughput: {report['throughput_rps']:,.0f} req/s")
+    print(f"Latency:    p50 {report['p50_ms']:.2f} ms, p99 {report['p99_ms']:.2f} ms, max {report['max_ms']:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
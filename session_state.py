@@ -0,0 +1,72 @@
+import json
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+import result_export
+
+# Where the GUI keeps its last session between runs
+SNAPSHOT_PATH = os.path.join(os.path.expanduser('~'), '.house_calculator', 'last_session.npz')
+FORMAT_VERSION = 1
+
+
+def save_snapshot(path, inputs, df, params=None, axes=None):
+    """
+    Save the GUI inputs and the result set they produced to one binary .npz file.
+
+    Value columns are stored as raw arrays and label columns as small integer
+    codes plus their categories, uncompressed, so loading is a few memory
+    copies rather than a parse. The file is written next to its destination
+    and renamed into place, so an interrupted save never leaves a torn
+    snapshot behind.
+    """
+    arrays = {}
+    categories = {}
+    for i, (name, series) in enumerate(df.items()):
+        if not pd.api.types.is_numeric_dtype(series.dtype) and not isinstance(series.dtype, pd.CategoricalDtype):
+            # Labels of results opened from CSV or Arrow files
+            series = series.astype(str).astype('category')
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            arrays[f'column_{i}'] = codes.astype(np.int8 if len(series.cat.categories) < 128 else np.int32)
+            categories[name] = [str(c) for c in series.cat.categories]
+        else:
+            values = series.to_numpy()
+            if values.dtype == object:
+                # Arrow-backed numbers with missing values
+                values = series.to_numpy(dtype=float, na_value=np.nan)
+            arrays[f'column_{i}'] = values
+    metadata = result_export.build_metadata(params, axes, snapshot_version=FORMAT_VERSION, inputs=inputs,
+                                            columns=list(df.columns), categories=categories)
+    arrays['metadata'] = np.array(json.dumps(metadata, default=result_export._json_default))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    partial = path + '.partial'
+    with open(partial, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(partial, path)
+    return path
+
+
+def load_snapshot(path):
+    """
+    Load a snapshot written by save_snapshot; returns (inputs, df, metadata).
+    Raises OSError if there is none and ValueError if it is unreadable or
+    from another format version.
+    """
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data['metadata']))
+            if metadata.get('snapshot_version') != FORMAT_VERSION:
+                raise ValueError(f"Unsupported snapshot version {metadata.get('snapshot_version')}")
+            columns = {}
+            for i, name in enumerate(metadata['columns']):
+                values = data[f'column_{i}']
+                if name in metadata['categories']:
+                    values = pd.Categorical.from_codes(values, categories=metadata['categories'][name])
+                columns[name] = values
+    except (KeyError, json.JSONDecodeError, EOFError, zipfile.BadZipFile) as exc:
+        raise ValueError(f"Unreadable session snapshot: {exc}") from exc
+    return metadata['inputs'], pd.DataFrame(columns, copy=False), metadata
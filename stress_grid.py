@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+import vector_engine
+
+# Swept bear-market parameters, with the column labels run_grid gives them
+BEAR_AXES = ('bear_market_year', 'bear_market_drop', 'bear_market_recovery_years')
+BEAR_COLUMNS = tuple(vector_engine.PARAMETER_LABELS[name] for name in BEAR_AXES)
+
+
+def run_bear_stress(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, params,
+                    crash_years, drops, recovery_years):
+    """
+    Evaluate every scenario under every combination of crash year, drop and recovery length.
+
+    The three bear-market inputs become swept axes of one run_grid call (with
+    the bear market enabled), so future_value_with_bear_market and
+    future_value_annuity_with_bear_market see all crash cells at once.
+    Scenarios are labelled per rate ('Full 30y @0.057') so each cell holds
+    every strategy under a distinct name, as winners() expects.
+    """
+    params = params.as_dict() if hasattr(params, 'as_dict') else dict(params)
+    params['bear_market_enabled'] = True
+    sweeps = dict(zip(BEAR_AXES, (list(crash_years), list(drops), list(recovery_years))))
+    return vector_engine.run_grid(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms,
+                                  params, sweeps, label_rates=True)
+
+
+def winners(df, value='Net Worth', maximize=True):
+    """
+    Best scenario of every cell of a run_grid result.
+
+    A cell is one combination of every column other than Scenario and the
+    values; run_grid lays a cell's scenarios out consecutively, so the
+    values reshape to (cells, scenarios) and one argmax picks all winners.
+    Returns the cell columns plus 'Best Scenario', its value and 'Margin'
+    over the runner-up.
+    """
+    labels = df['Scenario'].cat.categories
+    n = len(labels)
+    if len(df) % n or not np.array_equal(df['Scenario'].cat.codes.to_numpy()[:n], np.arange(n)):
+        raise ValueError("winners needs run_grid rows with one label per scenario (use label_rates=True)")
+    values = df[value].to_numpy(dtype=float).reshape(-1, n)
+    score = np.nan_to_num(values if maximize else -values, nan=-np.inf)
+    best = np.argmax(score, axis=1)
+    top_two = -np.sort(-score, axis=1)[:, :2] if n > 1 else np.column_stack([score[:, 0], score[:, 0]])
+
+    cells = df.iloc[::n].drop(columns=['Scenario', 'Net Worth', 'Out-of-Pocket Cost']).reset_index(drop=True)
+    cells['Best Scenario'] = pd.Categorical.from_codes(best, categories=labels)
+    cells[f'Best {value}'] = values[np.arange(len(values)), best]
+    cells['Margin'] = np.abs(top_two[:, 0] - top_two[:, 1])
+    return cells
+
+
+def winner_grid(cells, x, y):
+    """
+    (x_values, y_values, codes, labels) for a heatmap of winners over two
+    columns; cells must already be restricted to one value of every other
+    dimension. codes index labels, NaN where a cell is missing.
+    """
+    codes = pd.DataFrame({x: cells[x], y: cells[y], 'code': cells['Best Scenario'].cat.codes})
+    x_values, y_values, grid = vector_engine.pivot_grid(codes, 'code', x, y)
+    return x_values, y_values, grid, list(cells['Best Scenario'].cat.categories)
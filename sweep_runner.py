@@ -0,0 +1,291 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import houseModel
+import result_export
+import vector_engine
+
+MANIFEST_NAME = 'manifest.json'
+FORMAT_VERSION = 1
+# Target rows per shard; each shard is two float64 columns (16 bytes per row) on disk
+SHARD_ROWS = 2_000_000
+
+
+def load_spec(spec):
+    """
+    Complete a sweep spec (a dict, or the path of a JSON file holding one).
+
+    Keys are the run_grid axes (purchase_prices, years, investment_returns,
+    housing_returns, mortgage_rates, terms), 'params' overrides for
+    houseModel's inputs and 'sweeps'. Missing axes default to houseModel's
+    module-level values.
+    """
+    if not isinstance(spec, dict):
+        with open(spec) as f:
+            spec = json.load(f)
+    params = houseModel.ModelParams.from_globals().replace(**spec.get('params', {}))
+    return {
+        'purchase_prices': [float(p) for p in spec.get('purchase_prices', houseModel.purchase_prices)],
+        'years': [int(y) for y in spec.get('years', houseModel.years)],
+        'investment_returns': spec.get('investment_returns', houseModel.investment_returns),
+        'housing_returns': spec.get('housing_returns', houseModel.housing_returns),
+        'mortgage_rates': [float(r) for r in spec.get('mortgage_rates', houseModel.mortgage_rates)],
+        'terms': [int(t) for t in spec.get('terms', houseModel.terms)],
+        'params': params.as_dict(),
+        'sweeps': {name: list(values) for name, values in spec.get('sweeps', {}).items()},
+    }
+
+
+def _case_pairs(returns):
+    return [(case, float(v)) for case, value in returns.items() for v in np.atleast_1d(value)]
+
+
+def _leading_axes(spec):
+    """The outer grid axes in run_grid row order, as lists of values."""
+    axes = [spec['purchase_prices'], spec['years'],
+            _case_pairs(spec['investment_returns']), _case_pairs(spec['housing_returns'])]
+    return axes + list(spec['sweeps'].values())
+
+
+def plan_sweep(spec, shard_rows=SHARD_ROWS):
+    """
+    Split a sweep into deterministic shards of contiguous result rows.
+
+    The outer axes are split at the shallowest level whose cells hold at
+    most shard_rows rows; those cells ("units") are then grouped into shards
+    of roughly shard_rows rows. The same spec and shard_rows always give the
+    same plan, so any machine can compute which rows a shard index covers.
+    """
+    spec = load_spec(spec)
+    sizes = [len(values) for values in _leading_axes(spec)]
+    n_scenarios = 1 + 2 * len(spec['mortgage_rates']) * len(spec['terms'])
+    depth = 0
+    while depth < len(sizes) and int(np.prod(sizes[depth:])) * n_scenarios > shard_rows:
+        depth += 1
+    unit_rows = int(np.prod(sizes[depth:])) * n_scenarios
+    n_units = int(np.prod(sizes[:depth]))
+    per_shard = max(1, shard_rows // max(unit_rows, 1))
+
+    shards = [[start, min(start + per_shard, n_units)] for start in range(0, n_units, per_shard)]
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'spec': spec,
+        'shard_rows': shard_rows,
+        'depth': depth,
+        'unit_rows': unit_rows,
+        'rows': n_units * unit_rows,
+        'shards': shards,
+    }
+    manifest['id'] = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:12]
+    return manifest
+
+
+def create_sweep(spec, directory, shard_rows=SHARD_ROWS):
+    """Write the manifest for a sweep into directory; an existing identical manifest is kept."""
+    manifest = plan_sweep(spec, shard_rows)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, MANIFEST_NAME)
+    if os.path.exists(path):
+        existing = open_sweep(directory)
+        if existing['id'] != manifest['id']:
+            raise ValueError(f"{directory} already holds a different sweep ({existing['id']})")
+        return existing
+    _write_atomic(path, lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+    return manifest
+
+
+def open_sweep(directory):
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+def _write_atomic(path, write):
+    # Write under a temporary name and rename, so an interrupted write never looks complete
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def shard_path(directory, manifest, index):
+    # The sweep id in the name keeps shards of different sweeps from being merged together
+    return os.path.join(directory, f"shard-{manifest['id']}-{index:05d}.npy")
+
+
+def completed_shards(directory, manifest):
+    return [i for i in range(len(manifest['shards'])) if os.path.exists(shard_path(directory, manifest, i))]
+
+
+def _shard_runs(manifest, index):
+    """
+    Yield run_grid axes covering one shard, in row order.
+
+    Consecutive units that differ only along the deepest split axis are
+    evaluated together as a slice of that axis.
+    """
+    spec = manifest['spec']
+    leading = _leading_axes(spec)
+    depth = manifest['depth']
+    sizes = [len(values) for values in leading[:depth]]
+    unit, end = manifest['shards'][index]
+    while unit < end:
+        if depth == 0:
+            selected, run = leading, end - unit
+        else:
+            position = np.unravel_index(unit, sizes)
+            run = min(end - unit, sizes[-1] - position[-1])
+            selected = [leading[k][position[k]:position[k] + 1] for k in range(depth - 1)]
+            selected.append(leading[depth - 1][position[-1]:position[-1] + run])
+            selected += leading[depth:]
+        unit += run
+
+        returns = []
+        for pairs in selected[2:4]:
+            cases = {}
+            for case, value in pairs:
+                cases.setdefault(case, []).append(value)
+            returns.append(cases)
+        yield {
+            'purchase_prices': selected[0], 'years': selected[1],
+            'investment_returns': returns[0], 'housing_returns': returns[1],
+            'mortgage_rates': spec['mortgage_rates'], 'terms': spec['terms'],
+            'sweeps': dict(zip(spec['sweeps'], selected[4:])),
+        }
+
+
+def run_shard(directory, manifest, index, backend=None):
+    """Evaluate one shard and persist its Net Worth / Out-of-Pocket Cost values."""
+    if backend:
+        vector_engine.set_backend(backend)
+    start, end = manifest['shards'][index]
+    values = np.empty((2, (end - start) * manifest['unit_rows']))
+    params = manifest['spec']['params']
+    offset = 0
+    for axes in _shard_runs(manifest, index):
+        rows = vector_engine.grid_size(**axes)
+        vector_engine.grid_values(**axes, params=params,
+                                  out=(values[0, offset:offset + rows], values[1, offset:offset + rows]))
+        offset += rows
+
+    _write_atomic(shard_path(directory, manifest, index), lambda f: np.save(f, values))
+    return index
+
+
+def run_sweep(directory, shards=None, workers=1, backend=None, progress=None):
+    """
+    Run the pending shards of a sweep, skipping those already on disk.
+
+    shards limits the run to a range of shard indices, e.g. to hand out
+    range(0, 50) and range(50, 100) to two machines; indices past the last
+    shard are ignored. With workers > 1 shards
+    run in that many local processes. progress, if given, is called with
+    (shard index, shards done, shards total) after each shard. Returns the
+    indices evaluated.
+    """
+    manifest = open_sweep(directory)
+    n_shards = len(manifest['shards'])
+    wanted = range(n_shards) if shards is None else shards
+    if any(i < 0 for i in wanted):
+        raise ValueError("Shard indices must be non-negative")
+    done = set(completed_shards(directory, manifest))
+    pending = [i for i in wanted if i < n_shards and i not in done]
+
+    finished = []
+
+    def record(index):
+        finished.append(index)
+        if progress:
+            progress(index, len(finished), len(pending))
+
+    if workers <= 1:
+        for index in pending:
+            record(run_shard(directory, manifest, index, backend))
+        return finished
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_shard, directory, manifest, index, backend) for index in pending]
+        for future in futures:
+            record(future.result())
+    return finished
+
+
+def merge_sweep(directory):
+    """
+    Combine every shard of a sweep into the run_grid DataFrame.
+
+    Shards may come from several processes or machines; they only need to be
+    copied into the sweep directory. Raises ValueError if any are missing.
+    """
+    manifest = open_sweep(directory)
+    missing = sorted(set(range(len(manifest['shards']))) - set(completed_shards(directory, manifest)))
+    if missing:
+        raise ValueError(f"{len(missing)} shard(s) not finished, e.g. {missing[:5]}")
+
+    values = np.empty((2, manifest['rows']))
+    offset = 0
+    for index in range(len(manifest['shards'])):
+        shard = np.load(shard_path(directory, manifest, index), mmap_mode='r')
+        values[:, offset:offset + shard.shape[1]] = shard
+        offset += shard.shape[1]
+    if offset != manifest['rows']:
+        raise ValueError(f"Shards hold {offset:,} rows, expected {manifest['rows']:,}")
+
+    spec = manifest['spec']
+    axes = {name: spec[name] for name in ('purchase_prices', 'years', 'investment_returns', 'housing_returns',
+                                          'mortgage_rates', 'terms')}
+    return vector_engine.grid_frame(**axes, values=values, sweeps=spec['sweeps'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpointed, resumable sharded grid sweeps")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    plan = commands.add_parser('plan', help="Create a sweep directory from a JSON spec")
+    plan.add_argument('spec')
+    plan.add_argument('directory')
+    plan.add_argument('--shard-rows', type=int, default=SHARD_ROWS)
+
+    run = commands.add_parser('run', help="Run pending shards, skipping finished ones")
+    run.add_argument('directory')
+    run.add_argument('--shards', help="Range of shard indices to run, e.g. 0:50 (end exclusive)")
+    run.add_argument('--workers', type=int, default=1)
+    run.add_argument('--backend', choices=vector_engine.BACKENDS, default=None)
+
+    status = commands.add_parser('status', help="Show how many shards are finished")
+    status.add_argument('directory')
+
+    merge = commands.add_parser('merge', help="Merge finished shards into one result file")
+    merge.add_argument('directory')
+    merge.add_argument('output', help="Parquet, Arrow or CSV file to write")
+    args = parser.parse_args()
+
+    if args.command == 'plan':
+        manifest = create_sweep(args.spec, args.directory, args.shard_rows)
+        print(f"Sweep {manifest['id']}: {manifest['rows']:,} rows in {len(manifest['shards'])} shards")
+    elif args.command == 'run':
+        shards = None
+        if args.shards:
+            start, _, stop = args.shards.partition(':')
+            shards = range(int(start), int(stop) if stop else int(start) + 1)
+        run_sweep(args.directory, shards, args.workers, args.backend,
+                  progress=lambda index, done, total: print(f"Shard {index} done ({done}/{total})"))
+    elif args.command == 'status':
+        manifest = open_sweep(args.directory)
+        done = completed_shards(args.directory, manifest)
+        print(f"Sweep {manifest['id']}: {len(done)}/{len(manifest['shards'])} shards finished, "
+              f"{manifest['rows']:,} rows")
+    else:
+        manifest = open_sweep(args.directory)
+        df = merge_sweep(args.directory)
+        spec = manifest['spec']
+        result_export.export_results(df, args.output, spec['params'],
+                                     {k: v for k, v in spec.items() if k != 'params'})
+        print(f"Wrote {len(df):,} rows to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+
+class TableIndex:
+    """
+    Sort and filter indexes over a result DataFrame.
+
+    Each column is argsorted once, on first use; reversing a cached
+    permutation gives the descending order, and a sorted column answers
+    range filters with two binary searches. Label (categorical) columns
+    also keep one boolean bitmap per category, built once, so filtering to
+    some scenarios or cases ORs a few bitmaps. view() combines filters with
+    AND and returns the row positions to show, in display order; nothing in
+    the DataFrame itself is copied or reordered.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._orders = {}
+        self._bitmaps = {}
+        self._labels = {}
+
+    def labels(self, column):
+        """The column as a Categorical series; loaded CSV or Arrow results carry plain strings instead."""
+        if column not in self._labels:
+            series = self.df[column]
+            self._labels[column] = series if isinstance(series.dtype, pd.CategoricalDtype) \
+                else series.astype(str).astype('category')
+        return self._labels[column]
+
+    def order(self, column, descending=False):
+        """Row positions sorted by column (stable; NaN last in either direction)."""
+        if column not in self._orders:
+            series = self.df[column]
+            if pd.api.types.is_numeric_dtype(series.dtype):
+                values = series.to_numpy(dtype=float, na_value=np.nan)
+                n_missing = int(np.isnan(values).sum())
+            else:
+                # run_grid categories are in grid order (Cash, Full ..., Hybrid ...), which reads better than alphabetical
+                values = self.labels(column).cat.codes.to_numpy()
+                n_missing = int((values < 0).sum())
+                values = np.where(values < 0, np.iinfo(values.dtype).max, values)
+            self._orders[column] = (np.argsort(values, kind='stable'), n_missing)
+        order, n_missing = self._orders[column]
+        if not descending:
+            return order
+        present = len(order) - n_missing
+        return np.concatenate([order[:present][::-1], order[present:]])
+
+    def category_mask(self, column, categories):
+        """Rows whose label column takes any of the given categories."""
+        series = self.labels(column)
+        mask = np.zeros(len(series), dtype=bool)
+        for category in categories:
+            key = (column, category)
+            if key not in self._bitmaps:
+                code = series.cat.categories.get_loc(category) if category in series.cat.categories else None
+                self._bitmaps[key] = (series.cat.codes.to_numpy() == code) if code is not None \
+                    else np.zeros(len(series), dtype=bool)
+            mask |= self._bitmaps[key]
+        return mask
+
+    def range_mask(self, column, low=None, high=None):
+        """Rows with low <= column <= high (either bound optional) found from the sorted order."""
+        self.order(column)
+        order, n_missing = self._orders[column]
+        present = order[:len(order) - n_missing]
+        sorted_values = self.df[column].to_numpy(dtype=float, na_value=np.nan)[present]
+        start = 0 if low is None else np.searchsorted(sorted_values, low, side='left')
+        end = len(present) if high is None else np.searchsorted(sorted_values, high, side='right')
+        mask = np.zeros(len(order), dtype=bool)
+        mask[present[start:end]] = True
+        return mask
+
+    def view(self, sort=None, descending=False, categories=None, ranges=None):
+        """
+        Row positions to display: rows matching every filter, in the order
+        of the sort column (grid order if None). categories maps label
+        columns to the values to keep; ranges maps columns to (low, high).
+        """
+        mask = None
+        for column, keep in (categories or {}).items():
+            column_mask = self.category_mask(column, keep)
+            mask = column_mask if mask is None else mask & column_mask
+        for column, (low, high) in (ranges or {}).items():
+            column_mask = self.range_mask(column, low, high)
+            mask = column_mask if mask is None else mask & column_mask
+        if sort is None:
+            return np.arange(len(self.df)) if mask is None else np.flatnonzero(mask)
+        order = self.order(sort, descending)
+        return order if mask is None else order[mask[order]]
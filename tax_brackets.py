@@ -0,0 +1,158 @@
+import numpy as np
+
+import vector_engine
+
+# 2025 federal schedules: ordinary and long-term capital gains brackets as
+# (lower thresholds, rates), NIIT threshold on MAGI, and the standard deduction
+FEDERAL_2025 = {
+    'single': {
+        'ordinary': ([0, 11_925, 48_475, 103_350, 197_300, 250_525, 626_350],
+                     [0.10, 0.12, 0.22, 0.24, 0.32, 0.35, 0.37]),
+        'capital_gains': ([0, 48_350, 533_400], [0.0, 0.15, 0.20]),
+        'niit_threshold': 200_000,
+        'standard_deduction': 15_750,
+    },
+    'married': {
+        'ordinary': ([0, 23_850, 96_950, 206_700, 394_600, 501_050, 751_600],
+                     [0.10, 0.12, 0.22, 0.24, 0.32, 0.35, 0.37]),
+        'capital_gains': ([0, 96_700, 600_050], [0.0, 0.15, 0.20]),
+        'niit_threshold': 250_000,
+        'standard_deduction': 31_500,
+    },
+}
+NIIT_RATE = 0.038
+
+
+def _schedule(thresholds, rates):
+    """Bracket arrays plus the tax accumulated below each threshold."""
+    thresholds = np.asarray(thresholds, dtype=float)
+    rates = np.asarray(rates, dtype=float)
+    cumulative = np.concatenate([[0.0], np.cumsum(np.diff(thresholds) * rates[:-1])])
+    return thresholds, rates, cumulative
+
+
+def bracket_tax(amount, schedule):
+    """Tax on amount under a (thresholds, rates, cumulative) schedule; amount may be any array."""
+    thresholds, rates, cumulative = schedule
+    amount = np.maximum(amount, 0.0)
+    k = np.searchsorted(thresholds, amount, side='right') - 1
+    return cumulative[k] + rates[k] * (amount - thresholds[k])
+
+
+def marginal_rate(amount, schedule):
+    """Rate applying to the next dollar above amount."""
+    thresholds, rates, _ = schedule
+    return rates[np.searchsorted(thresholds, np.maximum(amount, 0.0), side='right') - 1]
+
+
+class TaxModel:
+    """
+    Bracket-based federal tax for the stock sale and the mortgage interest deduction.
+
+    Replaces the flat capital_gains_tax and income_tax_rate of the scalar model:
+      - Long-term gains are stacked on top of taxable ordinary income and
+        taxed at 0/15/20% by bracket, plus the 3.8% NIIT on the part of the
+        gain that lifts MAGI (taken as ordinary_income) above the threshold.
+      - Mortgage interest only saves tax once it, together with
+        other_itemized, exceeds the standard deduction. The saving is
+        worked out year by year through the ordinary brackets.
+
+    Bracket lookups are np.searchsorted over the threshold arrays, so every
+    method takes whole grids; ordinary_income and other_itemized may be
+    arrays too.
+    """
+
+    def __init__(self, ordinary_income, filing_status='married', other_itemized=0.0, schedule=None):
+        schedules = schedule or FEDERAL_2025
+        if filing_status not in schedules:
+            raise ValueError(f"Unknown filing status: {filing_status} (expected one of {', '.join(schedules)})")
+        table = schedules[filing_status]
+        self.filing_status = filing_status
+        self.ordinary_income = np.asarray(ordinary_income, dtype=float)
+        self.other_itemized = np.asarray(other_itemized, dtype=float)
+        self.standard_deduction = float(table['standard_deduction'])
+        self.niit_threshold = float(table['niit_threshold'])
+        self.ordinary = _schedule(*table['ordinary'])
+        self.capital_gains = _schedule(*table['capital_gains'])
+
+    def taxable_income(self, itemized=None):
+        """Ordinary taxable income after the larger of the standard and itemized deductions."""
+        itemized = self.other_itemized if itemized is None else itemized
+        return np.maximum(0.0, self.ordinary_income - np.maximum(self.standard_deduction, itemized))
+
+    def capital_gains_tax(self, gain):
+        """LTCG tax plus NIIT on gain realized in the purchase year."""
+        gain = np.maximum(gain, 0.0)
+        base = self.taxable_income()
+        stacked = bracket_tax(base + gain, self.capital_gains) - bracket_tax(base, self.capital_gains)
+        niit = NIIT_RATE * np.minimum(gain, np.maximum(0.0, self.ordinary_income + gain - self.niit_threshold))
+        return stacked + niit
+
+    def gross_sale_needed(self, net_cash_needed, cost_basis_ratio):
+        """
+        Return (gross sale, tax paid, net cash) required to net net_cash_needed,
+        as vector_engine.gross_sale_needed but with bracketed gains tax.
+
+        Tax is piecewise linear in the gain, with kinks where the stacked gain
+        crosses an LTCG threshold or MAGI crosses the NIIT threshold. The net
+        proceeds are evaluated at those few kinks. Each cell then solves
+        linearly inside the segment that contains its target.
+        """
+        net_cash_needed = np.asarray(net_cash_needed, dtype=float)
+        taxable_portion = 1 - np.asarray(cost_basis_ratio, dtype=float)
+        base = self.taxable_income()
+        thresholds = self.capital_gains[0]
+
+        # Gains at which the marginal rate changes, per cell along a trailing axis
+        kinks = [np.zeros_like(base)] + [np.maximum(0.0, t - base) for t in thresholds[1:]]
+        if np.isfinite(self.niit_threshold):
+            kinks.append(np.maximum(0.0, self.niit_threshold - self.ordinary_income) + np.zeros_like(base))
+        kinks = np.sort(np.stack(np.broadcast_arrays(*kinks), axis=-1), axis=-1)
+        kink_tax = self.capital_gains_tax(kinks)
+        rate_above = marginal_rate(base[..., None] + kinks, self.capital_gains) + \
+            NIIT_RATE * (self.ordinary_income[..., None] + kinks >= self.niit_threshold)
+
+        shape = np.broadcast_shapes(net_cash_needed.shape, taxable_portion.shape, kinks.shape[:-1])
+        full = shape + kinks.shape[-1:]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sale_per_gain = np.broadcast_to(1 / taxable_portion, shape)
+            kink_net = sale_per_gain[..., None] * kinks - kink_tax
+            target = np.broadcast_to(net_cash_needed, shape)
+            # Segment containing the target: the last kink whose net proceeds don't exceed it
+            segment = np.maximum(np.sum(kink_net <= target[..., None], axis=-1) - 1, 0)[..., None]
+
+            def at_segment(values):
+                return np.take_along_axis(np.broadcast_to(values, full), segment, -1)[..., 0]
+
+            start_gain, start_net, start_tax, rate = (at_segment(v) for v in (kinks, kink_net, kink_tax, rate_above))
+            gain = start_gain + (target - start_net) / (sale_per_gain - rate)
+            gross_sale = gain * sale_per_gain
+            tax_paid = start_tax + rate * (gain - start_gain)
+
+        # Sales without gains (basis at or above value) are tax-free
+        no_gain = taxable_portion <= 0
+        gross_sale = np.where(no_gain, target, gross_sale)
+        tax_paid = np.where(no_gain, 0.0, tax_paid)
+        needed = target > 0
+        return (np.where(needed, gross_sale, 0.0),
+                np.where(needed, tax_paid, 0.0),
+                np.where(needed, gross_sale - tax_paid, 0.0))
+
+    def interest_deduction(self, principal, rate, term, duration, monthly_payment):
+        """
+        Tax saved by itemizing mortgage interest over the horizon.
+
+        Each year's interest is added to other_itemized; the saving is the
+        ordinary tax difference against the better of the standard deduction
+        and other_itemized alone.
+        """
+        baseline = bracket_tax(self.taxable_income(), self.ordinary)
+        saved = 0.0
+        previous_balance = principal
+        for year in range(1, int(np.max(duration)) + 1):
+            balance = vector_engine.calculate_remaining_balance(principal, rate, term, year)
+            interest = np.where(year <= term, monthly_payment * 12, 0.0) - (previous_balance - balance)
+            taxed = bracket_tax(self.taxable_income(self.other_itemized + interest), self.ordinary)
+            saved = saved + np.where(year <= duration, baseline - taxed, 0.0)
+            previous_balance = balance
+        return saved
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+LOT_METHODS = ('fifo', 'hifo', 'min_tax')
+# Lots held longer than this are taxed at the long-term (capital gains) rate
+LONG_TERM_YEARS = 1.0
+
+
+class TaxLots:
+    """
+    A table of tax lots and a solver for the sale needed to net a cash amount.
+
+    Each lot has a market value, a cost basis and a holding period. Lots held
+    over a year are taxed at the long-term rate, the rest at the short-term
+    (ordinary income) rate. Losses offset gains realized in the same sale; a
+    net loss shows up as a negative tax, just like houseModel.gross_sale_needed
+    with a cost basis ratio above 1.
+
+    Lots are sold whole in the order given by the selection method, with a
+    partial sale of the last lot needed:
+        'fifo'     oldest lots first
+        'hifo'     highest basis per dollar of value first
+        'min_tax'  lowest tax per dollar of sale first (losses, then
+                   long-term gains, then short-term gains)
+    or pass a sequence of lot indices for specific identification (lots not
+    listed follow, oldest first).
+
+    Per selection order and pair of tax rates, the cumulative sale proceeds,
+    tax and net cash at every lot boundary are prepared once (O(n log n));
+    after that each solve is a binary search over those prefix sums, O(log n)
+    per target, so whole scenario grids can be solved at once.
+    """
+
+    def __init__(self, value, basis, held_years=None):
+        value = np.asarray(value, dtype=float)
+        basis = np.broadcast_to(np.asarray(basis, dtype=float), value.shape)
+        held = np.full(value.shape, np.inf) if held_years is None else \
+            np.broadcast_to(np.asarray(held_years, dtype=float), value.shape)
+        if value.ndim != 1:
+            raise ValueError("Lot values must be one-dimensional")
+        if np.any(value < 0) or np.any(basis < 0):
+            raise ValueError("Lot values and cost bases must be non-negative")
+        # Empty lots can't contribute to a sale and would divide by zero below
+        keep = value > 0
+        if not keep.any():
+            raise ValueError("A lot table needs at least one lot with a positive value")
+        self.value = value[keep]
+        self.basis = basis[keep]
+        self.held_years = held[keep]
+        self.long_term = self.held_years > LONG_TERM_YEARS
+        self.gain_ratio = (self.value - self.basis) / self.value
+        self._prepared = {}
+
+    @classmethod
+    def from_frame(cls, df, as_of=None):
+        """
+        Build from a DataFrame with 'value' and 'basis' columns, plus either
+        'held_years' or an 'acquired' date (holding period measured to as_of,
+        default today). Without either, every lot counts as long-term.
+        """
+        held_years = None
+        if 'held_years' in df:
+            held_years = df['held_years'].to_numpy(dtype=float)
+        elif 'acquired' in df:
+            as_of = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp.today().normalize()
+            held_years = ((as_of - pd.to_datetime(df['acquired'])).dt.days / 365.25).to_numpy()
+        return cls(df['value'].to_numpy(dtype=float), df['basis'].to_numpy(dtype=float), held_years)
+
+    def __len__(self):
+        return len(self.value)
+
+    @property
+    def total_value(self):
+        return float(self.value.sum())
+
+    @property
+    def cost_basis_ratio(self):
+        """Blended basis ratio of the whole table, as used by houseModel.gross_sale_needed."""
+        return float(self.basis.sum() / self.value.sum())
+
+    def _order(self, method, tax_per_dollar):
+        fifo = np.argsort(-self.held_years, kind='stable')
+        if not isinstance(method, str):
+            chosen = np.asarray(method, dtype=np.intp)
+            if len(np.unique(chosen)) != len(chosen) or np.any((chosen < 0) | (chosen >= len(self))):
+                raise ValueError("Specific lot order must list distinct lot indices")
+            # Lots not named are sold afterwards, oldest first
+            return np.concatenate([chosen, fifo[~np.isin(fifo, chosen)]])
+        if method == 'fifo':
+            return fifo
+        if method == 'hifo':
+            return np.argsort(self.gain_ratio, kind='stable')
+        if method == 'min_tax':
+            return np.argsort(tax_per_dollar, kind='stable')
+        raise ValueError(f"Unknown lot method: {method} (expected one of {', '.join(LOT_METHODS)} or lot indices)")
+
+    def _prefix_sums(self, method, long_term_rate, short_term_rate):
+        key = (method if isinstance(method, str) else tuple(method), long_term_rate, short_term_rate)
+        if key not in self._prepared:
+            tax_per_dollar = self.gain_ratio * np.where(self.long_term, long_term_rate, short_term_rate)
+            order = self._order(method, tax_per_dollar)
+            rate = tax_per_dollar[order]
+            sold = np.concatenate([[0.0], np.cumsum(self.value[order])])
+            tax = np.concatenate([[0.0], np.cumsum(self.value[order] * rate)])
+            # Net cash is strictly increasing in the sale as long as tax rates are below 100%
+            self._prepared[key] = (sold, tax, sold - tax, rate)
+        return self._prepared[key]
+
+    def gross_sale_needed(self, net_cash_needed, long_term_rate, short_term_rate=None, method='fifo'):
+        """
+        Return (gross sale, tax paid, net cash) required to net net_cash_needed.
+
+        Arguments broadcast together like vector_engine.gross_sale_needed.
+        short_term_rate defaults to long_term_rate. Targets beyond what the
+        whole table can net come back with a gross sale above total_value,
+        which the grid evaluator reports as an insufficient portfolio.
+        """
+        if short_term_rate is None:
+            short_term_rate = long_term_rate
+        long_rate, short_rate = np.broadcast_arrays(np.asarray(long_term_rate, dtype=float),
+                                                    np.asarray(short_term_rate, dtype=float))
+        target = np.asarray(net_cash_needed, dtype=float)
+        shape = np.broadcast_shapes(target.shape, long_rate.shape)
+        target = np.broadcast_to(target, shape)
+        gross_sale = np.zeros(shape)
+        tax_paid = np.zeros(shape)
+
+        # Tax rates are usually one value or a short sweep; prepare each distinct pair once.
+        # The rates only span their own (small) shape, so find the pairs before broadcasting.
+        pairs, inverse = np.unique(np.stack([long_rate.ravel(), short_rate.ravel()], axis=1),
+                                   axis=0, return_inverse=True)
+        for p, (lt, st) in enumerate(pairs):
+            sold, tax, net, rate = self._prefix_sums(method, float(lt), float(st))
+            mask = np.broadcast_to((inverse == p).reshape(long_rate.shape), shape) if len(pairs) > 1 else ...
+            wanted = np.maximum(target[mask], 0.0)
+            # Lot j is the one partially sold: net[j] < wanted <= net[j + 1]
+            j = np.clip(np.searchsorted(net, wanted, side='left') - 1, 0, len(rate) - 1)
+            partial = (wanted - net[j]) / (1 - rate[j])
+            gross_sale[mask] = sold[j] + partial
+            tax_paid[mask] = tax[j] + partial * rate[j]
+
+        needed = target > 0
+        gross_sale = np.where(needed, gross_sale, 0.0)
+        tax_paid = np.where(needed, tax_paid, 0.0)
+        return gross_sale, tax_paid, gross_sale - tax_paid
+
+
+def read_lots(path, as_of=None):
+    """Load a lot table from CSV; see TaxLots.from_frame for the expected columns."""
+    return TaxLots.from_frame(pd.read_csv(path), as_of)
@@ -0,0 +1,49 @@
+import asyncio
+import json
+
+import houseModel
+import house_service
+
+VALID = {'mode': 'cash', 'price': 500_000, 'investment_return': 0.07, 'housing_return': 0.02, 'duration': 5}
+FULL = {'mode': 'full', 'price': 500_000, 'mortgage_rate': 0.05, 'term': 30,
+        'investment_return': 0.07, 'housing_return': 0.02, 'duration': 5}
+
+
+def test_bad_params_in_a_batch_get_their_own_error():
+    service = house_service.HouseModelService()
+    body = json.dumps([VALID, dict(FULL, params={'down_payment': 'abc'})]).encode()
+    status, results = asyncio.run(asyncio.wait_for(service.dispatch('POST', '/scenarios', body), 5))
+    assert status == '200 OK'
+    assert set(results[0]) == {'net_worth', 'out_of_pocket_cost'}
+    assert 'down_payment' in results[1]['error']
+
+
+def test_engine_error_in_a_mixed_batch_resolves_every_request():
+    # Params built directly skip replace()'s checks, so the string reaches the engine
+    bad = houseModel.ModelParams.from_globals()
+    object.__setattr__(bad, 'down_payment', 'abc')
+    valid = house_service._scenario_inputs(FULL)
+    invalid = (valid[0], valid[1], bad)
+
+    async def run():
+        service = house_service.HouseModelService()
+        futures = [service._submit(valid), service._submit(invalid)]
+        return await asyncio.wait_for(asyncio.gather(*futures, return_exceptions=True), 5)
+
+    good, error = asyncio.run(run())
+    assert set(good) == {'net_worth', 'out_of_pocket_cost'}
+    assert isinstance(error, TypeError)
+
+
+def test_flush_failure_reaches_every_waiting_request(monkeypatch):
+    def broken(items):
+        raise RuntimeError("engine crashed")
+    monkeypatch.setattr(house_service, 'evaluate_parsed', broken)
+
+    async def run():
+        service = house_service.HouseModelService()
+        item = house_service._scenario_inputs(VALID)
+        futures = [service._submit(item), service._submit(item)]
+        return await asyncio.wait_for(asyncio.gather(*futures, return_exceptions=True), 5)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
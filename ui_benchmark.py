@@ -0,0 +1,385 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+# Heartbeat period used to detect event-loop stalls
+HEARTBEAT_MS = 10
+# Metrics compared against a baseline, and how much worse they may get before the run fails
+COMPARED_METRICS = ('draw_p50_ms', 'draw_p95_ms', 'settle_p50_ms', 'settle_p95_ms', 'stall_p99_ms', 'stall_max_ms')
+TOLERANCE = 0.25
+SLACK_MS = 5.0
+SETTLE_TIMEOUT = 60.0
+
+
+class VirtualDisplay:
+    """
+    Xvfb server for the duration of a with-block, exported as DISPLAY.
+
+    Picks the first display number from 99 up without an X lock file, and
+    waits for the server's socket before returning.
+    """
+
+    def __init__(self, size='1600x1000x24'):
+        self.size = size
+        self.process = None
+        self.previous = None
+
+    def __enter__(self):
+        if shutil.which('Xvfb') is None:
+            raise RuntimeError("Xvfb not found; install it (e.g. apt install xvfb) or run with --no-xvfb")
+        number = next(n for n in range(99, 200) if not os.path.exists(f'/tmp/.X{n}-lock'))
+        self.process = subprocess.Popen(['Xvfb', f':{number}', '-screen', '0', self.size, '-nolisten', 'tcp'],
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 10
+        while not os.path.exists(f'/tmp/.X11-unix/X{number}'):
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                self.process.kill()
+                raise RuntimeError(f"Xvfb did not start on display :{number}")
+            time.sleep(0.05)
+        self.previous = os.environ.get('DISPLAY')
+        os.environ['DISPLAY'] = f':{number}'
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.previous is None:
+            os.environ.pop('DISPLAY', None)
+        else:
+            os.environ['DISPLAY'] = self.previous
+        self.process.terminate()
+        self.process.wait()
+
+
+def default_script():
+    """
+    Built-in input sequence: a mortgage-rate slider drag at 60 Hz, case
+    changes, a chart price edit, a price slider drag and a new horizon list,
+    with pauses long enough for the background recompute to finish.
+    """
+    events = []
+    t = 0
+    for k in range(21):
+        events.append({'t': t, 'action': 'slider', 'name': 'mortgage_rate', 'value': round(6.3 + 0.05 * k, 2)})
+        t += 16
+    for name, value in (('return_scenario', 'downside'), ('housing_scenario', 'downside'),
+                        ('return_scenario', 'expected'), ('housing_scenario', 'expected')):
+        t += 1500
+        events.append({'t': t, 'action': 'combo', 'name': name, 'value': value})
+    t += 1500
+    events.append({'t': t, 'action': 'entry', 'name': 'chart_price', 'value': '550000'})
+    t += 1500
+    for k in range(13):
+        events.append({'t': t, 'action': 'slider', 'name': 'price1', 'value': 500000 + 5000 * k})
+        t += 16
+    t += 1500
+    events.append({'t': t, 'action': 'entry', 'name': 'years', 'value': '3,5,10,15,20'})
+    return events
+
+
+def load_script(path):
+    with open(path) as f:
+        script = json.load(f)
+    events = script['events'] if isinstance(script, dict) else script
+    return sorted(events, key=lambda event: event['t'])
+
+
+def _widget_for(root, variable):
+    """The widget whose textvariable is variable (e.g. the Combobox or Entry behind a StringVar)."""
+    pending = [root]
+    while pending:
+        widget = pending.pop()
+        try:
+            if str(widget.cget('textvariable')) == str(variable):
+                return widget
+        except Exception:
+            pass
+        pending.extend(widget.winfo_children())
+    return None
+
+
+def _variable(app, name):
+    if name in app.numeric_inputs:
+        return app.numeric_inputs[name]['entry_var']
+    return getattr(app, f'{name}_var')
+
+
+def fire(app, event):
+    """Inject one scripted input through the same Tk callbacks a user would trigger."""
+    action = event['action']
+    if action == 'slider':
+        scale = app.numeric_inputs[event['name']]['scale']
+        # ttk's own drag binding moves the scale with "$w set", which also runs its command (on_slider_change)
+        scale.set(event['value'])
+    elif action == 'entry':
+        variable = _variable(app, event['name'])
+        variable.set(event['value'])
+        widget = _widget_for(app.root, variable)
+        if widget is not None:
+            widget.event_generate('<Return>')
+    elif action == 'combo':
+        variable = _variable(app, event['name'])
+        variable.set(event['value'])
+        widget = _widget_for(app.root, variable)
+        if widget is not None:
+            widget.event_generate('<<ComboboxSelected>>')
+    elif action == 'tab':
+        tabs = [app.notebook.tab(tab, 'text') for tab in app.notebook.tabs()]
+        app.notebook.select(tabs.index(event['value']))
+    elif action == 'calculate':
+        app.calculate(silent=True)
+    else:
+        raise ValueError(f"Unknown action '{action}'")
+
+
+def is_settled(app):
+    """No debounce, preview, chart update or background fill is waiting to run."""
+    return (app._pending_calc is None and app._pending_chart is None and app._pending_preview is None
+            and app._pending_fill is None and app._fill is None)
+
+
+class _Probe:
+    """Timestamps chart draws, settle points and heartbeat gaps of a running app."""
+
+    def __init__(self, app, heartbeat_ms=HEARTBEAT_MS):
+        self.app = app
+        self.heartbeat_ms = heartbeat_ms
+        self.draws = []
+        self.settles = []
+        self.stalls = []
+        self.events = []
+        self.lateness = []
+        self.settled = is_settled(app)
+        self._last_beat = None
+        # draw_idle ends in canvas.draw(), so an instance attribute catches both paths
+        draw = app.canvas.draw
+
+        def timed_draw(*args, **kwargs):
+            result = draw(*args, **kwargs)
+            self.draws.append(time.perf_counter())
+            return result
+
+        app.canvas.draw = timed_draw
+
+    def beat(self):
+        now = time.perf_counter()
+        if self._last_beat is not None:
+            self.stalls.append(max(0.0, (now - self._last_beat) * 1000 - self.heartbeat_ms))
+        self._last_beat = now
+        settled = is_settled(self.app)
+        if settled and not self.settled:
+            self.settles.append(now)
+        self.settled = settled
+        self.app.root.after(self.heartbeat_ms, self.beat)
+
+    def fire(self, event, planned):
+        start = time.perf_counter()
+        self.lateness.append((start - planned) * 1000)
+        fire(self.app, event)
+        self.events.append(start)
+        if is_settled(self.app):
+            self.settles.append(time.perf_counter())
+        self.settled = is_settled(self.app)
+
+
+def _percentiles(values, prefix, report):
+    values = np.asarray(values, dtype=float)
+    for q in (50, 95, 99):
+        report[f'{prefix}_p{q}_ms'] = float(np.percentile(values, q)) if values.size else None
+    report[f'{prefix}_max_ms'] = float(values.max()) if values.size else None
+
+
+def summarize(probe):
+    """Latency and stall percentiles from a probe's timestamps, in milliseconds."""
+    events = np.asarray(probe.events)
+    draws = np.sort(probe.draws)
+    settles = np.sort(probe.settles)
+    # Each event is matched with the first draw (and settle point) at or after it; coalesced events share one
+    next_draw = np.searchsorted(draws, events)
+    drawn = next_draw < len(draws)
+    next_settle = np.searchsorted(settles, events)
+    settled = next_settle < len(settles)
+    report = {'events': int(len(events)), 'draws': int(len(draws)), 'undrawn_events': int((~drawn).sum())}
+    _percentiles((draws[next_draw[drawn]] - events[drawn]) * 1000, 'draw', report)
+    _percentiles((settles[next_settle[settled]] - events[settled]) * 1000, 'settle', report)
+    _percentiles(probe.stalls, 'stall', report)
+    report['stall_total_ms'] = float(np.sum(probe.stalls))
+    report['injection_late_p95_ms'] = float(np.percentile(probe.lateness, 95)) if probe.lateness else None
+    return report
+
+
+def replay(app, events, repeat=1, heartbeat_ms=HEARTBEAT_MS, settle_timeout=SETTLE_TIMEOUT):
+    """
+    Replay events against a running app and return the summarize() report.
+
+    Each repetition starts once the app has settled, fires every event at its
+    't' offset (ms) from the Tk event loop, and ends when the app settles
+    again; the Tk main loop runs until the last repetition is done.
+    """
+    root = app.root
+    probe = _Probe(app, heartbeat_ms)
+    state = {'round': 0, 'deadline': None, 'timed_out': False}
+    last_t = max((event['t'] for event in events), default=0)
+
+    def start_round():
+        base = time.perf_counter()
+        for event in events:
+            root.after(int(event['t']), probe.fire, event, base + event['t'] / 1000)
+        state['deadline'] = time.monotonic() + last_t / 1000 + settle_timeout
+        root.after(int(last_t) + heartbeat_ms, wait_for_settle)
+
+    def wait_for_settle():
+        if not is_settled(app):
+            if time.monotonic() > state['deadline']:
+                state['timed_out'] = True
+                root.quit()
+                return
+            root.after(heartbeat_ms, wait_for_settle)
+            return
+        state['round'] += 1
+        if state['round'] < repeat:
+            root.after(200, start_round)
+        else:
+            root.quit()
+
+    def wait_for_start():
+        # The default calculation from __init__ may still be filling in the background
+        if is_settled(app):
+            start_round()
+        else:
+            root.after(heartbeat_ms, wait_for_start)
+
+    root.after(0, probe.beat)
+    root.after(0, wait_for_start)
+    root.mainloop()
+    report = summarize(probe)
+    report.update(repeat=repeat, timed_out=state['timed_out'])
+    return report
+
+
+def run_benchmark(events, repeat=1, heartbeat_ms=HEARTBEAT_MS, settle_timeout=SETTLE_TIMEOUT):
+    """Replay events against a fresh HouseCalculatorGUI on the current display; see replay()."""
+    import tkinter as tk
+
+    import house_calculator_gui
+    import session_state
+
+    # Start from the defaults, not the user's saved session, and never overwrite it
+    session_state.SNAPSHOT_PATH = os.path.join(tempfile.mkdtemp(), 'no_session.npz')
+    root = tk.Tk()
+    app = house_calculator_gui.HouseCalculatorGUI(root)
+    root.update()
+    try:
+        return replay(app, events, repeat, heartbeat_ms, settle_timeout)
+    finally:
+        root.destroy()
+
+
+def record(path):
+    """Run the GUI normally and save the user's inputs as a replayable script when the window closes."""
+    import tkinter as tk
+
+    import house_calculator_gui
+
+    root = tk.Tk()
+    app = house_calculator_gui.HouseCalculatorGUI(root)
+    events = []
+    start = time.perf_counter()
+
+    def log(action, name, value):
+        events.append({'t': round((time.perf_counter() - start) * 1000), 'action': action, 'name': name,
+                       'value': value})
+
+    on_slider_change = app.on_slider_change
+    on_entry_commit = app.on_entry_commit
+
+    def slider(name, value):
+        log('slider', name, value)
+        on_slider_change(name, value)
+
+    def entry(name):
+        log('entry', name, app.numeric_inputs[name]['entry_var'].get())
+        on_entry_commit(name)
+
+    app.on_slider_change = slider
+    app.on_entry_commit = entry
+    for name in ('years', 'terms', 'chart_price'):
+        variable = _variable(app, name)
+        variable.trace_add('write', lambda *_args, n=name, v=variable: log('entry', n, v.get()))
+    for name in ('return_scenario', 'housing_scenario'):
+        variable = _variable(app, name)
+        variable.trace_add('write', lambda *_args, n=name, v=variable: log('combo', n, v.get()))
+    app.notebook.bind('<<NotebookTabChanged>>',
+                      lambda _event: log('tab', None, app.notebook.tab(app.notebook.select(), 'text')), add='+')
+    root.mainloop()
+    with open(path, 'w') as f:
+        json.dump({'events': events}, f, indent=1)
+    return len(events)
+
+
+def compare(report, baseline, tolerance=TOLERANCE, slack_ms=SLACK_MS):
+    """Metrics that got worse than baseline * (1 + tolerance) + slack_ms: [(metric, baseline, current)]."""
+    regressions = []
+    for metric in COMPARED_METRICS:
+        old, new = baseline.get(metric), report.get(metric)
+        if old is not None and new is not None and new > old * (1 + tolerance) + slack_ms:
+            regressions.append((metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event-to-draw latency benchmark for the Tk GUI")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Replay an input script under Xvfb and report latency percentiles")
+    run.add_argument('script', nargs='?', help="JSON input script (default: built-in sequence)")
+    run.add_argument('--repeat', type=int, default=3)
+    run.add_argument('--baseline', help="Report JSON to compare against; exits 1 on a regression")
+    run.add_argument('--save', help="Write this run's report JSON, e.g. as a new baseline")
+    run.add_argument('--tolerance', type=float, default=TOLERANCE)
+    run.add_argument('--no-xvfb', action='store_true', help="Use the current DISPLAY instead of starting Xvfb")
+
+    rec = commands.add_parser('record', help="Run the GUI on the current display and record inputs to a script")
+    rec.add_argument('script')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        count = record(args.script)
+        print(f"Recorded {count} events to {args.script}")
+        return
+
+    events = load_script(args.script) if args.script else default_script()
+    if args.no_xvfb:
+        report = run_benchmark(events, args.repeat)
+    else:
+        with VirtualDisplay():
+            report = run_benchmark(events, args.repeat)
+
+    print(f"Events:  {report['events']} x{args.repeat} replay(s), {report['draws']} chart draws"
+          f"{' (timed out)' if report['timed_out'] else ''}")
+    for prefix, label in (('draw', 'Draw'), ('settle', 'Settle'), ('stall', 'Stall')):
+        values = [report[f'{prefix}_{q}_ms'] for q in ('p50', 'p95', 'p99', 'max')]
+        if values[0] is not None:
+            print(f"{label + ':':8} p50 {values[0]:.1f} ms, p95 {values[1]:.1f} ms, p99 {values[2]:.1f} ms, "
+                  f"max {values[3]:.1f} ms")
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for metric, old, new in regressions:
+            print(f"REGRESSION {metric}: {old:.1f} ms -> {new:.1f} ms")
+        if regressions or report['timed_out']:
+            raise SystemExit(1)
+        print("No regressions against the baseline")
+
+
+if __name__ == '__main__':
+    main()
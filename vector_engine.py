@@ -0,0 +1,618 @@
+import functools
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import engine_metrics
+from houseModel import ModelParams
+
+# Scalar model parameters understood by the grid evaluator; see houseModel.ModelParams
+PARAMETER_NAMES = ModelParams.__slots__
+
+# Column headings used when a parameter is swept over more than one value
+PARAMETER_LABELS = {
+    'down_payment': 'Down Payment',
+    'initial_portfolio': 'Initial Investment',
+    'capital_gains_tax': 'Capital Gains Tax',
+    'income_tax_rate': 'Income Tax Rate',
+    'investment_cost_basis_ratio': 'Cost Basis Ratio',
+    'loan_to_value_hybrid': 'Hybrid LTV',
+    'monthly_cash_flow': 'Monthly Cash Flow',
+    'property_tax_rate': 'Property Tax Rate',
+    'home_insurance_rate': 'Home Insurance Rate',
+    'closing_cost_rate': 'Closing Cost Rate',
+    'bear_market_enabled': 'Bear Market',
+    'bear_market_year': 'Bear Market Year',
+    'bear_market_drop': 'Bear Market Drop',
+    'bear_market_recovery_years': 'Recovery Years',
+}
+
+RESULT_COLUMNS = ['Price', 'Years', 'Return Case', 'Housing Case', 'Scenario', 'Net Worth', 'Out-of-Pocket Cost']
+# Value columns of run_trajectories; the first two match run_grid
+TRAJECTORY_COLUMNS = ('Net Worth', 'Out-of-Pocket Cost', 'Invested Balance', 'Home Equity', 'Loan Balance')
+
+# Kernel backends for simulate_scenario; 'numba' needs the optional numba package
+BACKENDS = ('numpy', 'numba')
+_backend = 'numpy'
+
+
+def set_backend(name):
+    """
+    Select the kernel backend used by run_grid.
+
+    Falls back to 'numpy' with a warning when 'numba' is requested but numba
+    is not installed. Returns the backend actually in use.
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend: {name} (expected one of {', '.join(BACKENDS)})")
+    if name == 'numba':
+        import numba_kernels
+        if not numba_kernels.AVAILABLE:
+            warnings.warn("numba is not installed; using the NumPy backend", RuntimeWarning, stacklevel=2)
+            name = 'numpy'
+    _backend = name
+    return _backend
+
+
+def get_backend():
+    return _backend
+
+
+def _scenario_kernel():
+    if _backend == 'numba':
+        import numba_kernels
+        return numba_kernels.simulate_scenario
+    return simulate_scenario
+
+
+# --- Array versions of the houseModel helpers ---
+# Each function mirrors its scalar counterpart in houseModel branch for branch,
+# with the branches expressed as np.where masks so whole grids evaluate at once.
+
+def mortgage_payment(principal, rate, years):
+    """Return monthly payment; handle zero-rate loans explicitly."""
+    monthly_rate = rate / 12
+    n_payments = years * 12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = (1 + monthly_rate) ** n_payments
+        payment = principal * (monthly_rate * growth) / (growth - 1)
+        zero_rate_payment = principal / n_payments
+    return np.where(rate == 0, zero_rate_payment, payment)
+
+
+def future_value(principal, rate, years):
+    return principal * ((1 + rate) ** years)
+
+
+def future_value_with_bear_market(principal, rate, years, bear_enabled, bear_year, bear_drop, bear_recovery_years):
+    """Calculate future value with optional bear market scenario."""
+    no_bear = (~np.asarray(bear_enabled, dtype=bool)) | (bear_year < 0) | (bear_year >= years) | (bear_drop <= 0)
+
+    value_before_crash = principal * ((1 + rate) ** bear_year)
+    remaining_years = years - bear_year
+    crashed = _recover_after_crash(value_before_crash, rate, remaining_years, bear_drop, bear_recovery_years)
+
+    result = np.where(no_bear, future_value(principal, rate, years), crashed)
+    return np.where(principal <= 0, 0.0, result)
+
+
+def _recover_after_crash(pre_crash_value, rate, years_after_crash, bear_drop, bear_recovery_years):
+    """
+    Grow a balance through a crash with partial recovery.
+
+    The scalar version returns early on the first matching condition, so the
+    masks below are applied in reverse order to give the earliest one priority.
+    """
+    recovery_factor = 0.70
+    post_crash_value = pre_crash_value * (1 - bear_drop)
+    growth = (1 + rate) ** years_after_crash
+
+    crashed_final = post_crash_value * growth
+    normal_final = pre_crash_value * growth
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        recovery_fraction = years_after_crash / bear_recovery_years
+        partial = crashed_final + (normal_final - crashed_final) * recovery_fraction * recovery_factor
+    recovered = crashed_final + (normal_final - crashed_final) * recovery_factor
+
+    result = np.where(years_after_crash <= bear_recovery_years, partial, recovered)
+    result = np.where(bear_recovery_years <= 0, crashed_final, result)
+    result = np.where(bear_drop <= 0, normal_final, result)
+    result = np.where(years_after_crash <= 0, post_crash_value, result)
+    return np.where(pre_crash_value <= 0, 0.0, result)
+
+
+def future_value_annuity(monthly_payment, annual_rate, years):
+    """Calculate future value of monthly payments invested at annual_rate"""
+    monthly_rate = (1 + annual_rate) ** (1/12) - 1
+    n_months = years * 12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = monthly_payment * (((1 + monthly_rate)**n_months - 1) / monthly_rate)
+    simple = monthly_payment * years * 12
+    return np.where((monthly_payment == 0) | (annual_rate == 0), simple, annuity)
+
+
+def future_value_annuity_with_bear_market(monthly_payment, annual_rate, years, bear_enabled, bear_year, bear_drop, bear_recovery_years):
+    """Calculate future value of monthly contributions with optional bear market."""
+    no_bear = (~np.asarray(bear_enabled, dtype=bool)) | (bear_year >= years)
+
+    pre_bear_contributions = future_value_annuity(monthly_payment, annual_rate, bear_year)
+    remaining_years = years - bear_year
+    pre_bear_final = _recover_after_crash(pre_bear_contributions, annual_rate, remaining_years, bear_drop, bear_recovery_years)
+    post_bear_contributions = future_value_annuity(monthly_payment, annual_rate, remaining_years)
+
+    return np.where(no_bear, future_value_annuity(monthly_payment, annual_rate, years),
+                    pre_bear_final + post_bear_contributions)
+
+
+def calculate_remaining_balance(principal, rate, term_years, years_passed):
+    """Calculate remaining mortgage balance after years_passed"""
+    monthly_rate = rate / 12
+    n_total = term_years * 12
+    n_passed = years_passed * 12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        remaining = principal * ((1 + monthly_rate)**n_total - (1 + monthly_rate)**n_passed) / ((1 + monthly_rate)**n_total - 1)
+        zero_rate_remaining = principal * (1 - np.minimum(1.0, years_passed / term_years))
+    remaining = np.where(rate == 0, zero_rate_remaining, remaining)
+    return np.where(years_passed >= term_years, 0.0, remaining)
+
+
+def calculate_interest_paid(principal, rate, term_years, years_passed):
+    """Calculate total interest paid over years_passed"""
+    monthly_payment = mortgage_payment(principal, rate, term_years)
+    n_payments = np.minimum(years_passed * 12, term_years * 12)
+
+    total_paid = monthly_payment * n_payments
+    principal_paid = principal - calculate_remaining_balance(principal, rate, term_years, years_passed)
+    return np.where(rate == 0, 0.0, total_paid - principal_paid)
+
+
+def gross_sale_needed(net_cash_needed, tax_rate, cost_basis_ratio):
+    """Return (gross sale, tax paid, net cash) required to net net_cash_needed from taxable investments."""
+    taxable_portion = 1 - cost_basis_ratio
+    gross_sale = net_cash_needed / (1 - (taxable_portion * tax_rate))
+    gains = gross_sale * taxable_portion
+    tax_paid = gains * tax_rate
+    net_cash = gross_sale - tax_paid
+
+    needed = net_cash_needed > 0
+    return (np.where(needed, gross_sale, 0.0),
+            np.where(needed, tax_paid, 0.0),
+            np.where(needed, net_cash, 0.0))
+
+
+def _draw_down_portfolio(initial_portfolio, sale, message, insufficient='raise'):
+    remaining = initial_portfolio - sale
+    short = remaining < -1e-9
+    if insufficient == 'nan':
+        return np.where(short, np.nan, np.maximum(0.0, remaining))
+    if np.any(short):
+        raise ValueError(message)
+    return np.maximum(0.0, remaining)
+
+
+def monthly_housing_cost(price, mortgage_rate, term, mode, params):
+    """Mortgage payment plus property tax and insurance per month, as simulate_scenario charges it."""
+    monthly_ownership_costs = price * (params['property_tax_rate'] + params['home_insurance_rate']) / 12
+    if mode == 'cash':
+        return monthly_ownership_costs
+    if mode == 'full':
+        principal = price - params['down_payment']
+    elif mode == 'hybrid':
+        principal = price * params['loan_to_value_hybrid']
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+    return mortgage_payment(principal, mortgage_rate, term) + monthly_ownership_costs
+
+
+@engine_metrics.instrumented('numpy')
+def simulate_scenario(price, mortgage_rate, term, investment_return, housing_return, duration, mode, params,
+                      lots=None, lot_method='fifo', tax=None, insufficient='raise', components=False):
+    """
+    Vectorized counterpart of houseModel.simulate_scenario.
+
+    params is a houseModel.ModelParams, or a mapping keyed by PARAMETER_NAMES
+    whose values may be arrays. All numeric arguments and parameter values
+    broadcast together; returns (net_worth, out_of_pocket_cost) arrays of the
+    broadcast shape.
+
+    With a tax_lots.TaxLots table, stock sales are solved lot by lot using
+    lot_method, and the table replaces initial_portfolio and
+    investment_cost_basis_ratio; short-term lots are taxed at income_tax_rate.
+
+    With a tax_brackets.TaxModel, the stock sale and the mortgage interest
+    deduction are taxed by bracket instead of at the flat capital_gains_tax
+    and income_tax_rate. It can't be combined with lots.
+
+    A portfolio too small for the purchase raises ValueError; with
+    insufficient='nan' those cells come back as NaN instead.
+
+    With components=True a dict of TRAJECTORY_COLUMNS arrays is returned:
+    net worth and out-of-pocket cost plus the invested balance, home equity
+    and loan balance they are made of.
+    """
+    if lots is not None and tax is not None:
+        raise ValueError("Tax lots and the bracket tax model can't be combined")
+    if isinstance(params, ModelParams):
+        params = params.as_dict()
+    bear = (params['bear_market_enabled'], params['bear_market_year'],
+            params['bear_market_drop'], params['bear_market_recovery_years'])
+    cap_gains_tax = params['capital_gains_tax']
+    cost_basis_ratio = params['investment_cost_basis_ratio']
+    initial_portfolio = params['initial_portfolio']
+
+    def stock_sale_for(net_cash_needed):
+        if lots is not None:
+            return lots.gross_sale_needed(net_cash_needed, cap_gains_tax, params['income_tax_rate'], lot_method)
+        if tax is not None:
+            return tax.gross_sale_needed(net_cash_needed, cost_basis_ratio)
+        return gross_sale_needed(net_cash_needed, cap_gains_tax, cost_basis_ratio)
+
+    if lots is not None:
+        initial_portfolio = lots.total_value
+
+    closing_costs = price * params['closing_cost_rate']
+    annual_property_tax = price * params['property_tax_rate']
+    annual_insurance = price * params['home_insurance_rate']
+    monthly_ownership_costs = (annual_property_tax + annual_insurance) / 12
+
+    home_value = price * ((1 + housing_return) ** duration)
+
+    if mode == 'cash':
+        net_cash_needed = price + closing_costs
+        gross_sale, tax_cost, _ = stock_sale_for(net_cash_needed)
+        remaining_investments = _draw_down_portfolio(initial_portfolio, gross_sale,
+                                                     "Initial portfolio is insufficient for a cash purchase at this price",
+                                                     insufficient)
+        invested_balance = future_value_with_bear_market(remaining_investments, investment_return, duration, *bear)
+
+        cash_flow_to_invest = np.maximum(0, params['monthly_cash_flow'] - monthly_ownership_costs)
+        invested_cash_flow = future_value_annuity_with_bear_market(cash_flow_to_invest, investment_return, duration, *bear)
+
+        net_worth = invested_balance + invested_cash_flow + home_value
+        out_of_pocket_cost = tax_cost + closing_costs
+        if components:
+            return dict(zip(TRAJECTORY_COLUMNS, (net_worth, out_of_pocket_cost, invested_balance + invested_cash_flow,
+                                                 home_value, 0.0)))
+        return net_worth, out_of_pocket_cost
+
+    if mode == 'full':
+        principal = price - params['down_payment']
+        net_cash_needed = params['down_payment'] + closing_costs
+        stock_sale, tax_cost, _ = stock_sale_for(net_cash_needed)
+        insufficient_message = "Initial portfolio is insufficient to cover down payment and closing costs"
+    elif mode == 'hybrid':
+        principal = price * params['loan_to_value_hybrid']
+        cash_from_stocks = price - principal + closing_costs
+        stock_sale, tax_cost, _ = stock_sale_for(cash_from_stocks)
+        insufficient_message = "Initial portfolio is insufficient for the hybrid scenario cash requirement"
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+
+    # Same arithmetic as calculate_interest_paid, reusing the payment and balance computed here
+    monthly_pmt = mortgage_payment(principal, mortgage_rate, term)
+    remaining_balance = calculate_remaining_balance(principal, mortgage_rate, term, duration)
+    total_paid = monthly_pmt * np.minimum(duration * 12, term * 12)
+    interest_paid = np.where(mortgage_rate == 0, 0.0, total_paid - (principal - remaining_balance))
+
+    if tax is None:
+        interest_deduction = interest_paid * params['income_tax_rate']
+    else:
+        interest_deduction = tax.interest_deduction(principal, mortgage_rate, term, duration, monthly_pmt)
+    net_interest = interest_paid - interest_deduction
+
+    remaining_portfolio = _draw_down_portfolio(initial_portfolio, stock_sale, insufficient_message, insufficient)
+    invested_balance = future_value_with_bear_market(remaining_portfolio, investment_return, duration, *bear)
+
+    total_monthly_housing = monthly_pmt + monthly_ownership_costs
+    excess_cash_flow = np.maximum(0, params['monthly_cash_flow'] - total_monthly_housing)
+    invested_excess = future_value_annuity_with_bear_market(excess_cash_flow, investment_return, duration, *bear)
+
+    home_equity = home_value - remaining_balance
+    net_worth = invested_balance + invested_excess + home_equity
+    out_of_pocket_cost = net_interest + tax_cost + closing_costs
+    if components:
+        return dict(zip(TRAJECTORY_COLUMNS, (net_worth, out_of_pocket_cost, invested_balance + invested_excess,
+                                             home_equity, remaining_balance)))
+    return net_worth, out_of_pocket_cost
+
+
+# --- Grid evaluation ---
+
+def _case_values(returns):
+    """Flatten {case: value or list of values} into parallel (cases, values) lists."""
+    cases, values = [], []
+    for case, value in returns.items():
+        for v in np.atleast_1d(value):
+            cases.append(case)
+            values.append(float(v))
+    return cases, values
+
+
+def grid_size(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, sweeps=None):
+    """Number of result rows run_grid would produce for these axes."""
+    n_inv = len(_case_values(investment_returns)[0])
+    n_house = len(_case_values(housing_returns)[0])
+    outer = len(purchase_prices) * len(years) * n_inv * n_house
+    for values in (sweeps or {}).values():
+        outer *= len(values)
+    return outer * (1 + 2 * len(mortgage_rates) * len(terms))
+
+
+def _grid_axes(purchase_prices, years, investment_returns, housing_returns, sweeps):
+    """Outer grid axes in table order: price, years, return and housing values, then swept parameters."""
+    sweeps = {name: list(values) for name, values in (sweeps or {}).items()}
+    unknown = set(sweeps) - set(PARAMETER_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown swept parameters: {', '.join(sorted(unknown))}")
+
+    inv_cases, inv_values = _case_values(investment_returns)
+    house_cases, house_values = _case_values(housing_returns)
+    axes = [np.asarray(purchase_prices, dtype=float), np.asarray(years), np.asarray(inv_values), np.asarray(house_values)]
+    axes += [np.asarray(values) for values in sweeps.values()]
+    return sweeps, inv_cases, house_cases, axes
+
+
+def _along(values, k, ndim):
+    # Place an axis along dimension k of the open grid
+    shape = [1] * ndim
+    shape[k] = len(values)
+    return np.asarray(values).reshape(shape)
+
+
+def scenario_rows(cash, full, hybrid, outer_shape, n_rates, n_terms):
+    """
+    Lay out per-mode results along the scenario axis in run_grid row order.
+
+    cash broadcasts to outer_shape + (1,), full and hybrid to outer_shape +
+    (n_rates * n_terms,) with terms varying fastest. Scenario order per rate
+    is Full terms then Hybrid terms, as in houseModel.run_simulation.
+    """
+    mortgage_shape = outer_shape + (n_rates, 1, n_terms)
+    blocks = [np.broadcast_to(result, outer_shape + (n_rates * n_terms,)).reshape(mortgage_shape)
+              for result in (full, hybrid)]
+    mortgage = np.concatenate(blocks, axis=-2).reshape(outer_shape + (2 * n_rates * n_terms,))
+    return np.concatenate([np.broadcast_to(cash, outer_shape + (1,)), mortgage], axis=-1)
+
+
+def open_grid(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, params,
+              sweeps=None):
+    """
+    Lay the run_grid axes out as an open grid for direct simulate_scenario calls.
+
+    Returns a dict with the outer grid 'shape' (price, years, return and
+    housing values, then swept parameters), 'price', 'duration',
+    'investment_return' and 'housing_return' each along its own dimension,
+    'params' with swept values along theirs, and 'mortgage_rate' and 'term'
+    along a trailing scenario dimension with terms varying fastest.
+    """
+    sweeps, _inv_cases, _house_cases, axes = _grid_axes(purchase_prices, years, investment_returns,
+                                                        housing_returns, sweeps)
+    ndim = len(axes) + 1
+    open_axes = [_along(a, k, ndim) for k, a in enumerate(axes)]
+    grid_params = params.as_dict() if isinstance(params, ModelParams) else dict(params)
+    grid_params.update(zip(sweeps, open_axes[4:]))
+    rates = np.asarray(mortgage_rates, dtype=float)
+    term_values = np.asarray(terms)
+    return {
+        'shape': tuple(len(a) for a in axes),
+        'price': open_axes[0],
+        'duration': open_axes[1],
+        'investment_return': open_axes[2],
+        'housing_return': open_axes[3],
+        'params': grid_params,
+        'mortgage_rate': np.repeat(rates, len(term_values)),
+        'term': np.tile(term_values, len(rates)),
+    }
+
+
+def grid_values(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, params,
+                sweeps=None, lots=None, lot_method='fifo', tax=None, out=None):
+    """
+    Net Worth and Out-of-Pocket Cost of every run_grid row, as a (2, rows) array.
+
+    Values are rounded to cents and in run_grid row order. out optionally
+    supplies the two destinations to write into instead of allocating: a
+    (2, rows) array or a pair of contiguous float64 arrays of length rows,
+    e.g. views of a shared-memory buffer. Other arguments are as for run_grid.
+    """
+    grid = open_grid(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, params,
+                     sweeps)
+    outer_shape = grid['shape']
+    price, duration = grid['price'], grid['duration']
+    inv_return, house_return = grid['investment_return'], grid['housing_return']
+    grid_params, mortgage_rate, term = grid['params'], grid['mortgage_rate'], grid['term']
+    n_rates, n_terms = len(mortgage_rates), len(terms)
+
+    simulate = _scenario_kernel()
+    if lots is not None or tax is not None:
+        simulate = functools.partial(simulate_scenario, lots=lots, lot_method=lot_method, tax=tax)
+    full_shape = outer_shape + (1 + 2 * n_rates * n_terms,)
+    n_rows = int(np.prod(full_shape))
+    with engine_metrics.timer('engine_grid_seconds'):
+        cash = simulate(price, 0, 0, inv_return, house_return, duration, 'cash', grid_params)
+        full = simulate(price, mortgage_rate, term, inv_return, house_return, duration, 'full', grid_params)
+        hybrid = simulate(price, mortgage_rate, term, inv_return, house_return, duration, 'hybrid', grid_params)
+    engine_metrics.inc('engine_grid_rows_total', n_rows)
+
+    if out is None:
+        out = np.empty((2, n_rows))
+    for k in (0, 1):
+        if out[k].shape != (n_rows,) or out[k].dtype != np.float64 or not out[k].flags.c_contiguous:
+            raise ValueError(f"out must hold two contiguous float64 arrays of length {n_rows}")
+        np.round(scenario_rows(cash[k], full[k], hybrid[k], outer_shape, n_rates, n_terms), 2,
+                 out=out[k].reshape(full_shape))
+    return out
+
+
+def grid_columns(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, sweeps=None,
+                 label_rates=False):
+    """
+    Layout of the run_grid label columns.
+
+    Returns the full grid shape (outer axes, then scenarios) and a list of
+    (name, dimension, values, categorical) in column order: row i of the
+    frame takes values[j], j being its index along that dimension.
+    """
+    sweeps, inv_cases, house_cases, axes = _grid_axes(purchase_prices, years, investment_returns,
+                                                      housing_returns, sweeps)
+    rates = np.asarray(mortgage_rates, dtype=float)
+    term_values = np.asarray(terms)
+    n_rates, n_terms = len(rates), len(term_values)
+    full_shape = tuple(len(a) for a in axes) + (1 + 2 * n_rates * n_terms,)
+
+    labels = ['Cash']
+    scenario_rates = [np.nan]
+    for rate in rates:
+        suffix = f' @{rate:.3f}' if label_rates and n_rates > 1 else ''
+        labels += [f'Full {t}y{suffix}' for t in term_values] + [f'Hybrid {t}y{suffix}' for t in term_values]
+        scenario_rates += [rate] * (2 * n_terms)
+
+    columns = [('Price', 0, axes[0], False), ('Years', 1, axes[1], False),
+               ('Return Case', 2, inv_cases, True), ('Housing Case', 3, house_cases, True)]
+    if len(axes[2]) > len(set(inv_cases)):
+        columns.append(('Investment Return', 2, axes[2], False))
+    if len(axes[3]) > len(set(house_cases)):
+        columns.append(('Housing Return', 3, axes[3], False))
+    for k, name in enumerate(sweeps, start=4):
+        columns.append((PARAMETER_LABELS[name], k, axes[k], False))
+    scenario_axis = len(axes)
+    if n_rates > 1 and not label_rates:
+        columns.append(('Mortgage Rate', scenario_axis, np.asarray(scenario_rates), False))
+    columns.append(('Scenario', scenario_axis, labels, True))
+    return full_shape, columns
+
+
+def grid_frame(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, values,
+               sweeps=None, label_rates=False, value_columns=('Net Worth', 'Out-of-Pocket Cost')):
+    """
+    Assemble the run_grid DataFrame around the values returned by grid_values.
+
+    values holds one array per name in value_columns, in row order; the
+    value columns view them without copying.
+    """
+    full_shape, columns = grid_columns(purchase_prices, years, investment_returns, housing_returns, mortgage_rates,
+                                       terms, sweeps, label_rates)
+    ndim = len(full_shape)
+
+    def column(values, k):
+        return np.broadcast_to(_along(values, k, ndim), full_shape).ravel()
+
+    def label_column(labels, k):
+        # Broadcast small integer codes instead of strings; each label is built once
+        codes, categories = pd.factorize(np.asarray(labels, dtype=object))
+        return pd.Categorical.from_codes(column(codes.astype(np.int32), k), categories=categories)
+
+    data = {name: label_column(values, k) if categorical else column(values, k)
+            for name, k, values, categorical in columns}
+    for name, column_values in zip(value_columns, values):
+        data[name] = column_values
+    return pd.DataFrame(data, copy=False)
+
+
+def run_grid(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, params, sweeps=None,
+             label_rates=False, lots=None, lot_method='fifo', tax=None):
+    """
+    Evaluate the full cartesian grid of scenarios in one vectorized pass.
+
+    Each axis is laid out along its own array dimension (an open grid) rather
+    than expanded up front, so every intermediate result is computed once at
+    the shape of the axes it actually depends on and only broadcast at the
+    end. E.g. closing costs are evaluated per price, the down-payment sale per
+    price (not per term or rate), and portfolio growth per price, return and
+    horizon (not per mortgage rate or term).
+
+    Args:
+        purchase_prices, years, mortgage_rates, terms: Lists of axis values
+        investment_returns, housing_returns: {case: value or list of values}
+        params: houseModel.ModelParams with the fixed (non-swept) inputs
+        sweeps: Optional {name: list of values} overriding fields of params;
+                each swept parameter becomes an extra grid axis and column
+        label_rates: Name multi-rate scenarios 'Full 30y @0.057' like
+                     houseModel.run_simulation instead of adding a column
+        lots, lot_method: Optional tax_lots.TaxLots table and selection
+                          method for stock sales (see simulate_scenario)
+        tax: Optional tax_brackets.TaxModel replacing the flat tax rates
+             Grids with lots or tax are always evaluated with the NumPy backend.
+
+    Returns:
+        DataFrame with the run_simulation columns and row order, plus one
+        column per swept parameter, 'Investment Return'/'Housing Return' when
+        a case carries several values and 'Mortgage Rate' when more than one
+        rate is given (unless label_rates).
+    """
+    values = grid_values(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, params,
+                         sweeps, lots, lot_method, tax)
+    return grid_frame(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, values,
+                      sweeps, label_rates)
+
+
+def run_trajectories(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, params,
+                     sweeps=None, label_rates=False):
+    """
+    Year-by-year trajectories of every scenario, from year 1 to max(years).
+
+    The closed-form model is already vectorized over the horizon, so the
+    whole trajectory is one open-grid pass with a dense year axis: every
+    year costs the same as any one horizon, with no per-horizon reruns, and
+    run_grid's rows are the trajectory's rows at the requested years. Adds
+    the Invested Balance, Home Equity and Loan Balance behind Net Worth;
+    Out-of-Pocket Cost is cumulative to each year. Other arguments and the
+    label columns are as for run_grid.
+    """
+    years = list(range(1, max(years) + 1)) if len(years) else []
+    grid = open_grid(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, params,
+                     sweeps)
+    n_rates, n_terms = len(mortgage_rates), len(terms)
+    results = [simulate_scenario(grid['price'], rate, term, grid['investment_return'], grid['housing_return'],
+                                 grid['duration'], mode, grid['params'], components=True)
+               for mode, rate, term in (('cash', 0, 0), ('full', grid['mortgage_rate'], grid['term']),
+                                        ('hybrid', grid['mortgage_rate'], grid['term']))]
+    values = [np.round(scenario_rows(*(result[name] for result in results), grid['shape'], n_rates, n_terms),
+                       2).ravel()
+              for name in TRAJECTORY_COLUMNS]
+    return grid_frame(purchase_prices, years, investment_returns, housing_returns, mortgage_rates, terms, values,
+                      sweeps, label_rates, value_columns=TRAJECTORY_COLUMNS)
+
+
+# --- 2-D views ---
+
+def pivot_grid(df, value, x, y):
+    """
+    Scatter one result column onto a (y, x) array in a single vectorized step.
+
+    Rows are placed by the sorted unique values of columns x and y, so the
+    result does not depend on row order. A column that is NaN throughout
+    (e.g. 'Mortgage Rate' for Cash) collapses to length 1 and broadcasts
+    against full grids.
+
+    Returns:
+        (x_values, y_values, grid) with grid[i, j] at (y_values[i], x_values[j])
+    """
+    x_values, x_codes = np.unique(df[x].to_numpy(dtype=float), return_inverse=True)
+    y_values, y_codes = np.unique(df[y].to_numpy(dtype=float), return_inverse=True)
+    grid = np.full((len(y_values), len(x_values)), np.nan)
+    grid[y_codes, x_codes] = df[value].to_numpy(dtype=float)
+    return x_values, y_values, grid
+
+
+def advantage_grid(df, x, y, scenario, baseline=None, value='Net Worth'):
+    """
+    Return (x_values, y_values, grid) of `value` for `scenario` minus `baseline`.
+
+    df should already be restricted to a single value of every dimension other
+    than x and y. With baseline=None the scenario's own values are returned.
+    """
+    x_values, y_values, grid = pivot_grid(df[df['Scenario'] == scenario], value, x, y)
+    if baseline is not None:
+        _bx, _by, base = pivot_grid(df[df['Scenario'] == baseline], value, x, y)
+        grid = grid - base
+    return x_values, y_values, grid
+
+
+# Backend can be chosen per process, e.g. HOUSE_MODEL_BACKEND=numba
+if os.environ.get('HOUSE_MODEL_BACKEND'):
+    set_backend(os.environ['HOUSE_MODEL_BACKEND'])